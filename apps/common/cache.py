@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+from typing import (
+    Dict,
+    Iterable,
+    Tuple,
+    Type,
+)
+from django.conf import settings
+from django.core.cache import (
+    cache,
+    caches,
+)
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Model
+from django.utils.http import quote_etag
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .conditional import Validators
+
+
+GENERATION_KEY = 'generation:{label}'
+PAGE_KEY = 'page:{digest}'
+# generations of a process-local cache are bumped in the writing
+# process only, pages the other processes cached live until they expire
+LOCAL_PAGE_CACHE_TIMEOUT = 100
+
+
+def generation_key(model: Type[Model]) -> str:
+    return GENERATION_KEY.format(label=model._meta.label_lower)
+
+
+def page_cache_timeout() -> int:
+    """
+    `PAGE_CACHE_TIMEOUT`, kept short when the cache
+    is not shared between the processes
+    """
+    if isinstance(caches['default'], LocMemCache):
+        return min(settings.PAGE_CACHE_TIMEOUT, LOCAL_PAGE_CACHE_TIMEOUT)
+    return settings.PAGE_CACHE_TIMEOUT
+
+
+def bump_generation(model: Type[Model]) -> None:
+    """
+    Invalidate every cached payload built from `model`
+    """
+    key = generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # a lost counter restarts from a value never used before,
+        # so stale pages can not match it again
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_generations(models: Iterable[Type[Model]]) -> Dict[str, int]:
+    keys = [generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return generations
+
+
+async def aget_generations(models: Iterable[Type[Model]]) -> Dict[str, int]:
+    keys = [generation_key(model) for model in models]
+    generations = await cache.aget_many(keys)
+    for key in keys:
+        if key not in generations:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            generations[key] = await cache.aget(key)
+    return generations
+
+
+def request_digest(request: Request, generations: Dict[str, int]) -> str:
+    parts = [
+        request.get_host(),
+        request.path,
+        *(
+            f'{name}={value}'
+            for name, values in sorted(request.query_params.lists())
+            for value in values
+        ),
+        *(f'{key}={value}' for key, value in sorted(generations.items())),
+    ]
+    return hashlib.md5('&'.join(parts).encode()).hexdigest()
+
+
+def page_digest(request: Request, models: Iterable[Type[Model]]) -> str:
+    """
+    Hash of the page URL and generations of `models`,
+    changes whenever the page content may change
+    """
+    return request_digest(request, get_generations(models))
+
+
+async def apage_digest(request: Request, models: Iterable[Type[Model]]) -> str:
+    return request_digest(request, await aget_generations(models))
+
+
+def page_cache_key(request: Request, models: Iterable[Type[Model]]) -> str:
+    return PAGE_KEY.format(digest=page_digest(request, models))
+
+
+class CacheStats:
+    """
+    In-process counters of page cache lookups
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+cache_stats = CacheStats()
+
+
+class CachedListMixin:
+    """
+    Serve list pages from the cache until one of
+    `cache_models` is changed, pages the client
+    already has are answered with `304 Not Modified`
+    """
+    cache_models: Tuple[Type[Model], ...] = ()
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        digest = page_digest(request, self.cache_models)
+        validators = Validators(quote_etag(digest))
+        response = validators.conditional_response(request)
+        if response is not None:
+            return response
+
+        key = PAGE_KEY.format(digest=digest)
+        data = cache.get(key)
+        if data is not None:
+            cache_stats.hit()
+            return validators.apply(Response(data, headers={'X-Cache': 'HIT'}))
+
+        cache_stats.miss()
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, timeout=page_cache_timeout())
+        response['X-Cache'] = 'MISS'
+        return validators.apply(response)
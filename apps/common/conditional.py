@@ -0,0 +1,64 @@
+import hashlib
+from datetime import datetime
+from typing import Any
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    http_date,
+    quote_etag,
+)
+from rest_framework.request import Request
+
+
+def request_etag(request: Request, *validators: Any) -> str:
+    """
+    Strong ETag of the response to `request`, built from
+    the URL and values that change with the payload
+    """
+    parts = [
+        request.path,
+        *(
+            f'{name}={value}'
+            for name, values in sorted(request.query_params.lists())
+            for value in values
+        ),
+        *(str(validator) for validator in validators),
+    ]
+    return quote_etag(hashlib.md5('&'.join(parts).encode()).hexdigest())
+
+
+class Validators:
+    """
+    ETag and Last-Modified of a response, checked against
+    the request before the body is built
+    """
+    def __init__(
+            self,
+            etag: str,
+            last_modified: datetime | None = None,
+        ) -> None:
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def conditional_response(self, request: Request) -> HttpResponse | None:
+        """
+        `304 Not Modified` response when the client copy is fresh
+        (or `412 Precondition Failed`), None to build the response
+        """
+        response = get_conditional_response(
+            request,
+            etag=self.etag,
+            last_modified=(
+                int(self.last_modified.timestamp())
+                if self.last_modified else None
+            ),
+        )
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response: HttpResponse) -> HttpResponse:
+        response['ETag'] = self.etag
+        if self.last_modified:
+            response['Last-Modified'] = http_date(self.last_modified.timestamp())
+        return response
@@ -0,0 +1,230 @@
+"""
+In-process request metrics. Wall time, database time, number
+of queries and render time of every request are reported in
+the `Server-Timing` header and aggregated into histograms per
+resolved URL name, rendered in the Prometheus text format
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Tuple,
+)
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+)
+from django.db import connections
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+)
+
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+# name: (help, buckets)
+METRICS = {
+    'request_duration_seconds': ('Wall time of the request', DURATION_BUCKETS),
+    'db_duration_seconds': ('Time spent in SQL queries', DURATION_BUCKETS),
+    'render_duration_seconds': ('Time spent rendering the response body', DURATION_BUCKETS),
+    'db_queries': ('Number of SQL queries', QUERY_BUCKETS),
+}
+UNRESOLVED_VIEW = 'unresolved'
+
+
+class RequestTimings:
+    __slots__ = (
+        'started',
+        'db_time',
+        'queries',
+        'render_time',
+    )
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.render_time = 0.0
+
+
+# copied into the threads of `sync_to_async`,
+# so queries of async views are recorded too
+current_timings: ContextVar[RequestTimings | None] = ContextVar('current_timings', default=None)
+
+
+def record_query(
+        execute: Callable,
+        sql: str,
+        params: Any,
+        many: bool,
+        context: Dict[str, Any],
+    ) -> Any:
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_time += time.perf_counter() - started
+        timings.queries += 1
+
+
+def install_query_recorder(connection, **kwargs: Any) -> None:
+    """
+    Receiver of `connection_created`, wrappers outlive reconnects
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def measure_render() -> Iterator[None]:
+    """
+    Count the block as render time of the current request
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.render_time += time.perf_counter() - started
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # the last one counts values above every bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    In-process histograms of the request metrics per view,
+    every worker process keeps and exposes its own
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = dict()
+
+    def observe(self, view: str, values: Dict[str, float]) -> None:
+        with self._lock:
+            for name, value in values.items():
+                histogram = self._histograms.get((name, view))
+                if histogram is None:
+                    histogram = self._histograms[(name, view)] = Histogram(METRICS[name][1])
+                histogram.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self) -> str:
+        lines: List[str] = list()
+        with self._lock:
+            for name, (description, _) in METRICS.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, view), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{view="{view}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{view="{view}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """
+    Record timings of every request into `metrics`
+    and report them in the `Server-Timing` header.
+    Should be the first middleware to measure the others too
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # connections opened before the middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    def process_template_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        # DRF responses are rendered after the view returns
+        timings = current_timings.get()
+        if timings is not None:
+            started = time.perf_counter()
+
+            def rendered(response: HttpResponse) -> None:
+                timings.render_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(
+            self,
+            request: HttpRequest,
+            response: HttpResponse,
+            timings: RequestTimings,
+        ) -> HttpResponse:
+        duration = time.perf_counter() - timings.started
+        resolver_match = getattr(request, 'resolver_match', None)
+        metrics.observe(
+            resolver_match.view_name if resolver_match else UNRESOLVED_VIEW,
+            {
+                'request_duration_seconds': duration,
+                'db_duration_seconds': timings.db_time,
+                'render_duration_seconds': timings.render_time,
+                'db_queries': timings.queries,
+            },
+        )
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timings.db_time * 1000:.2f};desc="{timings.queries} queries"',
+            f'render;dur={timings.render_time * 1000:.2f}',
+            f'total;dur={duration * 1000:.2f}',
+        ))
+        return response
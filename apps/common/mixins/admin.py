@@ -28,7 +28,9 @@ class SoftDeletionAdmin(admin.ModelAdmin):
             request: HttpRequest,
             queryset: QuerySet
         ) -> None:
-        queryset.update(is_active=False)
+        # one by one, so the model hooks and signals run
+        for obj in queryset:
+            obj.soft_delete()
         messages.success(request, Messages.DELETE_COMPLETE)
 
     def restore(
@@ -36,7 +38,8 @@ class SoftDeletionAdmin(admin.ModelAdmin):
             request: HttpRequest,
             queryset: QuerySet
         ) -> None:
-        queryset.update(is_active=True)
+        for obj in queryset:
+            obj.restore()
         messages.success(request, Messages.RESTORE_COMPLETE)
 
     soft_delete.short_description = 'Soft Deletion'
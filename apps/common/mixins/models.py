@@ -1,6 +1,11 @@
 import uuid
+from typing import (
+    Any,
+    Iterable,
+)
 from django.db import models
 from django.db.models import Manager
+from django.utils import timezone
 from .managers import SoftDeletionManager
 
 
@@ -9,18 +14,35 @@ class SoftDeletionModel(models.Model):
     Abstract model with soft deletion func-ty
     """
     is_active = models.BooleanField(default=True)
+    deactivated_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
     objects = Manager()
     active_objects = SoftDeletionManager()
 
     class Meta:
         abstract = True
 
+    @classmethod
+    def restore_archived(cls, pks: Iterable[Any]) -> int:
+        """
+        Move archived rows back into the table as inactive rows,
+        models with an archive override it
+        """
+        return 0
+
     def soft_delete(self) -> None:
         self.is_active = False
+        self.deactivated_at = timezone.now()
         self.save()
 
     def restore(self) -> None:
+        if self.restore_archived([self.pk]):
+            self.refresh_from_db()
         self.is_active = True
+        self.deactivated_at = None
         self.save()
 
 
@@ -31,7 +53,6 @@ class UUIDModel(models.Model):
     id = models.UUIDField(
         primary_key = True,
         default = uuid.uuid4,
-        db_index = True,
         editable = False
     ) 
 
@@ -0,0 +1,192 @@
+import base64
+import json
+from typing import (
+    Any,
+    List,
+    Sequence,
+)
+from django.db.models import (
+    F,
+    Model,
+    Q,
+    QuerySet,
+)
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import (
+    remove_query_param,
+    replace_query_param,
+)
+
+
+class KeysetPaginationMixin:
+    """
+    Opt-in keyset pagination for views with `keyset_ordering`,
+    enabled by `?pagination=cursor`. Pages are found by comparing
+    with the last row of the previous page, so there is neither
+    OFFSET nor COUNT(*). NULLs are ordered as the smallest values
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_keyset(self, request: Request, view: Any) -> bool:
+        return (
+            getattr(view, 'keyset_ordering', None) is not None
+            and request.query_params.get(self.mode_query_param) == self.cursor_mode
+        )
+
+    def encode_cursor(self, values: Sequence[Any]) -> str:
+        raw = json.dumps([None if value is None else str(value) for value in values])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, model: type[Model], cursor: str) -> List[Any]:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.keyset_ordering):
+                raise ValueError
+            return [
+                None if value is None
+                else model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.keyset_ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def keyset_filter(self, values: Sequence[Any]) -> Q:
+        """
+        Rows strictly after `values` in `keyset_ordering`
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for name, value in zip(self.keyset_ordering, values):
+            field = name.lstrip('-')
+            if name.startswith('-'):
+                after = (
+                    Q(pk__in=[]) if value is None
+                    else Q(**{f'{field}__lt': value}) | Q(**{f'{field}__isnull': True})
+                )
+            else:
+                after = (
+                    Q(**{f'{field}__isnull': False}) if value is None
+                    else Q(**{f'{field}__gt': value})
+                )
+            condition |= equal & after
+            equal &= (
+                Q(**{f'{field}__isnull': True}) if value is None
+                else Q(**{field: value})
+            )
+
+        # the same rows, but bounded by a plain range
+        # of the leading field, so an index can be scanned
+        name, value = self.keyset_ordering[0], values[0]
+        if value is not None and not name.startswith('-'):
+            condition &= Q(**{f'{name}__gte': value})
+        return condition
+
+    def keyset_order_by(self) -> List[Any]:
+        return [
+            F(name[1:]).desc(nulls_last=True) if name.startswith('-')
+            else F(name).asc(nulls_first=True)
+            for name in self.keyset_ordering
+        ]
+
+    def keyset_queryset(
+            self,
+            queryset: QuerySet,
+            request: Request,
+            view: Any,
+        ) -> QuerySet:
+        """
+        One row more than the page, to tell if there is a next page
+        """
+        self.keyset_ordering = view.keyset_ordering
+        self.limit = self.get_limit(request)
+        self.request = request
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(queryset.model, cursor)
+            queryset = queryset.filter(self.keyset_filter(values))
+        return queryset.order_by(*self.keyset_order_by())[:self.limit + 1]
+
+    def keyset_page(self, rows: List[Model]) -> List[Model]:
+        self.next_cursor = None
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            last = rows[-1]
+            self.next_cursor = self.encode_cursor([
+                getattr(last, name.lstrip('-')) for name in self.keyset_ordering
+            ])
+        return rows
+
+    def paginate_keyset(
+            self,
+            queryset: QuerySet,
+            request: Request,
+            view: Any,
+        ) -> List[Model]:
+        return self.keyset_page(list(self.keyset_queryset(queryset, request, view)))
+
+    async def apaginate_keyset(
+            self,
+            queryset: QuerySet,
+            request: Request,
+            view: Any,
+        ) -> List[Model]:
+        return self.keyset_page([
+            row async for row in self.keyset_queryset(queryset, request, view)
+        ])
+
+    def get_next_keyset_link(self) -> str | None:
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+
+class LimitOffsetOrKeysetPagination(KeysetPaginationMixin, LimitOffsetPagination):
+    def paginate_queryset(
+            self,
+            queryset: QuerySet,
+            request: Request,
+            view: Any = None,
+        ) -> List[Model] | None:
+        self.keyset = self.is_keyset(request, view)
+        if self.keyset:
+            return self.paginate_keyset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(
+            self,
+            queryset: QuerySet,
+            request: Request,
+            view: Any = None,
+        ) -> List[Model] | None:
+        """
+        Same as `paginate_queryset` with the async ORM
+        """
+        self.keyset = self.is_keyset(request, view)
+        if self.keyset:
+            return await self.apaginate_keyset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [row async for row in queryset[self.offset:self.offset + self.limit]]
+
+    def get_paginated_response(self, data: Any) -> Response:
+        if self.keyset:
+            return Response({
+                'next': self.get_next_keyset_link(),
+                'results': data,
+            })
+        return super().get_paginated_response(data)
@@ -0,0 +1,70 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Sequence,
+)
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    connections,
+)
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    TestCase assertions that fail when a code path
+    issues more queries than it is allowed to
+    """
+    def capture_queries(
+            self,
+            func: Callable[[], Any],
+            using: str = DEFAULT_DB_ALIAS,
+        ) -> List[Dict[str, str]]:
+        with CaptureQueriesContext(connections[using]) as queries:
+            func()
+        # copied, the query log is reset by the next test client request
+        return list(queries.captured_queries)
+
+    def format_queries(self, queries: List[Dict[str, str]]) -> str:
+        return '\n'.join(
+            f'{index}. {query["sql"]}'
+            for index, query in enumerate(queries, start=1)
+        )
+
+    def assertQueryBudget(
+            self,
+            budget: int,
+            func: Callable[[], Any],
+            using: str = DEFAULT_DB_ALIAS,
+        ) -> None:
+        """
+        `func()` should issue at most `budget` queries
+        """
+        queries = self.capture_queries(func, using)
+        if len(queries) > budget:
+            self.fail(
+                f'{len(queries)} queries executed, the budget is {budget}\n'
+                f'{self.format_queries(queries)}'
+            )
+
+    def assertQueriesDoNotGrow(
+            self,
+            func: Callable[[int], Any],
+            sizes: Sequence[int] = (1, 10),
+            using: str = DEFAULT_DB_ALIAS,
+        ) -> None:
+        """
+        `func(size)` should issue the same number of queries
+        for every size, e.g. of a page
+        """
+        counts = dict()
+        for size in sizes:
+            queries = self.capture_queries(lambda: func(size), using)
+            counts[size] = len(queries)
+            if counts[size] > counts[sizes[0]]:
+                self.fail(
+                    f'Number of queries grows with size: {counts}\n'
+                    f'{self.format_queries(queries)}'
+                )
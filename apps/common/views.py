@@ -0,0 +1,91 @@
+from typing import (
+    Any,
+    Tuple,
+    Type,
+)
+from django.core.cache import cache
+from django.db.models import (
+    Model,
+    QuerySet,
+)
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+)
+from django.utils.http import quote_etag
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.serializers import Serializer
+from rest_framework.settings import api_settings
+
+from .cache import (
+    PAGE_KEY,
+    apage_digest,
+    cache_stats,
+    page_cache_timeout,
+)
+from .conditional import Validators
+from .metrics import measure_render
+
+
+class AsyncReadView(View):
+    """
+    Async Django view for the ASGI read path, DRF views run
+    only synchronously. Requests are wrapped into DRF requests
+    and the data is rendered the same way DRF renders it
+    """
+    renderer = JSONRenderer()
+
+    async def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        try:
+            return await super().dispatch(Request(request), *args, **kwargs)
+        except APIException as error:
+            return self.render({'detail': error.detail}, status=error.status_code)
+
+    def render(self, data: Any, status: int = 200) -> HttpResponse:
+        with measure_render():
+            content = self.renderer.render(data)
+        return HttpResponse(
+            content,
+            status=status,
+            content_type=self.renderer.media_type,
+        )
+
+
+class AsyncCachedListView(AsyncReadView):
+    """
+    Async counterpart of `ListAPIView` with `CachedListMixin`,
+    pages are shared with the sync views through the cache
+    """
+    queryset: QuerySet
+    serializer_class: Type[Serializer]
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    cache_models: Tuple[Type[Model], ...] = ()
+
+    async def get(self, request: Request, *args, **kwargs) -> HttpResponse:
+        digest = await apage_digest(request, self.cache_models)
+        validators = Validators(quote_etag(digest))
+        response = validators.conditional_response(request)
+        if response is not None:
+            return response
+
+        key = PAGE_KEY.format(digest=digest)
+        data = await cache.aget(key)
+        if data is not None:
+            cache_stats.hit()
+            response = self.render(data)
+            response['X-Cache'] = 'HIT'
+            return validators.apply(response)
+
+        cache_stats.miss()
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(self.queryset.all(), request, view=self)
+        data = paginator.get_paginated_response(
+            self.serializer_class(page, many=True).data,
+        ).data
+        await cache.aset(key, data, timeout=page_cache_timeout())
+        response = self.render(data)
+        response['X-Cache'] = 'MISS'
+        return validators.apply(response)
@@ -1,26 +1,206 @@
-from django.contrib import admin
-from common.mixins.admin import ReadOnlyFieldsAdmin
+from collections import Counter
+from enum import Enum
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.widgets import AdminDateWidget
+from django.db.models import QuerySet
+from django.forms import BaseInlineFormSet
+from django.http.request import HttpRequest
+from django.urls import reverse
+from django.utils.html import format_html
+from rest_framework.serializers import ValidationError
+from common.mixins.admin import (
+    BaseAdmin,
+    ReadOnlyFieldsAdmin,
+)
+from .api.serializers import (
+    BulkSetPriceForPeriodSerializer,
+    BulkStatus,
+)
 from .models import (
+    ArchivedPriceInterval,
+    ArchivedProduct,
     Category,
+    CategoryPriceRollup,
     Product,
-    PriceItem,
+    PriceInterval,
 )
 
 
-class PriceItemInline(admin.TabularInline):
-    model = PriceItem
+class PriceMessages(str, Enum):
+    PRICES_SET = 'Price {price} is set from {start_date} to {end_date} for {updated} products'
+    INACTIVE_SKIPPED = '{count} inactive products are skipped'
+    READ_ONLY_SKIPPED = '{count} products with detached or downsampled prices in the range are skipped'
+    PRICE_HISTORY = 'All price intervals'
+
+
+class ArchiveMessages(str, Enum):
+    RESTORED = '{count} products are restored'
+    SKU_TAKEN = '{count} products are left in the archive, their sku is taken'
+
+
+class RecentIntervalsFormSet(BaseInlineFormSet):
+    """
+    Only the newest `limit` intervals of the product get a form,
+    the rest are paged in the price interval changelist
+    """
+    limit = 50
+
+    def get_queryset(self) -> QuerySet:
+        queryset = super().get_queryset()
+        if not queryset.query.is_sliced:
+            queryset = self._queryset = queryset.order_by('-valid_from')[:self.limit]
+        return queryset
+
+
+class PriceIntervalInline(admin.TabularInline):
+    model = PriceInterval
+    formset = RecentIntervalsFormSet
     extra = 1
+    verbose_name_plural = f'Newest {RecentIntervalsFormSet.limit} price intervals'
+
+
+class SetPriceActionForm(ActionForm):
+    """Action bar fields of `ProductAdmin.set_price`"""
+    start_date = forms.DateField(required=False, widget=AdminDateWidget)
+    end_date = forms.DateField(required=False, widget=AdminDateWidget)
+    price = forms.DecimalField(
+        required=False,
+        max_digits=7,
+        decimal_places=2,
+    )
+
+
+def error_message(detail) -> str:
+    if isinstance(detail, dict):
+        return '; '.join(f'{field}: {error_message(errors)}' for field, errors in detail.items())
+    if isinstance(detail, list):
+        return ' '.join(error_message(error) for error in detail)
+    return str(detail)
 
 
 @admin.register(Product)
-class ProductAdmin(ReadOnlyFieldsAdmin):
+class ProductAdmin(BaseAdmin):
     list_display = (
         'id',
         'name',
         'sku',
         'category',
+        'current_price',
+        'is_active',
+    )
+    list_filter = ('is_active',)
+    list_select_related = ('category',)
+    # exact, case insensitive match on `product_sku_upper_idx`
+    search_fields = ('=sku',)
+    # the changelist is paged without counting every product
+    show_full_result_count = False
+    readonly_fields = BaseAdmin.readonly_fields + (
+        'current_price',
+        'current_price_date',
+        'previous_price',
+        'deactivated_at',
+        'price_history',
+    )
+    inlines = [PriceIntervalInline]
+    action_form = SetPriceActionForm
+    actions = BaseAdmin.actions + ('set_price',)
+
+    @admin.display(description='Price history')
+    def price_history(self, obj: Product) -> str:
+        if obj.pk is None:
+            return '-'
+        return format_html(
+            '<a href="{}?product__id__exact={}">{}</a>',
+            reverse('admin:products_priceinterval_changelist'),
+            obj.pk,
+            PriceMessages.PRICE_HISTORY.value,
+        )
+
+    def set_price(
+            self,
+            request: HttpRequest,
+            queryset: QuerySet
+        ) -> None:
+        # same validation and write path as the bulk set-price endpoint
+        serializer = BulkSetPriceForPeriodSerializer(data={
+            'product_ids': [str(product_id) for product_id in queryset.values_list('id', flat=True)],
+            'start_date': request.POST.get('start_date'),
+            'end_date': request.POST.get('end_date'),
+            'price': request.POST.get('price'),
+        })
+        try:
+            serializer.is_valid(raise_exception=True)
+            results = serializer.save()['results']
+        except ValidationError as error:
+            messages.error(request, error_message(error.detail))
+            return
+        statuses = Counter(result['status'] for result in results)
+        messages.success(request, PriceMessages.PRICES_SET.value.format(
+            updated=statuses[BulkStatus.UPDATED.value],
+            **serializer.validated_data,
+        ))
+        if statuses[BulkStatus.NOT_FOUND.value]:
+            messages.warning(request, PriceMessages.INACTIVE_SKIPPED.value.format(
+                count=statuses[BulkStatus.NOT_FOUND.value],
+            ))
+        if statuses[BulkStatus.READ_ONLY.value]:
+            messages.warning(request, PriceMessages.READ_ONLY_SKIPPED.value.format(
+                count=statuses[BulkStatus.READ_ONLY.value],
+            ))
+
+    set_price.short_description = 'Set price for range'
+
+    def save_formset(
+            self,
+            request: HttpRequest,
+            form,
+            formset: BaseInlineFormSet,
+            change: bool,
+        ) -> None:
+        if formset.model is not PriceInterval:
+            super().save_formset(request, form, formset, change)
+            return
+        product = form.instance
+        saved_intervals = list(product.price_intervals.values_list('valid_from', 'valid_to', 'price'))
+        super().save_formset(request, form, formset, change)
+        PriceInterval.objects.update_cumulative(product)
+        PriceInterval.objects.refresh_current_prices([product.pk])
+        category_id = product.category_id if product.is_active else None
+        CategoryPriceRollup.objects.move_intervals(saved_intervals, category_id, None)
+        CategoryPriceRollup.objects.move_intervals(
+            product.price_intervals.values_list('valid_from', 'valid_to', 'price'),
+            None,
+            category_id,
+        )
+
+
+@admin.register(PriceInterval)
+class PriceIntervalAdmin(admin.ModelAdmin):
+    """
+    Paged, read-only price history, intervals are
+    changed on the product page or by the set-price action
+    """
+    list_display = (
+        'product',
+        'valid_from',
+        'valid_to',
+        'price',
     )
-    inlines = [PriceItemInline]
+    list_select_related = ('product',)
+    show_full_result_count = False
+    # filtered by product from `ProductAdmin.price_history`
+    list_filter = ('valid_from',)
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def has_change_permission(self, request: HttpRequest, obj=None) -> bool:
+        return False
+
+    def has_delete_permission(self, request: HttpRequest, obj=None) -> bool:
+        return False
 
 
 @admin.register(Category)
@@ -35,3 +215,57 @@ class CategoryAdmin(ReadOnlyFieldsAdmin):
         'id',
         'name',
     )
+
+
+class ArchivedPriceIntervalInline(admin.TabularInline):
+    model = ArchivedPriceInterval
+    formset = RecentIntervalsFormSet
+    verbose_name_plural = PriceIntervalInline.verbose_name_plural
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request: HttpRequest, obj=None) -> bool:
+        return False
+
+    def has_change_permission(self, request: HttpRequest, obj=None) -> bool:
+        return False
+
+
+@admin.register(ArchivedProduct)
+class ArchivedProductAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'name',
+        'sku',
+        'category',
+        'deactivated_at',
+        'archived_at',
+    )
+    list_select_related = ('category',)
+    show_full_result_count = False
+    inlines = [ArchivedPriceIntervalInline]
+    actions = ('restore',)
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def has_change_permission(self, request: HttpRequest, obj=None) -> bool:
+        return False
+
+    def restore(
+            self,
+            request: HttpRequest,
+            queryset: QuerySet
+        ) -> None:
+        product_ids = list(queryset.values_list('id', flat=True))
+        restored = Product.restore_archived(product_ids)
+        for product in Product.objects.filter(pk__in=product_ids):
+            product.restore()
+        if restored:
+            messages.success(request, ArchiveMessages.RESTORED.value.format(count=restored))
+        if restored < len(product_ids):
+            messages.warning(request, ArchiveMessages.SKU_TAKEN.value.format(
+                count=len(product_ids) - restored,
+            ))
+
+    restore.short_description = 'Restoring'
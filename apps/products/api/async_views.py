@@ -0,0 +1,127 @@
+from decimal import Decimal
+from uuid import UUID
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.request import Request
+
+from common.views import (
+    AsyncCachedListView,
+    AsyncReadView,
+)
+from products.models import (
+    Product,
+    PriceInterval,
+)
+from products.partitions import reads_cold
+from products.retention import (
+    average_price,
+    reads_coarse,
+)
+from .serializers import (
+    ProductSerializer,
+    latest_price_intervals,
+)
+from .views import (
+    CategoryListView,
+    ErrorMessages,
+    ProductDetailsView,
+    ProductListView,
+    QueryParamError,
+    parse_limit,
+    parse_period,
+    product_validators,
+    with_validators,
+)
+
+
+class AsyncCategoryListView(AsyncCachedListView):
+    serializer_class = CategoryListView.serializer_class
+    queryset = CategoryListView.queryset
+    cache_models = CategoryListView.cache_models
+    keyset_ordering = CategoryListView.keyset_ordering
+
+
+class AsyncProductListView(AsyncCachedListView):
+    serializer_class = ProductListView.serializer_class
+    queryset = ProductListView.queryset
+    cache_models = ProductListView.cache_models
+    keyset_ordering = ProductListView.keyset_ordering
+
+
+class AsyncProductDetailsView(AsyncReadView):
+    async def get(self, request: Request, id: UUID) -> HttpResponse:
+        product: Product | None = await with_validators(
+            ProductDetailsView.queryset,
+        ).filter(id=id).afirst()
+        if not product:
+            return self.render(
+                {'error': ErrorMessages.NO_PRODUCT},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        try:
+            price_intervals_limit = parse_limit(
+                request.query_params,
+                'price_intervals',
+                settings.PRICE_HISTORY_EMBED_LIMIT,
+                settings.PRICE_HISTORY_MAX_PAGE_SIZE,
+            )
+        except QueryParamError as error:
+            return self.render(
+                {'error': error.message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        validators = product_validators(request, product)
+        not_modified = validators.conditional_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        product.latest_price_intervals = [
+            row async for row in latest_price_intervals(product, price_intervals_limit)
+        ] if price_intervals_limit else []
+        serializer = ProductSerializer(
+            instance=product,
+            context={'price_intervals_limit': price_intervals_limit},
+        )
+        return validators.apply(self.render(serializer.data))
+
+
+class AsyncGetPriceForPeriodView(AsyncReadView):
+    async def get(self, request: Request, id: UUID) -> HttpResponse:
+        product: Product | None = await with_validators(
+            Product.active_objects,
+        ).filter(id=id).afirst()
+
+        if not product:
+            return self.render(
+                {'error': ErrorMessages.NO_PRODUCT},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            start_date, end_date = parse_period(request.query_params)
+        except QueryParamError as error:
+            return self.render(
+                {'error': error.message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        validators = product_validators(request, product)
+        not_modified = validators.conditional_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        if reads_cold(product, start_date) or reads_coarse(product, start_date):
+            # detached partitions are listed through the sync introspection
+            price: Decimal | None = await sync_to_async(average_price)(product, start_date, end_date)
+        else:
+            price = await PriceInterval.objects.filter(
+                product=product,
+            ).acumulative_average_price(start_date, end_date)
+
+        if price is not None:
+            price = round(price, 2)
+
+        return validators.apply(self.render({'average_price': price}))
@@ -1,8 +1,6 @@
 from uuid import UUID
-from datetime import (
-    datetime,
-    timedelta,
-)
+from datetime import datetime
+from decimal import Decimal
 from enum import Enum
 from typing import (
     Any,
@@ -10,17 +8,22 @@ from typing import (
     Dict,
     NoReturn
 )
-from django.db.models import QuerySet
+from django.conf import settings
+from django.db.models import (
+    Q,
+    QuerySet,
+)
 from rest_framework import serializers
 from rest_framework.serializers import (
     ModelSerializer,
     ValidationError,
     SerializerMethodField,
 )
+from products.managers import ColdPricesError
 from products.models import (
     Category,
     Product,
-    PriceItem,
+    PriceInterval,
 )
 
 
@@ -28,6 +31,41 @@ class ErrorMessages(str, Enum):
     NO_CATEGORY = 'Category with given `name` not found'
     DATE_ERROR = 'End date must be after start date'
     NO_PRODUCT = 'Product with given `id` not found'
+    NO_CATEGORY_ID = 'Category with given `id` not found'
+    CATEGORY_OR_PRODUCTS = 'Either `category_id` or `product_ids` should be given'
+    COLD_PRICES = 'Prices before {date} are detached or downsampled and can not be changed'
+
+
+class BulkStatus(str, Enum):
+    UPDATED = 'updated'
+    NOT_FOUND = 'not_found'
+    READ_ONLY = 'read_only'
+
+
+def set_prices(
+        product_ids: List[UUID],
+        start_date: datetime,
+        end_date: datetime,
+        price: Decimal,
+        skip_read_only: bool = False,
+    ) -> List[UUID]:
+    """
+    Write path of the set-price endpoints, products deactivated
+    after validation are skipped once their rows are locked
+    """
+    try:
+        return PriceInterval.objects.set_prices(
+            product_ids,
+            start_date,
+            end_date,
+            price,
+            active_only=True,
+            skip_read_only=skip_read_only,
+        )
+    except ColdPricesError as error:
+        raise ValidationError({
+            'start_date': ErrorMessages.COLD_PRICES.value.format(date=error.cold_prices_until),
+        })
 
 
 class SimpleCategorySerializer(ModelSerializer):
@@ -55,11 +93,12 @@ class UpdateCategorySerializer(ModelSerializer):
         )
 
 
-class PriceItemSerializer(ModelSerializer):
+class PriceIntervalSerializer(ModelSerializer):
     class Meta:
-        model = PriceItem
+        model = PriceInterval
         fields = (
-            'date',
+            'valid_from',
+            'valid_to',
             'price',
         )
 
@@ -73,6 +112,9 @@ class SimpleProductSerializer(ModelSerializer):
             'name',
             'category_name',
             'sku',
+            'current_price',
+            'current_price_date',
+            'previous_price',
         )
         read_only_fields = fields
 
@@ -82,9 +124,17 @@ class SimpleProductSerializer(ModelSerializer):
         return None
 
 
+def latest_price_intervals(product: Product, limit: int) -> QuerySet:
+    return product.price_intervals.order_by('-valid_from').values_list(
+        'valid_from',
+        'valid_to',
+        'price',
+    )[:limit]
+
+
 class ProductSerializer(ModelSerializer):
     category = SimpleCategorySerializer()
-    price_items = SerializerMethodField()
+    price_intervals = SerializerMethodField()
     class Meta:
         model = Product
         fields = (
@@ -93,14 +143,28 @@ class ProductSerializer(ModelSerializer):
             'category',
             'sku',
             'description',
-            'price_items',
+            'current_price',
+            'current_price_date',
+            'previous_price',
+            'price_intervals',
         )
         read_only_fields = fields
 
-    def get_price_items(self, obj: Product) -> List[Dict[str, str]]:
-        price_items = obj.price_items.all().order_by('-date')
-        serializer = PriceItemSerializer(price_items, many=True)
-        return serializer.data
+    def get_price_intervals(self, obj: Product) -> List[Dict[str, str]]:
+        limit = self.context.get(
+            'price_intervals_limit',
+            settings.PRICE_HISTORY_EMBED_LIMIT,
+        )
+        if not limit:
+            return []
+        # rows fetched in advance, e.g. by the async views
+        price_intervals = getattr(obj, 'latest_price_intervals', None)
+        if price_intervals is None:
+            price_intervals = latest_price_intervals(obj, limit)
+        return [
+            {'valid_from': valid_from, 'valid_to': valid_to, 'price': price}
+            for valid_from, valid_to, price in price_intervals
+        ]
 
 
 class UpdateCreateProductSerializer(ModelSerializer):
@@ -124,8 +188,7 @@ class UpdateCreateProductSerializer(ModelSerializer):
         )
 
 
-class SetPriceForPeriodSerializer(serializers.Serializer):
-    product_id = serializers.UUIDField()
+class PriceForPeriodSerializer(serializers.Serializer):
     start_date = serializers.DateField()
     end_date = serializers.DateField()
     price = serializers.DecimalField(
@@ -133,66 +196,33 @@ class SetPriceForPeriodSerializer(serializers.Serializer):
         decimal_places=2,
     )
 
+    def validate(self, attrs: Dict[str, Any]):
+        start_date = attrs.get('start_date')
+        end_date = attrs.get('end_date')
+        if start_date and end_date:
+            if start_date > end_date:
+                raise ValidationError(ErrorMessages.DATE_ERROR.value)
+        return attrs
+
+
+class SetPriceForPeriodSerializer(PriceForPeriodSerializer):
+    product_id = serializers.UUIDField()
+
     def create_update_price_items(
             self,
             product_id: UUID,
             start_date: datetime,
             end_date: datetime,
-            price: float
+            price: Decimal
         ) -> None:
-        product = Product.active_objects.get(id=product_id)
-
-        price_items: QuerySet[PriceItem] = PriceItem.objects.filter(
-            product=product,
-            date__range=[start_date, end_date],
-        )
-        existing_price_items: Dict[datetime, PriceItem] = {
-            item.date: item for item in price_items
-        }
-        new_price_items: List[PriceItem] = list()
-
-        for date in self.date_range(start_date, end_date):
-            if date in existing_price_items:
-                existing_price_items[date].price = price
-            else:
-                new_price_items.append(PriceItem(
-                    product=product,
-                    date=date,
-                    price=price
-                ))
-
-        if existing_price_items:
-            PriceItem.objects.bulk_update(
-                existing_price_items.values(),
-                ['price']
-            )
-        if new_price_items:
-            PriceItem.objects.bulk_create(new_price_items)
-
-    def date_range(
-            self,
-            start_date: datetime,
-            end_date: datetime,
-        ):
-        current_date = start_date
-        while current_date <= end_date:
-            yield current_date
-            current_date += timedelta(days=1)
+        if not set_prices([product_id], start_date, end_date, price):
+            raise ValidationError({'product_id': ErrorMessages.NO_PRODUCT.value})
 
     def validate_product_id(self, value: str) -> NoReturn | str:
-        product = Product.objects.filter(id=value).first()
-        if not product:
+        if not Product.active_objects.filter(id=value).exists():
             raise ValidationError(ErrorMessages.NO_PRODUCT.value)
         return value
 
-    def validate(self, attrs: Dict[str, Any]):
-        start_date = attrs.get('start_date')
-        end_date = attrs.get('end_date')
-        if start_date and end_date:
-            if start_date > end_date:
-                raise ValidationError(ErrorMessages.DATE_ERROR.value)
-        return attrs
-
     def create(self, validated_data: Dict[str, Any]) -> Dict[str, Any]:
         product_id = validated_data['product_id']
         start_date = validated_data['start_date']
@@ -201,3 +231,62 @@ class SetPriceForPeriodSerializer(serializers.Serializer):
 
         self.create_update_price_items(product_id, start_date, end_date, price)
         return validated_data
+
+
+class BulkSetPriceForPeriodSerializer(PriceForPeriodSerializer):
+    category_id = serializers.UUIDField(required=False)
+    product_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        allow_empty=False,
+    )
+
+    def validate_category_id(self, value: UUID) -> NoReturn | UUID:
+        if not Category.objects.filter(id=value).exists():
+            raise ValidationError(ErrorMessages.NO_CATEGORY_ID.value)
+        return value
+
+    def validate(self, attrs: Dict[str, Any]):
+        attrs = super().validate(attrs)
+        if ('category_id' in attrs) == ('product_ids' in attrs):
+            raise ValidationError(ErrorMessages.CATEGORY_OR_PRODUCTS.value)
+        return attrs
+
+    def create(self, validated_data: Dict[str, Any]) -> Dict[str, Any]:
+        if 'category_id' in validated_data:
+            requested_ids = list(Product.active_objects.filter(
+                category_id=validated_data['category_id'],
+            ).values_list('id', flat=True))
+            found_ids = set(requested_ids)
+        else:
+            requested_ids = list(dict.fromkeys(validated_data['product_ids']))
+            found_ids = set(Product.active_objects.filter(
+                id__in=requested_ids,
+            ).values_list('id', flat=True))
+
+        start_date = validated_data['start_date']
+        updated_ids = set(set_prices(
+            [product_id for product_id in requested_ids if product_id in found_ids],
+            start_date,
+            validated_data['end_date'],
+            validated_data['price'],
+            skip_read_only=True,
+        ))
+        # products with detached or downsampled days in the range are
+        # skipped by the write, their boundaries only move forward
+        read_only_ids = set(Product.objects.filter(
+            Q(cold_prices_until__gt=start_date) | Q(aggregated_until__gt=start_date),
+            id__in=found_ids - updated_ids,
+        ).values_list('id', flat=True))
+        validated_data['results'] = [
+            {
+                'product_id': product_id,
+                'status': (
+                    BulkStatus.UPDATED if product_id in updated_ids
+                    else BulkStatus.READ_ONLY if product_id in read_only_ids
+                    else BulkStatus.NOT_FOUND
+                ).value,
+            }
+            for product_id in requested_ids
+        ]
+        return validated_data
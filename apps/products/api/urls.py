@@ -1,4 +1,11 @@
+from django.conf import settings
 from django.urls import path
+from .async_views import (
+    AsyncCategoryListView,
+    AsyncProductListView,
+    AsyncProductDetailsView,
+    AsyncGetPriceForPeriodView,
+)
 from .views import (
     CategoryListView,
     CreateCategoryView,
@@ -7,30 +14,66 @@ from .views import (
 
     ProductListView,
     ProductDetailsView,
+    PriceHistoryView,
     DeleteProductView,
     UpdateProductView,
     CreateProductView,
 
     SetPriceForPeriodView,
+    BulkSetPriceForPeriodView,
     GetPriceForPeriodView,
+    GetPricesForPeriodView,
+    GetPriceSeriesView,
+    GetPriceStatisticsView,
+    CategoryPriceIndexView,
+    PriceExportView,
+
+    CacheStatsView,
+    MetricsView,
 )
 
 
 app_name = 'products'
 
 
-urlpatterns = [
+sync_urlpatterns = [
     path('categories/', CategoryListView.as_view(), name='category_list'),
     path('categories/create/', CreateCategoryView.as_view(), name='create_category'),
     path('categories/update/<str:id>/', UpdateCategoryView.as_view(), name='update_category'),
     path('categories/delete/<str:id>/', DeleteCategoryView.as_view(), name='delete_category'),
+    path('categories/<str:id>/price-index/', CategoryPriceIndexView.as_view(), name='category_price_index'),
 
     path('products/', ProductListView.as_view(), name='product_list'),
     path('products/create/', CreateProductView.as_view(), name='create_product'),
     path('products/update/<str:id>/', UpdateProductView.as_view(), name='update_product'),
     path('products/delete/<str:id>/', DeleteProductView.as_view(), name='delete_product'),
     path('products/<str:id>/', ProductDetailsView.as_view(), name='product_details'),
+    path('products/<str:id>/price-history/', PriceHistoryView.as_view(), name='price_history'),
 
     path('prices/products/set-price/', SetPriceForPeriodView.as_view(), name='set_price_for_period'),
+    path('prices/products/bulk-set-price/', BulkSetPriceForPeriodView.as_view(), name='bulk_set_price_for_period'),
     path('prices/products/get-price/<str:id>/', GetPriceForPeriodView.as_view(), name='get_avg_price_for_period'),
+    path('prices/products/get-prices/', GetPricesForPeriodView.as_view(), name='get_avg_prices_for_period'),
+    path('prices/products/get-price-series/<str:id>/', GetPriceSeriesView.as_view(), name='get_avg_price_series'),
+    path('prices/products/get-price-stats/<str:id>/', GetPriceStatisticsView.as_view(), name='get_price_statistics'),
+    path('prices/export/', PriceExportView.as_view(), name='export_prices'),
+
+    path('cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
+
+# read endpoints served by async views, for ASGI deployments
+ASYNC_READ_VIEWS = {
+    'category_list': AsyncCategoryListView,
+    'product_list': AsyncProductListView,
+    'product_details': AsyncProductDetailsView,
+    'get_avg_price_for_period': AsyncGetPriceForPeriodView,
+}
+
+async_urlpatterns = [
+    path(str(pattern.pattern), ASYNC_READ_VIEWS[pattern.name].as_view(), name=pattern.name)
+    if pattern.name in ASYNC_READ_VIEWS else pattern
+    for pattern in sync_urlpatterns
+]
+
+urlpatterns = async_urlpatterns if settings.ASYNC_READ_VIEWS else sync_urlpatterns
@@ -1,13 +1,31 @@
-from datetime import datetime
+from datetime import (
+    date,
+    datetime,
+)
 from decimal import Decimal
 from enum import Enum
+from typing import (
+    List,
+    Tuple,
+)
 from uuid import UUID
+from django.conf import settings
 from django.core.cache import cache
-from django.db.models import Avg, QuerySet
+from django.db.models import (
+    Count,
+    F,
+    Max,
+    QuerySet,
+)
+from django.http import (
+    HttpResponse,
+    StreamingHttpResponse,
+)
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.generics import (
     ListAPIView,
     RetrieveAPIView,
@@ -18,10 +36,40 @@ from rest_framework.generics import (
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
+from common.cache import (
+    CachedListMixin,
+    cache_stats,
+    page_cache_timeout,
+)
+from common.conditional import (
+    Validators,
+    request_etag,
+)
+from common.metrics import metrics
+from products.exports import (
+    ExportFormat,
+    export_querysets,
+    render_export,
+)
+from products.managers import (
+    Granularity,
+    price_series,
+)
+from products.partitions import interval_rows
+from products.retention import (
+    average_price,
+    average_prices,
+    history_rows,
+)
+from products.statistics import (
+    history_start,
+    price_statistics,
+)
 from products.models import (
     Category,
+    CategoryPriceRollup,
     Product,
-    PriceItem,
+    PriceInterval,
 )
 from .serializers import (
     SimpleCategorySerializer,
@@ -31,6 +79,7 @@ from .serializers import (
     UpdateCreateProductSerializer,
 
     SetPriceForPeriodSerializer,
+    BulkSetPriceForPeriodSerializer,
 )
 
 
@@ -40,20 +89,142 @@ class ErrorMessages(str, Enum):
     INVALID_DATE_FORMAT = 'Invalid date format. Date format should be YYYY-MM-DD.'
     BOTH_DATES_REQUIRED = 'Both start_date and end_date are required as query parameters.'
     DATE_ORDER_ERROR = 'End date must be after start date'
+    INVALID_GRANULARITY = 'Granularity should be one of: day, week, month, quarter.'
+    INVALID_LIMIT = 'Limit should be a non-negative integer.'
+    INVALID_ID = 'Ids should be UUIDs.'
+    INVALID_EXPORT_FORMAT = 'Output should be one of: csv, ndjson.'
+    CATEGORY_OR_PRODUCTS = 'Either `category_id` or `product_id` should be given'
+    TOO_MANY_PRODUCTS = 'Too many products requested at once.'
+    DOWNSAMPLED_PERIOD = 'Daily prices before {date} are downsampled, start_date should not be earlier.'
 
 
-class CategoryListView(ListAPIView):
-    serializer_class = SimpleCategorySerializer
-    queryset = Category.objects.all()
+PRICE_STATISTICS_KEY = 'price-statistics:{etag}'
+
+PAGINATION_MODE_PARAMETER = openapi.Parameter(
+    'pagination',
+    in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    enum=['cursor'],
+    description='Use keyset pagination, pages have no `count` and are followed by `next` links',
+)
+CURSOR_PARAMETER = openapi.Parameter(
+    'cursor',
+    in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description='Cursor of the page when `pagination=cursor`',
+)
+
+
+class QueryParamError(Exception):
+    def __init__(self, message: ErrorMessages) -> None:
+        super().__init__(message)
+        self.message = message
+
+
+def parse_date(query_params, name: str) -> date | None:
+    """
+    Read an optional YYYY-MM-DD date from query params
+    """
+    value = query_params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise QueryParamError(ErrorMessages.INVALID_DATE_FORMAT)
+
+
+def parse_limit(
+        query_params,
+        name: str,
+        default: int,
+        maximum: int,
+    ) -> int:
+    """
+    Read an optional non-negative limit from query params,
+    values above `maximum` are clamped
+    """
+    try:
+        limit = int(query_params.get(name, default))
+    except ValueError:
+        raise QueryParamError(ErrorMessages.INVALID_LIMIT)
+    if limit < 0:
+        raise QueryParamError(ErrorMessages.INVALID_LIMIT)
+    return min(limit, maximum)
+
+
+def parse_ids(query_params, name: str) -> List[UUID]:
+    """
+    Read UUIDs of a repeatable query param
+    """
+    try:
+        return [UUID(value) for value in query_params.getlist(name)]
+    except ValueError:
+        raise QueryParamError(ErrorMessages.INVALID_ID)
 
-    def get_queryset(self) -> QuerySet[Category]:
-        queryset = cache.get('category_list_queryset', None)
-        if queryset is None:
-            queryset = Category.objects.all()
-            cache.set('category_list_queryset', queryset, timeout=100)
-        return queryset
 
-    @swagger_auto_schema(operation_id='all_categories')
+def with_validators(queryset: QuerySet) -> QuerySet:
+    """
+    Products annotated with what their ETag is built
+    from, read in the same query as the product
+    """
+    return queryset.annotate(
+        category_updated_at=F('category__updated_at'),
+        prices_updated_at=Max('price_intervals__updated_at'),
+        prices_count=Count('price_intervals'),
+    )
+
+
+def product_validators(request: Request, product: Product) -> Validators:
+    """
+    Validators of the responses built from the product and
+    its prices, the number of intervals catches deletions.
+    No Last-Modified, deleting an interval does not move
+    any of the timestamps
+    """
+    return Validators(request_etag(
+        request,
+        product.updated_at,
+        product.category_updated_at,
+        product.prices_updated_at,
+        product.prices_count,
+    ))
+
+
+def parse_period(query_params) -> Tuple[date, date]:
+    """
+    Read the `start_date`..`end_date` period from query params
+    """
+    start_date_str = query_params.get('start_date')
+    end_date_str = query_params.get('end_date')
+
+    if not start_date_str or not end_date_str:
+        raise QueryParamError(ErrorMessages.BOTH_DATES_REQUIRED)
+    try:
+        start_date = datetime.strptime(
+            start_date_str, '%Y-%m-%d'
+        ).date()
+        end_date = datetime.strptime(
+            end_date_str, '%Y-%m-%d'
+        ).date()
+    except ValueError:
+        raise QueryParamError(ErrorMessages.INVALID_DATE_FORMAT)
+
+    if end_date < start_date:
+        raise QueryParamError(ErrorMessages.DATE_ORDER_ERROR)
+    return start_date, end_date
+
+
+class CategoryListView(CachedListMixin, ListAPIView):
+    serializer_class = SimpleCategorySerializer
+    queryset = Category.objects.order_by('created_at', 'id')
+    cache_models = (Category,)
+    keyset_ordering = ('created_at', 'id')
+
+    @swagger_auto_schema(
+        operation_id='all_categories',
+        manual_parameters=[PAGINATION_MODE_PARAMETER, CURSOR_PARAMETER],
+    )
     def get(self, request: Request, *args, **kwargs) -> Response:
         return super().get(request, *args, **kwargs)
 
@@ -115,40 +286,239 @@ class CreateCategoryView(CreateAPIView):
         )
 
 
-class ProductListView(ListAPIView):
+class ProductListView(CachedListMixin, ListAPIView):
     serializer_class = SimpleProductSerializer
-    queryset = Product.active_objects.all()
+    queryset = Product.active_objects.select_related('category').order_by('created_at', 'id')
+    # current prices of the products follow their price intervals
+    cache_models = (Product, Category, PriceInterval)
+    keyset_ordering = ('created_at', 'id')
 
-    def get_queryset(self) -> QuerySet[Category]:
-        queryset = cache.get('product_list_queryset', None)
-        if queryset is None:
-            queryset = Product.objects.all()
-            cache.set('product_list_queryset', queryset, timeout=100)
-        return queryset
-
-    @swagger_auto_schema(operation_id='all_products')
+    @swagger_auto_schema(
+        operation_id='all_products',
+        manual_parameters=[PAGINATION_MODE_PARAMETER, CURSOR_PARAMETER],
+    )
     def get(self, request: Request, *args, **kwargs) -> Response:
         return super().get(request, *args, **kwargs)
 
 
 class ProductDetailsView(RetrieveAPIView):
     serializer_class = ProductSerializer
-    queryset = Product.active_objects.all()
+    queryset = Product.active_objects.select_related('category')
     lookup_field = 'id'
 
-    @swagger_auto_schema(operation_id='product_details')
+    @swagger_auto_schema(
+        operation_id='product_details',
+        manual_parameters=[
+            openapi.Parameter(
+                'price_intervals',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                description='Number of the latest price intervals to embed, 0 for none',
+            ),
+        ]
+    )
     def get(self, request: Request, id: UUID) -> Response:
-        product: Product | None = self.queryset.filter(id=id).first()
+        product: Product | None = with_validators(self.queryset).filter(id=id).first()
         if not product:
             return Response(
                 {'error': ErrorMessages.NO_PRODUCT},
                 status.HTTP_404_NOT_FOUND,
             )
-        serializer = self.serializer_class(instance=product)
-        return Response(
+        try:
+            price_intervals_limit = parse_limit(
+                request.query_params,
+                'price_intervals',
+                settings.PRICE_HISTORY_EMBED_LIMIT,
+                settings.PRICE_HISTORY_MAX_PAGE_SIZE,
+            )
+        except QueryParamError as error:
+            return Response(
+                {'error': error.message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        validators = product_validators(request, product)
+        not_modified = validators.conditional_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = self.serializer_class(
+            instance=product,
+            context={'price_intervals_limit': price_intervals_limit},
+        )
+        return validators.apply(Response(
             data=serializer.data,
             status=status.HTTP_200_OK,
+        ))
+
+
+class PriceHistoryView(APIView):
+    @swagger_auto_schema(
+        operation_id='price_history',
+        manual_parameters=[
+            openapi.Parameter(
+                'from',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='Skip intervals ending before this date',
+            ),
+            openapi.Parameter(
+                'to',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='Skip intervals starting after this date',
+            ),
+            openapi.Parameter(
+                'before',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='Cursor, start of the last interval of the previous page',
+            ),
+            openapi.Parameter(
+                'limit',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                description='Number of intervals per page',
+            ),
+        ]
+    )
+    def get(self, request: Request, id: UUID) -> Response:
+        product: Product | None =\
+            with_validators(Product.active_objects).filter(id=id).first()
+        if not product:
+            return Response(
+                {'error': ErrorMessages.NO_PRODUCT},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            from_date = parse_date(request.query_params, 'from')
+            to_date = parse_date(request.query_params, 'to')
+            before = parse_date(request.query_params, 'before')
+            limit = parse_limit(
+                request.query_params,
+                'limit',
+                settings.PRICE_HISTORY_PAGE_SIZE,
+                settings.PRICE_HISTORY_MAX_PAGE_SIZE,
+            )
+        except QueryParamError as error:
+            return Response(
+                {'error': error.message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if from_date and to_date and to_date < from_date:
+            return Response(
+                {'error': ErrorMessages.DATE_ORDER_ERROR},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        validators = product_validators(request, product)
+        not_modified = validators.conditional_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        rows = history_rows(product, from_date, to_date, before, limit + 1)
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                'before',
+                rows[-1]['valid_from'].isoformat(),
+            )
+
+        return validators.apply(Response(
+            {
+                'next': next_url,
+                'results': rows,
+            },
+            status=status.HTTP_200_OK,
+        ))
+
+
+class PriceExportView(APIView):
+    @swagger_auto_schema(
+        operation_id='export_prices',
+        manual_parameters=[
+            openapi.Parameter(
+                'output',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                enum=[item.value for item in ExportFormat],
+                default=ExportFormat.CSV.value,
+                description='Output format, one row per price interval',
+            ),
+            openapi.Parameter(
+                'category_id',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Items(type=openapi.TYPE_STRING),
+                collection_format='multi',
+                description='Export products of these categories only, can be repeated',
+            ),
+            openapi.Parameter(
+                'product_id',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Items(type=openapi.TYPE_STRING),
+                collection_format='multi',
+                description='Export these products only, can be repeated',
+            ),
+            openapi.Parameter(
+                'from',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='Skip intervals ending before this date',
+            ),
+            openapi.Parameter(
+                'to',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='Skip intervals starting after this date',
+            ),
+        ]
+    )
+    def get(self, request: Request) -> Response | StreamingHttpResponse:
+        try:
+            export_format = ExportFormat(
+                request.query_params.get('output', ExportFormat.CSV)
+            )
+        except ValueError:
+            return Response(
+                {'error': ErrorMessages.INVALID_EXPORT_FORMAT},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            category_ids = parse_ids(request.query_params, 'category_id')
+            product_ids = parse_ids(request.query_params, 'product_id')
+            from_date = parse_date(request.query_params, 'from')
+            to_date = parse_date(request.query_params, 'to')
+        except QueryParamError as error:
+            return Response(
+                {'error': error.message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if from_date and to_date and to_date < from_date:
+            return Response(
+                {'error': ErrorMessages.DATE_ORDER_ERROR},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        querysets = export_querysets(
+            category_ids=category_ids,
+            product_ids=product_ids,
+            start_date=from_date,
+            end_date=to_date,
         )
+        response = StreamingHttpResponse(
+            render_export(querysets, export_format),
+            content_type=export_format.content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="prices.{export_format.value}"'
+        )
+        return response
 
 
 class CreateProductView(CreateAPIView):
@@ -253,6 +623,59 @@ class SetPriceForPeriodView(GenericAPIView):
         )
 
 
+class BulkSetPriceForPeriodView(GenericAPIView):
+    serializer_class = BulkSetPriceForPeriodSerializer
+
+    @swagger_auto_schema(
+        operation_id='bulk_set_price_for_period',
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'category_id': openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    format=openapi.FORMAT_UUID,
+                    example='5f25912c-1687-488f-8f4b-d9e18628fdaa'
+                ),
+                'product_ids': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_STRING,
+                        format=openapi.FORMAT_UUID,
+                    ),
+                ),
+                'start_date': openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    format=openapi.FORMAT_DATE
+                ),
+                'end_date': openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    format=openapi.FORMAT_DATE
+                ),
+                'price': openapi.Schema(
+                    type=openapi.TYPE_NUMBER,
+                    format=openapi.FORMAT_DECIMAL
+                )
+            },
+            required=[
+                'start_date',
+                'end_date',
+                'price'
+            ]
+        )
+    )
+    def post(self, request: Request) -> Response:
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        return Response(
+            {
+                'message': 'Price was set for a period!',
+                'results': result['results'],
+            },
+            status.HTTP_201_CREATED,
+        )
+
+
 class GetPriceForPeriodView(APIView):
     @swagger_auto_schema(
         operation_id='get_avg_price_for_period',
@@ -273,7 +696,7 @@ class GetPriceForPeriodView(APIView):
     )
     def get(self, request: Request, id: UUID) -> Response:
         product: Product | None =\
-            Product.active_objects.filter(id=id).first()
+            with_validators(Product.active_objects).filter(id=id).first()
 
         if not product:
             return Response(
@@ -281,44 +704,368 @@ class GetPriceForPeriodView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        start_date_str = request.query_params.get('start_date')
-        end_date_str = request.query_params.get('end_date')
+        try:
+            start_date, end_date = parse_period(request.query_params)
+        except QueryParamError as error:
+            return Response(
+                {'error': error.message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        validators = product_validators(request, product)
+        not_modified = validators.conditional_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        price: Decimal | None = average_price(product, start_date, end_date)
+
+        if price is not None:
+            price = round(price, 2)
+
+        return validators.apply(Response(
+            {'average_price': price},
+            status=status.HTTP_200_OK,
+        ))
+
+
+class GetPriceStatisticsView(APIView):
+    @swagger_auto_schema(
+        operation_id='get_price_statistics',
+        manual_parameters=[
+            openapi.Parameter(
+                'start_date',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='Start Date for Count Price Statistics',
+            ),
+            openapi.Parameter(
+                'end_date',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='End Date for Count Price Statistics',
+            ),
+        ]
+    )
+    def get(self, request: Request, id: UUID) -> Response:
+        product: Product | None =\
+            with_validators(Product.active_objects).filter(id=id).first()
+
+        if not product:
+            return Response(
+                {'error': ErrorMessages.NO_PRODUCT},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            start_date, end_date = parse_period(request.query_params)
+        except QueryParamError as error:
+            return Response(
+                {'error': error.message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # only averages and history merge the downsampled aggregates,
+        # statistics and series of those days can not be rebuilt
+        if product.aggregated_until and start_date < product.aggregated_until:
+            return Response(
+                {'error': ErrorMessages.DOWNSAMPLED_PERIOD.value.format(date=product.aggregated_until)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        validators = product_validators(request, product)
+        not_modified = validators.conditional_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        # the ETag covers the product, the period and the prices
+        key = PRICE_STATISTICS_KEY.format(etag=validators.etag.strip('"'))
+        data = cache.get(key)
+        if data is not None:
+            cache_stats.hit()
+            response = Response(data, status=status.HTTP_200_OK)
+            response['X-Cache'] = 'HIT'
+            return validators.apply(response)
+
+        cache_stats.miss()
+        rows = interval_rows(product, history_start(start_date), end_date)
+        data = price_statistics(rows, start_date, end_date)
+        cache.set(key, data, timeout=page_cache_timeout())
+        response = Response(data, status=status.HTTP_200_OK)
+        response['X-Cache'] = 'MISS'
+        return validators.apply(response)
+
+
+class GetPricesForPeriodView(APIView):
+    @swagger_auto_schema(
+        operation_id='get_avg_prices_for_period',
+        manual_parameters=[
+            openapi.Parameter(
+                'category_id',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='Average prices of the products of this category',
+            ),
+            openapi.Parameter(
+                'product_id',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Items(type=openapi.TYPE_STRING),
+                collection_format='multi',
+                description='Average prices of these products, can be repeated',
+            ),
+            openapi.Parameter(
+                'start_date',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='Start Date for Count Average Prices',
+            ),
+            openapi.Parameter(
+                'end_date',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='End Date for Count Average Prices',
+            ),
+        ]
+    )
+    def get(self, request: Request) -> Response:
+        try:
+            start_date, end_date = parse_period(request.query_params)
+            category_ids = parse_ids(request.query_params, 'category_id')
+            requested_ids = list(dict.fromkeys(parse_ids(request.query_params, 'product_id')))
+        except QueryParamError as error:
+            return Response(
+                {'error': error.message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if bool(category_ids) == bool(requested_ids) or len(category_ids) > 1:
+            return Response(
+                {'error': ErrorMessages.CATEGORY_OR_PRODUCTS},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(requested_ids) > settings.PRICE_BATCH_MAX_PRODUCTS:
+            return Response(
+                {'error': ErrorMessages.TOO_MANY_PRODUCTS},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        products = Product.active_objects.order_by('created_at', 'id')
+        if category_ids:
+            products = products.filter(category_id=category_ids[0])
+            found = list(products.values_list('id', 'cold_prices_until', 'aggregated_until')[
+                :settings.PRICE_BATCH_MAX_PRODUCTS + 1
+            ])
+            if len(found) > settings.PRICE_BATCH_MAX_PRODUCTS:
+                return Response(
+                    {'error': ErrorMessages.TOO_MANY_PRODUCTS},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if not found and not Category.objects.filter(id=category_ids[0]).exists():
+                return Response(
+                    {'error': ErrorMessages.NO_CATEGORY},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+        else:
+            boundaries = {
+                product_id: (cold_prices_until, aggregated_until)
+                for product_id, cold_prices_until, aggregated_until in products.filter(
+                    id__in=requested_ids,
+                ).values_list('id', 'cold_prices_until', 'aggregated_until')
+            }
+            found = [
+                (product_id, *boundaries[product_id])
+                for product_id in requested_ids if product_id in boundaries
+            ]
+
+        prices = average_prices(found, start_date, end_date)
+        return Response(
+            {
+                'average_prices': [
+                    {
+                        'product_id': product_id,
+                        'average_price': (
+                            round(average_price, 2)
+                            if average_price is not None else None
+                        ),
+                    }
+                    for product_id, average_price in prices.items()
+                ],
+                'not_found': [
+                    product_id for product_id in requested_ids
+                    if product_id not in prices
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
+
 
-        if not start_date_str or not end_date_str:
+class GetPriceSeriesView(APIView):
+    @swagger_auto_schema(
+        operation_id='get_avg_price_series',
+        manual_parameters=[
+            openapi.Parameter(
+                'start_date',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='Start Date for Count Average Prices',
+            ),
+            openapi.Parameter(
+                'end_date',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='End Date for Count Average Prices',
+            ),
+            openapi.Parameter(
+                'granularity',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                enum=[item.value for item in Granularity],
+                default=Granularity.MONTH.value,
+                description='Length of the period for every average price',
+            ),
+        ]
+    )
+    def get(self, request: Request, id: UUID) -> Response:
+        product: Product | None =\
+            with_validators(Product.active_objects).filter(id=id).first()
+
+        if not product:
+            return Response(
+                {'error': ErrorMessages.NO_PRODUCT},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            start_date, end_date = parse_period(request.query_params)
+        except QueryParamError as error:
             return Response(
-                {'error': ErrorMessages.BOTH_DATES_REQUIRED},
+                {'error': error.message},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+
         try:
-            start_date = datetime.strptime(
-                start_date_str, '%Y-%m-%d'
-            ).date()
-            end_date = datetime.strptime(
-                end_date_str, '%Y-%m-%d'
-            ).date()
+            granularity = Granularity(
+                request.query_params.get('granularity', Granularity.MONTH)
+            )
         except ValueError:
             return Response(
-                {'error': ErrorMessages.INVALID_DATE_FORMAT},
+                {'error': ErrorMessages.INVALID_GRANULARITY},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if end_date < start_date:
+        # see `GetPriceStatisticsView`
+        if product.aggregated_until and start_date < product.aggregated_until:
             return Response(
-                {'error': ErrorMessages.DATE_ORDER_ERROR},
+                {'error': ErrorMessages.DOWNSAMPLED_PERIOD.value.format(date=product.aggregated_until)},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        average_price = PriceItem.objects.filter(
-            product=product,
-            date__range=[start_date, end_date]
-        ).aggregate(avg_price=Avg('price'))
+        validators = product_validators(request, product)
+        not_modified = validators.conditional_response(request)
+        if not_modified is not None:
+            return not_modified
 
-        average_price: Decimal | None = average_price['avg_price']
+        average_prices = price_series(
+            interval_rows(product, start_date, end_date),
+            start_date,
+            end_date,
+            granularity,
+        )
+
+        return validators.apply(Response(
+            {
+                'granularity': granularity.value,
+                'average_prices': [
+                    {'period': period, 'average_price': round(average_price, 2)}
+                    for period, average_price in average_prices
+                ],
+            },
+            status=status.HTTP_200_OK,
+        ))
 
-        if average_price is not None:
-            average_price = round(average_price, 2)
+
+class CategoryPriceIndexView(APIView):
+    @swagger_auto_schema(
+        operation_id='get_category_price_index',
+        manual_parameters=[
+            openapi.Parameter(
+                'start_date',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='Start Date for Count Average Prices',
+            ),
+            openapi.Parameter(
+                'end_date',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description='End Date for Count Average Prices',
+            ),
+            openapi.Parameter(
+                'granularity',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                enum=[item.value for item in Granularity],
+                default=Granularity.MONTH.value,
+                description='Length of the period for every average price',
+            ),
+        ]
+    )
+    def get(self, request: Request, id: UUID) -> Response:
+        if not Category.objects.filter(id=id).exists():
+            return Response(
+                {'error': ErrorMessages.NO_CATEGORY},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            start_date, end_date = parse_period(request.query_params)
+        except QueryParamError as error:
+            return Response(
+                {'error': error.message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            granularity = Granularity(
+                request.query_params.get('granularity', Granularity.MONTH)
+            )
+        except ValueError:
+            return Response(
+                {'error': ErrorMessages.INVALID_GRANULARITY},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        price_index = CategoryPriceRollup.objects.price_index(
+            id,
+            start_date,
+            end_date,
+            granularity,
+        )
 
         return Response(
-            {'average_price': average_price},
+            {
+                'granularity': granularity.value,
+                'price_index': [
+                    {'period': period, 'average_price': round(average_price, 2)}
+                    for period, average_price in price_index
+                ],
+            },
             status=status.HTTP_200_OK,
         )
+
+
+class CacheStatsView(APIView):
+    @swagger_auto_schema(operation_id='cache_stats')
+    def get(self, request: Request) -> Response:
+        return Response(
+            cache_stats.as_dict(),
+            status=status.HTTP_200_OK,
+        )
+
+
+class MetricsView(APIView):
+    @swagger_auto_schema(operation_id='metrics')
+    def get(self, request: Request) -> HttpResponse:
+        return HttpResponse(
+            metrics.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
@@ -0,0 +1,159 @@
+"""
+Archive of long-inactive products. Archived products and their
+price intervals live in `ArchivedProduct` / `ArchivedPriceInterval`,
+out of the tables the read endpoints query.
+Inactive products are not part of the category rollups,
+so moving them in either direction leaves the rollups as they are.
+Intervals in detached partitions are archived too and come back
+into the live table, price aggregates stay where they are
+"""
+from datetime import datetime
+from typing import (
+    Any,
+    Iterable,
+    List,
+    NamedTuple,
+    Set,
+)
+from django.db import transaction
+
+from .models import (
+    ArchivedPriceInterval,
+    ArchivedProduct,
+    Product,
+    PriceInterval,
+)
+from .partitions import cold_intervals
+
+
+BATCH_SIZE = 1000
+CHUNK_SIZE = 500
+
+INTERVAL_FIELDS = (
+    'id',
+    'valid_from',
+    'valid_to',
+    'price',
+    'cumulative_total',
+    'cumulative_days',
+    'created_at',
+    'updated_at',
+)
+
+
+class ArchiveResult(NamedTuple):
+    products: int
+    price_intervals: int
+
+
+def archive_products(
+        before: datetime,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> ArchiveResult:
+    """
+    Move products soft-deleted before `before` and their price
+    intervals into the archive, one transaction per chunk
+    """
+    candidates = Product.objects.filter(
+        is_active=False,
+        deactivated_at__lt=before,
+    )
+    product_ids = list(candidates.order_by('deactivated_at').values_list('id', flat=True))
+    products_count = intervals_count = 0
+    for offset in range(0, len(product_ids), chunk_size):
+        with transaction.atomic():
+            # restored since the ids were read
+            products = list(candidates.select_for_update().filter(
+                pk__in=product_ids[offset:offset + chunk_size],
+            ))
+            if not products:
+                continue
+            ArchivedProduct.objects.bulk_create([
+                ArchivedProduct(
+                    id=product.id,
+                    name=product.name,
+                    sku=product.sku,
+                    description=product.description,
+                    category_id=product.category_id,
+                    created_at=product.created_at,
+                    updated_at=product.updated_at,
+                    deactivated_at=product.deactivated_at,
+                    aggregated_until=product.aggregated_until,
+                )
+                for product in products
+            ], batch_size=BATCH_SIZE)
+            querysets = [PriceInterval.objects.filter(product__in=products)]
+            cold_ids = [product.id for product in products if product.cold_prices_until is not None]
+            if cold_ids:
+                querysets += cold_intervals(cold_ids)
+            intervals = ArchivedPriceInterval.objects.bulk_create([
+                ArchivedPriceInterval(product_id=product_id, **dict(zip(INTERVAL_FIELDS, values)))
+                for queryset in querysets
+                for product_id, *values in queryset.values_list(
+                    'product_id',
+                    *INTERVAL_FIELDS,
+                ).iterator(chunk_size=BATCH_SIZE)
+            ], batch_size=BATCH_SIZE)
+            # deleting the products deletes their detached intervals
+            Product.objects.filter(pk__in=[product.pk for product in products]).delete()
+        products_count += len(products)
+        intervals_count += len(intervals)
+    return ArchiveResult(products_count, intervals_count)
+
+
+def restore_products(product_ids: Iterable[Any]) -> int:
+    """
+    Move archived products and their price intervals back,
+    the products stay inactive. Products whose sku has been
+    taken meanwhile are left in the archive, returns the
+    number of restored products
+    """
+    product_ids = list(product_ids)
+    with transaction.atomic():
+        candidates = ArchivedProduct.objects.select_for_update().filter(
+            pk__in=product_ids,
+        ).exclude(
+            sku__in=Product.objects.exclude(sku='').values('sku'),
+        ).order_by('-archived_at')
+        # products archived at different times may share a sku,
+        # the one archived last comes back
+        archived: List[ArchivedProduct] = list()
+        skus: Set[str] = set()
+        for product in candidates:
+            if product.sku and product.sku in skus:
+                continue
+            skus.add(product.sku)
+            archived.append(product)
+        if not archived:
+            return 0
+        products = Product.objects.bulk_create([
+            Product(
+                id=product.id,
+                name=product.name,
+                sku=product.sku,
+                description=product.description,
+                category_id=product.category_id,
+                is_active=False,
+                deactivated_at=product.deactivated_at,
+                aggregated_until=product.aggregated_until,
+            )
+            for product in archived
+        ], batch_size=BATCH_SIZE)
+        # `auto_now_add` replaced the creation time, which orders the product list
+        for product, archived_product in zip(products, archived):
+            product.created_at = archived_product.created_at
+        Product.objects.bulk_update(products, ['created_at'], batch_size=BATCH_SIZE)
+
+        restored_ids: List[Any] = [product.id for product in archived]
+        PriceInterval.objects.bulk_create([
+            PriceInterval(product_id=product_id, **dict(zip(INTERVAL_FIELDS, values)))
+            for product_id, *values in ArchivedPriceInterval.objects.filter(
+                product_id__in=restored_ids,
+            ).values_list('product_id', *INTERVAL_FIELDS).iterator(chunk_size=BATCH_SIZE)
+        ], batch_size=BATCH_SIZE)
+        # intervals of detached partitions come back with running totals of their own
+        for product in products:
+            PriceInterval.objects.update_cumulative(product)
+        PriceInterval.objects.refresh_current_prices(restored_ids)
+        ArchivedProduct.objects.filter(pk__in=restored_ids).delete()
+    return len(archived)
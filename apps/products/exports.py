@@ -0,0 +1,144 @@
+import csv
+import heapq
+import json
+from datetime import date
+from enum import Enum
+from operator import itemgetter
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    Sequence,
+    Tuple,
+)
+from uuid import UUID
+from django.conf import settings
+from django.db.models import (
+    OuterRef,
+    QuerySet,
+    Subquery,
+)
+
+from .models import Product, PriceInterval
+from .partitions import (
+    cold_model,
+    get_partitions,
+)
+
+
+EXPORT_FIELDS = (
+    'product_id',
+    'sku',
+    'valid_from',
+    'valid_to',
+    'price',
+)
+
+
+class ExportFormat(str, Enum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+    @property
+    def content_type(self) -> str:
+        if self == ExportFormat.CSV:
+            return 'text/csv'
+        return 'application/x-ndjson'
+
+
+def export_querysets(
+        category_ids: Sequence[UUID] | None = None,
+        product_ids: Sequence[UUID] | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Iterator[QuerySet]:
+    """
+    Price intervals of active products, the live table first and
+    then every detached partition overlapping the period. Each one
+    is ordered along its (product, valid_from) index. Partitions
+    are listed on the first `next`, not before the response streams
+    """
+    intervals = PriceInterval.objects.filter(product__is_active=True)
+    products = Product.active_objects.filter(cold_prices_until__isnull=False)
+    if category_ids:
+        intervals = intervals.filter(product__category_id__in=category_ids)
+        products = products.filter(category_id__in=category_ids)
+    if product_ids:
+        intervals = intervals.filter(product_id__in=product_ids)
+        products = products.filter(id__in=product_ids)
+
+    querysets = [intervals.values_list(
+        'product_id',
+        'product__sku',
+        'valid_from',
+        'valid_to',
+        'price',
+    )]
+    for partition in get_partitions().detached():
+        if (start_date and partition.end <= start_date) or (end_date and partition.start > end_date):
+            continue
+        # detached rows reference products by id only
+        querysets.append(cold_model(partition.table).objects.filter(
+            product_id__in=products.values('id'),
+        ).annotate(
+            sku=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('sku')[:1]),
+        ).values_list(
+            'product_id',
+            'sku',
+            'valid_from',
+            'valid_to',
+            'price',
+        ))
+    for queryset in querysets:
+        if start_date:
+            queryset = queryset.filter(valid_to__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(valid_from__lte=end_date)
+        yield queryset.order_by('product_id', 'valid_from')
+
+
+def export_rows(querysets: Iterable[QuerySet]) -> Iterator[Tuple[Any, ...]]:
+    """
+    Rows of every queryset merged in (product, valid_from) order,
+    fetched in chunks, never the whole result at once
+    """
+    yield from heapq.merge(
+        *(queryset.iterator(chunk_size=settings.PRICE_EXPORT_CHUNK_SIZE) for queryset in querysets),
+        key=itemgetter(0, 2),
+    )
+
+
+class Echo:
+    """
+    File-like object handing written lines back to the caller
+    """
+    def write(self, value: str) -> str:
+        return value
+
+
+def render_csv(rows: Iterable[Tuple[Any, ...]]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def render_ndjson(rows: Iterable[Tuple[Any, ...]]) -> Iterator[str]:
+    for product_id, sku, valid_from, valid_to, price in rows:
+        yield json.dumps({
+            'product_id': str(product_id),
+            'sku': sku,
+            'valid_from': valid_from.isoformat(),
+            'valid_to': valid_to.isoformat(),
+            'price': str(price),
+        }) + '\n'
+
+
+def render_export(
+        querysets: Iterable[QuerySet],
+        export_format: ExportFormat,
+    ) -> Iterator[str]:
+    rows = export_rows(querysets)
+    if export_format == ExportFormat.CSV:
+        return render_csv(rows)
+    return render_ndjson(rows)
@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import date
+from decimal import (
+    Decimal,
+    InvalidOperation,
+)
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+)
+from uuid import UUID
+from django.db import connection
+
+from .exports import ExportFormat
+from .managers import ONE_DAY
+
+
+IMPORT_FIELDS = (
+    'sku',
+    'date',
+    'price',
+)
+STAGING_TABLE = 'products_price_import_staging'
+
+Observation = Tuple[UUID, date, Decimal]
+Run = Tuple[date, date, Decimal]
+
+
+class InvalidRecord(Exception):
+    pass
+
+
+def read_records(
+        lines: Iterable[str],
+        file_format: ExportFormat,
+    ) -> Iterator[Dict[str, str] | None]:
+    """
+    (sku, date, price) records of a CSV file with a header
+    or of an NDJSON file, None for lines that are not JSON objects
+    """
+    if file_format == ExportFormat.CSV:
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else None
+
+
+def parse_record(record: Dict[str, str] | None) -> Tuple[str, date, Decimal]:
+    if record is None:
+        raise InvalidRecord(record)
+    try:
+        return (
+            record['sku'],
+            date.fromisoformat(record['date']),
+            Decimal(str(record['price'])).quantize(Decimal('0.01')),
+        )
+    except (KeyError, TypeError, ValueError, InvalidOperation):
+        raise InvalidRecord(record)
+
+
+def collapse_observations(observations: Iterable[Observation]) -> Dict[UUID, List[Run]]:
+    """
+    Runs of consecutive days with the same price per product,
+    the last observation of a day wins
+    """
+    prices: Dict[UUID, Dict[date, Decimal]] = defaultdict(dict)
+    for product_id, day, price in observations:
+        prices[product_id][day] = price
+
+    runs: Dict[UUID, List[Run]] = dict()
+    for product_id, days in prices.items():
+        product_runs: List[Run] = list()
+        for day in sorted(days):
+            price = days[day]
+            if product_runs and product_runs[-1][2] == price and product_runs[-1][1] + ONE_DAY == day:
+                product_runs[-1] = (product_runs[-1][0], day, price)
+            else:
+                product_runs.append((day, day, price))
+        runs[product_id] = product_runs
+    return runs
+
+
+def collapse_observations_in_db(observations: Iterable[Observation]) -> Dict[UUID, List[Run]]:
+    """
+    Same as `collapse_observations`, but the observations are
+    copied into a staging table and collapsed by PostgreSQL
+    """
+    buffer = io.StringIO()
+    for position, (product_id, day, price) in enumerate(observations):
+        buffer.write(f'{position}\t{product_id}\t{day.isoformat()}\t{price}\n')
+    buffer.seek(0)
+
+    runs: Dict[UUID, List[Run]] = defaultdict(list)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} ('
+            'position bigint, product_id uuid, day date, price numeric(7, 2)'
+            ') ON COMMIT DELETE ROWS'
+        )
+        cursor.copy_expert(
+            f'COPY {STAGING_TABLE} (position, product_id, day, price) FROM STDIN',
+            buffer,
+        )
+        cursor.execute(
+            'WITH latest AS ('
+            '  SELECT DISTINCT ON (product_id, day) product_id, day, price'
+            f'  FROM {STAGING_TABLE}'
+            '  ORDER BY product_id, day, position DESC'
+            '), islands AS ('
+            '  SELECT product_id, day, price,'
+            '    day - (ROW_NUMBER() OVER (PARTITION BY product_id, price ORDER BY day))::integer AS island'
+            '  FROM latest'
+            ')'
+            ' SELECT product_id, MIN(day), MAX(day), price'
+            ' FROM islands'
+            ' GROUP BY product_id, price, island'
+            ' ORDER BY product_id, MIN(day)'
+        )
+        for product_id, valid_from, valid_to, price in cursor.fetchall():
+            runs[UUID(str(product_id))].append((valid_from, valid_to, price))
+        cursor.execute(f'TRUNCATE {STAGING_TABLE}')
+    return runs
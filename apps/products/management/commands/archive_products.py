@@ -0,0 +1,41 @@
+"""
+Django command to move long-inactive products into the archive.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.archive import CHUNK_SIZE, archive_products
+
+
+class Command(BaseCommand):
+    """Django command to archive inactive products"""
+    help = (
+        'Move products soft-deleted more than --days ago and their price intervals '
+        'into the archive tables, restoring a product brings them back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=180,
+            help='Archive products inactive for more than this many days',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Products moved per transaction',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        result = archive_products(
+            timezone.now() - timedelta(days=options['days']),
+            options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {result.products} products and {result.price_intervals} price intervals'
+        ))
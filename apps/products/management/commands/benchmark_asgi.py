@@ -0,0 +1,195 @@
+"""
+Django command to compare requests per second of the read endpoints
+served by WSGI, by ASGI with sync views and by ASGI with async views.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+from typing import (
+    Callable,
+    List,
+    Tuple,
+)
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+from django.urls import (
+    include,
+    path,
+)
+
+from products.api.urls import (
+    async_urlpatterns,
+    sync_urlpatterns,
+)
+from products.models import Category, Product, PriceInterval
+
+
+BATCH_SIZE = 5000
+
+
+class SyncUrlConf:
+    urlpatterns = [path('api/v1/', include((sync_urlpatterns, 'products')))]
+
+
+class AsyncUrlConf:
+    urlpatterns = [path('api/v1/', include((async_urlpatterns, 'products')))]
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the ASGI read path"""
+    help = 'Requests per second of read endpoints under WSGI and ASGI, with sync and async views'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products',
+            type=int,
+            default=1000,
+            help='Create synthetic products until there are that many',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Number of requests per endpoint and server',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Number of requests in flight',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        product = self.create_products(options['products'])
+        endpoints = [
+            ('category list', '/api/v1/categories/', 'limit=20'),
+            ('product list', '/api/v1/products/', 'limit=20'),
+            ('product details', f'/api/v1/products/{product.id}/', ''),
+            (
+                'average price',
+                f'/api/v1/prices/products/get-price/{product.id}/',
+                'start_date=2024-01-15&end_date=2024-11-15',
+            ),
+        ]
+        servers: List[Tuple[str, type, Callable]] = [
+            ('wsgi', SyncUrlConf, self.run_wsgi),
+            ('asgi, sync views', SyncUrlConf, self.run_asgi),
+            ('asgi, async views', AsyncUrlConf, self.run_asgi),
+        ]
+
+        self.stdout.write(
+            f'{options["requests"]} requests per endpoint, {options["concurrency"]} in flight'
+        )
+        self.stdout.write(f'{"endpoint":<18}' + ''.join(f'{name:>20}' for name, _, _ in servers))
+        # pages should come from the database, not from the page cache
+        with override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        }):
+            for name, url, query in endpoints:
+                rates = list()
+                for _, urlconf, run in servers:
+                    with override_settings(ROOT_URLCONF=urlconf):
+                        started = time.perf_counter()
+                        run(url, query, options['requests'], options['concurrency'])
+                        rates.append(options['requests'] / (time.perf_counter() - started))
+                self.stdout.write(f'{name:<18}' + ''.join(f'{rate:>14.0f} req/s' for rate in rates))
+
+    def run_wsgi(self, url: str, query: str, requests: int, concurrency: int) -> None:
+        application = WSGIHandler()
+
+        def request(_):
+            statuses = list()
+            response = application(
+                {
+                    'REQUEST_METHOD': 'GET',
+                    'PATH_INFO': url,
+                    'QUERY_STRING': query,
+                    'SERVER_NAME': 'testserver',
+                    'SERVER_PORT': '80',
+                    'SERVER_PROTOCOL': 'HTTP/1.1',
+                    'wsgi.input': BytesIO(),
+                    'wsgi.url_scheme': 'http',
+                },
+                lambda status, headers: statuses.append(status),
+            )
+            b''.join(response)
+            response.close()
+            assert statuses[0].startswith('200'), statuses
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(request, range(requests)))
+        connections.close_all()
+
+    def run_asgi(self, url: str, query: str, requests: int, concurrency: int) -> None:
+        application = ASGIHandler()
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': url,
+            'raw_path': url.encode(),
+            'query_string': query.encode(),
+            'headers': [(b'host', b'testserver')],
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 0),
+        }
+
+        async def request():
+            sent = asyncio.Event()
+            statuses = list()
+
+            async def receive():
+                if not sent.is_set():
+                    sent.set()
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # the client never disconnects
+                await asyncio.Future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            await application(dict(scope), receive, send)
+            assert statuses == [200], statuses
+
+        async def worker(count: int):
+            for _ in range(count):
+                await request()
+
+        async def run():
+            counts = [
+                requests // concurrency + (index < requests % concurrency)
+                for index in range(concurrency)
+            ]
+            await asyncio.gather(*(worker(count) for count in counts))
+
+        asyncio.run(run())
+
+    def create_products(self, rows: int) -> Product:
+        category = Category.objects.first() or Category.objects.create(name='Benchmark Category')
+        existing = Product.active_objects.count()
+        for start in range(existing, rows, BATCH_SIZE):
+            Product.objects.bulk_create([
+                Product(name=f'Benchmark Product {index}', sku=f'BENCH-{index}', category=category)
+                for index in range(start, min(start + BATCH_SIZE, rows))
+            ])
+
+        product = Product.active_objects.order_by('created_at', 'id').first()
+        if not product.price_intervals.exists():
+            for month in range(1, 13):
+                PriceInterval.objects.set_price(
+                    product,
+                    date(2024, month, 1),
+                    date(2024, month, 28),
+                    Decimal(10 + month),
+                )
+        return product
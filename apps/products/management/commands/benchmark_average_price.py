@@ -0,0 +1,77 @@
+"""
+Django command to compare the range scan and the running totals
+for the average price of a period.
+"""
+import random
+import time
+from statistics import (
+    mean,
+    median,
+)
+from django.db.models import (
+    Max,
+    Min,
+)
+from django.core.management.base import BaseCommand, CommandError
+
+from products.models import PriceInterval
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the average price of a period"""
+    help = 'Time the average price of random periods with both read paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Number of random periods to measure',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed of the random periods',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        products = list(
+            PriceInterval.objects.values('product_id').annotate(
+                first_day=Min('valid_from'),
+                last_day=Max('valid_to'),
+            ).values_list('product_id', 'first_day', 'last_day')
+        )
+        if not products:
+            raise CommandError('There are no prices to benchmark')
+
+        rand = random.Random(options['seed'])
+        timings = {'scan': list(), 'cumulative': list()}
+        for _ in range(options['iterations']):
+            product_id, first_day, last_day = rand.choice(products)
+            start_date = first_day + (last_day - first_day) * rand.random()
+            end_date = start_date + (last_day - start_date) * rand.random()
+            intervals = PriceInterval.objects.filter(product_id=product_id)
+
+            started = time.perf_counter()
+            scan = intervals.average_price(start_date, end_date)
+            timings['scan'].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            cumulative = intervals.cumulative_average_price(start_date, end_date)
+            timings['cumulative'].append(time.perf_counter() - started)
+
+            if scan != cumulative:
+                raise CommandError(
+                    f'Average prices differ for {product_id} '
+                    f'{start_date}..{end_date}: {scan} != {cumulative}'
+                )
+
+        for name, values in timings.items():
+            values.sort()
+            self.stdout.write(
+                f'{name:>10}: mean {mean(values) * 1000:.3f} ms, '
+                f'median {median(values) * 1000:.3f} ms, '
+                f'p99 {values[int(len(values) * 0.99) - 1] * 1000:.3f} ms'
+            )
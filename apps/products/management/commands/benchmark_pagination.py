@@ -0,0 +1,89 @@
+"""
+Django command to compare limit-offset and keyset pagination
+of the product list at growing depths.
+"""
+import time
+from statistics import median
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from common.pagination import LimitOffsetOrKeysetPagination
+from products.models import Product
+
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    """Django command to benchmark product list pagination"""
+    help = 'Time product list pages at growing depths with both pagination modes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1_000_000,
+            help='Create synthetic products until there are that many',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Page size',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Number of requests per page',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        rows = self.create_products(options['rows'])
+        limit = options['limit']
+        url = reverse('products:product_list')
+        queryset = Product.active_objects.order_by('created_at', 'id')
+        paginator = LimitOffsetOrKeysetPagination()
+        paginator.keyset_ordering = ('created_at', 'id')
+        client = Client()
+
+        depths = sorted({0, rows // 100, rows // 10, rows // 2, max(rows - limit, 0)})
+        self.stdout.write(f'{rows} products, {limit} per page')
+        self.stdout.write(f'{"offset":>10} {"limit-offset":>14} {"keyset":>10}')
+        with override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        }):
+            for depth in depths:
+                offset_ms = self.measure(
+                    client,
+                    url,
+                    {'limit': limit, 'offset': depth},
+                    options['repeat'],
+                )
+                params = {'limit': limit, 'pagination': 'cursor'}
+                if depth:
+                    last = queryset.values_list('created_at', 'id')[depth - 1]
+                    params['cursor'] = paginator.encode_cursor(last)
+                keyset_ms = self.measure(client, url, params, options['repeat'])
+                self.stdout.write(f'{depth:>10} {offset_ms:>11.1f} ms {keyset_ms:>7.1f} ms')
+
+    def measure(self, client: Client, url: str, params: dict, repeat: int) -> float:
+        timings = list()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url, params)
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.content
+        return median(timings) * 1000
+
+    def create_products(self, rows: int) -> int:
+        existing = Product.active_objects.count()
+        for start in range(existing, rows, BATCH_SIZE):
+            Product.objects.bulk_create([
+                Product(name=f'Benchmark Product {index}', sku=f'BENCH-{index}')
+                for index in range(start, min(start + BATCH_SIZE, rows))
+            ])
+        return max(existing, rows)
@@ -0,0 +1,37 @@
+"""
+Django command to build the columnar snapshot of the price intervals.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.snapshot import build_snapshot
+
+
+class Command(BaseCommand):
+    """Django command to build price snapshot"""
+    help = (
+        'Write price intervals into memory-mappable column files for analytics, '
+        'only products changed since the last build are read from the database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Read every product from the database',
+        )
+        parser.add_argument(
+            '--path',
+            help='Snapshot directory, PRICE_SNAPSHOT_DIR by default',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        started = time.perf_counter()
+        result = build_snapshot(options['path'], full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Built snapshot {result.version}: {result.products} products, {result.rows} intervals, '
+            f'{result.rebuilt_products} products read from the database '
+            f'in {time.perf_counter() - started:.2f}s'
+        ))
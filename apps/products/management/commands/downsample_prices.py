@@ -0,0 +1,61 @@
+"""
+Django command to replace old price intervals with weekly,
+monthly or quarterly aggregates.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from products.managers import CHUNK_SIZE, Granularity
+from products.retention import (
+    downsample_granularity,
+    downsample_prices,
+    retention_cutoff,
+)
+
+
+class Command(BaseCommand):
+    """Django command to downsample old prices"""
+    help = (
+        'Replace price intervals older than --days with aggregates (average, min, max and '
+        'priced days) per --granularity period and report the rows and bytes reclaimed. '
+        'Days before the cutoff become read-only'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.PRICE_RETENTION_DAYS,
+            help='Keep daily resolution for this many days',
+        )
+        parser.add_argument(
+            '--granularity',
+            choices=[item.value for item in Granularity if item != Granularity.DAY],
+            help='Length of the aggregated periods (PRICE_DOWNSAMPLE_GRANULARITY by default)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Products downsampled per transaction',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['days'] < 0:
+            raise CommandError('--days should not be negative')
+        try:
+            granularity = Granularity(options['granularity'] or downsample_granularity())
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        report = downsample_prices(
+            retention_cutoff(options['days'], granularity),
+            granularity,
+            options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Downsampled prices of {report.products} products before {report.cutoff}: '
+            f'{report.price_intervals} price intervals replaced by {report.price_aggregates} '
+            f'{granularity.value} aggregates, about {report.bytes_reclaimed} bytes reclaimed'
+        ))
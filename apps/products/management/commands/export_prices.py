@@ -0,0 +1,71 @@
+"""
+Django command to stream price intervals into a CSV or NDJSON file.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from products.exports import (
+    ExportFormat,
+    export_querysets,
+    render_export,
+)
+
+
+class Command(BaseCommand):
+    """Django command to export prices"""
+    help = 'Stream price intervals of active products as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=[item.value for item in ExportFormat],
+            default=ExportFormat.CSV.value,
+            help='Output format, one row per price interval',
+        )
+        parser.add_argument(
+            '--category',
+            action='append',
+            dest='categories',
+            help='Id of the category to export, can be repeated',
+        )
+        parser.add_argument(
+            '--product',
+            action='append',
+            dest='products',
+            help='Id of the product to export, can be repeated',
+        )
+        parser.add_argument(
+            '--from',
+            dest='from_date',
+            type=date.fromisoformat,
+            help='Skip intervals ending before this date (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--to',
+            dest='to_date',
+            type=date.fromisoformat,
+            help='Skip intervals starting after this date (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write, stdout by default',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        querysets = export_querysets(
+            category_ids=options['categories'],
+            product_ids=options['products'],
+            start_date=options['from_date'],
+            end_date=options['to_date'],
+        )
+        lines = render_export(querysets, ExportFormat(options['format']))
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'w', newline='') as output:
+            output.writelines(lines)
+        self.stdout.write(self.style.SUCCESS(f'Exported prices to {options["output"]}'))
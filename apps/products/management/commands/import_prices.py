@@ -0,0 +1,167 @@
+"""
+Django command to import (sku, date, price) observations from CSV or NDJSON files.
+"""
+import json
+import os
+import time
+from datetime import date
+from typing import (
+    Dict,
+    Iterable,
+    List,
+)
+from uuid import UUID
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models import Q
+
+from products.exports import ExportFormat
+from products.imports import (
+    InvalidRecord,
+    Observation,
+    collapse_observations,
+    collapse_observations_in_db,
+    parse_record,
+    read_records,
+)
+from products.models import Product, PriceInterval
+
+
+class Command(BaseCommand):
+    """Django command to import prices"""
+    help = 'Import (sku, date, price) observations, runs of equal prices become price intervals'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='CSV file with a sku,date,price header or NDJSON file',
+        )
+        parser.add_argument(
+            '--format',
+            choices=[item.value for item in ExportFormat],
+            help='Format of the file, guessed from its extension by default',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50000,
+            help='Records written in one transaction',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File with the number of imported records, <path>.checkpoint by default',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip records imported before the checkpoint',
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_false',
+            dest='copy',
+            help='Collapse observations in Python even on PostgreSQL',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = options['path']
+        file_format = ExportFormat(options['format'] or (
+            ExportFormat.NDJSON if path.lower().endswith('.ndjson')
+            else ExportFormat.CSV
+        ))
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        self.use_copy = options['copy'] and connection.vendor == 'postgresql'
+
+        offset = 0
+        if options['resume'] and os.path.exists(checkpoint):
+            with open(checkpoint) as checkpoint_file:
+                offset = json.load(checkpoint_file)['records']
+            self.stdout.write(f'Resuming after {offset} records')
+
+        self.products = dict(
+            Product.active_objects.filter(sku__isnull=False).values_list('sku', 'id')
+        )
+        self.imported = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+
+        position = 0
+        batch: List[Observation] = list()
+        with open(path, newline='') as lines:
+            for position, record in enumerate(read_records(lines, file_format), start=1):
+                if position <= offset:
+                    continue
+                try:
+                    sku, day, price = parse_record(record)
+                except InvalidRecord:
+                    self.skipped += 1
+                    continue
+                if sku not in self.products:
+                    self.skipped += 1
+                    continue
+                batch.append((self.products[sku], day, price))
+
+                if len(batch) >= options['batch_size']:
+                    self.write_batch(batch, position, checkpoint)
+                    batch = list()
+        if position < offset:
+            raise CommandError(f'Checkpoint {checkpoint} is past the end of {path}')
+        self.write_batch(batch, max(position, offset), checkpoint)
+
+        os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} records, skipped {self.skipped}, '
+            f'{self.rate():.0f} records/s'
+        ))
+
+    def write_batch(
+            self,
+            batch: List[Observation],
+            position: int,
+            checkpoint: str,
+        ) -> None:
+        # days of detached partitions and downsampled days are read-only
+        read_only_until = self.read_only_until({product_id for product_id, _, _ in batch})
+        kept = [
+            (product_id, day, price) for product_id, day, price in batch
+            if product_id not in read_only_until or day >= read_only_until[product_id]
+        ]
+        self.skipped += len(batch) - len(kept)
+        if kept:
+            with transaction.atomic():
+                if self.use_copy:
+                    runs = collapse_observations_in_db(kept)
+                else:
+                    runs = collapse_observations(kept)
+                PriceInterval.objects.set_price_runs(runs)
+
+        # the checkpoint is only moved past committed records
+        with open(f'{checkpoint}.tmp', 'w') as checkpoint_file:
+            json.dump({'records': position}, checkpoint_file)
+        os.replace(f'{checkpoint}.tmp', checkpoint)
+
+        self.imported += len(kept)
+        self.stdout.write(
+            f'{position} records read, {self.imported} imported, '
+            f'{self.rate():.0f} records/s'
+        )
+
+    def read_only_until(self, product_ids: Iterable[UUID]) -> Dict[UUID, date]:
+        return {
+            product_id: max(filter(None, boundaries))
+            for product_id, *boundaries in Product.objects.filter(
+                Q(cold_prices_until__isnull=False) | Q(aggregated_until__isnull=False),
+                id__in=product_ids,
+            ).values_list('id', 'cold_prices_until', 'aggregated_until')
+        }
+
+    def rate(self) -> float:
+        return self.imported / max(time.monotonic() - self.started, 1e-9)
@@ -0,0 +1,65 @@
+"""
+Django command to create future partitions of the price
+intervals and to detach old ones.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.partitions import (
+    create_partitions,
+    detach_partitions,
+    get_partitions,
+)
+
+
+class Command(BaseCommand):
+    """Django command to maintain price partitions"""
+    help = (
+        'Create partitions of the price intervals for the current and --ahead next periods '
+        '(PostgreSQL), and move periods ending on or before --detach-before out of the live '
+        'table. Should run before every new period'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=2,
+            help='Partitions created after the current one',
+        )
+        parser.add_argument(
+            '--detach-before',
+            type=date.fromisoformat,
+            help='Detach partitions ending on or before this date, YYYY-MM-DD',
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='List attached and detached partitions',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['ahead'] < 0:
+            raise CommandError('--ahead should not be negative')
+        for partition in create_partitions(options['ahead']):
+            self.stdout.write(f'Created {partition.table}')
+
+        if options['detach_before']:
+            try:
+                results = detach_partitions(options['detach_before'])
+            except ValueError as error:
+                raise CommandError(str(error))
+            for result in results:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Detached {result.partition.table}, {result.price_intervals} price intervals '
+                    f'of {result.products} products'
+                ))
+
+        if options['list']:
+            partitions = get_partitions()
+            attached = set(partitions.attached())
+            for partition in partitions.tables():
+                state = 'attached' if partition in attached else 'detached'
+                self.stdout.write(f'{partition.table:<40}{partition.start} - {partition.end}  {state}')
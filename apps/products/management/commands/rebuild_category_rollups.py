@@ -0,0 +1,94 @@
+"""
+Django command to recount daily price rollups of the categories.
+"""
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from itertools import chain
+from typing import Tuple
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import (
+    Category,
+    CategoryPriceRollup,
+    Product,
+    PriceAggregate,
+    PriceInterval,
+)
+from products.partitions import cold_intervals
+
+
+def aggregate_days(
+        period_end: date,
+        price_total: Decimal,
+        days: int,
+    ) -> Tuple[date, date, Decimal]:
+    """
+    (valid_from, valid_to, price) interval standing for the priced days
+    of an aggregate. Which days were priced is not kept, they are
+    counted at the end of the period with the average price
+    """
+    return (
+        period_end - timedelta(days=days - 1),
+        period_end,
+        (price_total / days).quantize(Decimal('0.01')),
+    )
+
+
+class Command(BaseCommand):
+    """Django command to rebuild category rollups"""
+    help = (
+        'Recount daily price sums of the categories from the price intervals, '
+        'e.g. after queryset updates of products that skip model signals. '
+        'Days downsampled by downsample_prices are counted from the aggregates '
+        'with their average price'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--category',
+            action='append',
+            dest='categories',
+            help='Id of the category to rebuild, can be repeated (all categories by default)',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        categories = Category.objects.order_by('id')
+        if options['categories']:
+            categories = categories.filter(id__in=options['categories'])
+
+        rows = 0
+        for category_id in list(categories.values_list('id', flat=True)):
+            products = Product.active_objects.filter(category_id=category_id)
+            # detached partitions reference products by id only
+            intervals = [
+                PriceInterval.objects.filter(product__in=products),
+                *cold_intervals(products.filter(cold_prices_until__isnull=False).values('id')),
+            ]
+            # daily prices of a product end at its own `aggregated_until`,
+            # its earlier days are only in the aggregates
+            aggregates = PriceAggregate.objects.filter(product_id__in=products.values('id'))
+            with transaction.atomic():
+                CategoryPriceRollup.objects.filter(category_id=category_id).delete()
+                rows += CategoryPriceRollup.objects.add_intervals(chain(
+                    (
+                        (category_id, *row)
+                        for queryset in intervals
+                        for row in queryset.values_list('valid_from', 'valid_to', 'price').iterator()
+                    ),
+                    (
+                        (category_id, *aggregate_days(*row))
+                        for row in aggregates.values_list(
+                            'period_end',
+                            'price_total',
+                            'days',
+                        ).iterator()
+                    ),
+                ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt rollups of {categories.count()} categories, {rows} days'
+        ))
@@ -0,0 +1,32 @@
+"""
+Django command to recount running totals of the price intervals.
+"""
+from django.core.management.base import BaseCommand
+
+from products.models import Product, PriceInterval
+
+
+class Command(BaseCommand):
+    """Django command to rebuild price rollups"""
+    help = 'Recount running totals used for the average price of a period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            action='append',
+            dest='products',
+            help='Id of the product to rebuild, can be repeated (all products by default)',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        products = Product.objects.filter(price_intervals__isnull=False).distinct()
+        if options['products']:
+            products = products.filter(id__in=options['products'])
+
+        updated = 0
+        for product in products.iterator():
+            updated += PriceInterval.objects.update_cumulative(product)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt rollups of {products.count()} products, {updated} intervals updated'
+        ))
@@ -0,0 +1,44 @@
+"""
+Django command to recount current prices of the products.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from products.models import Product, PriceInterval
+from products.signals import prices_changed
+
+
+class Command(BaseCommand):
+    """Django command to refresh current prices"""
+    help = (
+        'Recount current price, its date and the previous price of the products. '
+        'Should run daily, intervals starting today become current without any write'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            action='append',
+            dest='products',
+            help='Id of the product to refresh, can be repeated (all products by default)',
+        )
+        parser.add_argument(
+            '--date',
+            type=date.fromisoformat,
+            help='Day the prices are current on, YYYY-MM-DD (today by default)',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        products = Product.objects.order_by('id')
+        if options['products']:
+            products = products.filter(id__in=options['products'])
+        product_ids = list(products.values_list('id', flat=True))
+
+        updated = PriceInterval.objects.refresh_current_prices(product_ids, options['date'])
+        if updated:
+            prices_changed.send(sender=PriceInterval, product_ids=product_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked current prices of {len(product_ids)} products, {updated} updated'
+        ))
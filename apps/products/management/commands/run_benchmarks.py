@@ -0,0 +1,260 @@
+"""
+Django command to time every read endpoint with a cold and a warm
+cache plus the set-price write path, and to compare the results
+with a baseline.
+"""
+import json
+import platform
+import re
+import statistics
+import time
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+)
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models import (
+    Count,
+    Max,
+    Min,
+)
+from django.http import HttpResponse
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from products.api.urls import sync_urlpatterns
+from products.models import Product, PriceInterval
+
+
+COLD = 'cold'
+WARM = 'warm'
+WRITE = 'write'
+QUERIES_PATTERN = re.compile(r'desc="(\d+) queries"')
+
+Results = Dict[str, Dict[str, Dict[str, float]]]
+
+
+class Command(BaseCommand):
+    """Django command to run the benchmark suite"""
+    help = (
+        'Time the read endpoints with a cold and a warm cache and the set-price '
+        'write path, write the results as JSON and fail on regressions of a baseline. '
+        'Run `seed_benchmark` first'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Timed requests per endpoint and mode',
+        )
+        parser.add_argument(
+            '--output',
+            type=Path,
+            help='Write the results to this JSON file',
+        )
+        parser.add_argument(
+            '--baseline',
+            type=Path,
+            help='Results of a previous run to compare with',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Allowed relative slowdown of the median over the baseline',
+        )
+        parser.add_argument(
+            '--min-delta',
+            type=float,
+            default=1.0,
+            help='Slowdowns of fewer milliseconds are never regressions',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['iterations'] < 1:
+            raise CommandError('--iterations should be positive')
+        baseline = None
+        if options['baseline']:
+            try:
+                baseline = json.loads(options['baseline'].read_text())['results']
+            except (OSError, ValueError, KeyError) as error:
+                raise CommandError(f'Can not read the baseline: {error}')
+
+        product = Product.active_objects.annotate(
+            intervals=Count('price_intervals'),
+        ).filter(
+            intervals__gt=0,
+            category__isnull=False,
+        ).order_by('-intervals', 'sku').first()
+        if product is None:
+            raise CommandError('No product with prices, run `seed_benchmark` first')
+        period = PriceInterval.objects.filter(product=product).aggregate(
+            start=Min('valid_from'),
+            end=Max('valid_to'),
+        )
+        start_date, end_date = period['start'].isoformat(), period['end'].isoformat()
+        ids = {'category': str(product.category_id), 'product': str(product.id)}
+        params = {
+            'category_list': {'limit': 20},
+            'product_list': {'limit': 20},
+            'price_history': {'limit': 100},
+            'category_price_index': {'start_date': start_date, 'end_date': end_date},
+            'get_avg_price_for_period': {'start_date': start_date, 'end_date': end_date},
+            'get_avg_price_series': {'start_date': start_date, 'end_date': end_date},
+            'get_price_statistics': {'start_date': start_date, 'end_date': end_date},
+            'get_avg_prices_for_period': {
+                'category_id': ids['category'],
+                'start_date': start_date,
+                'end_date': end_date,
+            },
+            'export_prices': {'product_id': ids['product']},
+        }
+
+        client = Client()
+        results: Results = dict()
+        for pattern in sync_urlpatterns:
+            if not hasattr(pattern.callback.view_class, 'get'):
+                continue
+            kwargs = dict()
+            if 'id' in pattern.pattern.converters:
+                kwargs['id'] = ids['category' if pattern.name.startswith('category') else 'product']
+            url = reverse(f'products:{pattern.name}', kwargs=kwargs)
+            query = params.get(pattern.name, {})
+
+            def get() -> HttpResponse:
+                return client.get(url, query)
+
+            results[pattern.name] = {
+                COLD: self.measure(get, options['iterations'], before=cache.clear),
+                WARM: self.measure(get, options['iterations'], before=get),
+            }
+            self.report(pattern.name, results[pattern.name])
+
+        writes = {
+            'set_price_for_period': {
+                'product_id': ids['product'],
+                'start_date': start_date,
+                'end_date': end_date,
+                'price': '9.99',
+            },
+            'bulk_set_price_for_period': {
+                'category_id': ids['category'],
+                'start_date': start_date,
+                'end_date': end_date,
+                'price': '9.99',
+            },
+        }
+        for name, data in writes.items():
+            url = reverse(f'products:{name}')
+
+            def post() -> HttpResponse:
+                # every iteration writes over the same data
+                with transaction.atomic():
+                    response = client.post(url, data, content_type='application/json')
+                    transaction.set_rollback(True)
+                return response
+
+            results[name] = {WRITE: self.measure(post, options['iterations'])}
+            self.report(name, results[name])
+
+        output = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'iterations': options['iterations'],
+                'products': Product.objects.count(),
+                'price_intervals': PriceInterval.objects.count(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'results': results,
+        }
+        if options['output']:
+            options['output'].write_text(json.dumps(output, indent=2))
+            self.stdout.write(f'Results written to {options["output"]}')
+
+        if baseline is not None:
+            regressions = self.regressions(
+                results,
+                baseline,
+                options['threshold'],
+                options['min_delta'],
+            )
+            if regressions:
+                raise CommandError('Regressions over the baseline:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions over the baseline'))
+
+    def measure(
+            self,
+            request: Callable[[], HttpResponse],
+            iterations: int,
+            before: Callable[[], Any] | None = None,
+        ) -> Dict[str, float]:
+        """
+        Median and 95th percentile of the request time in
+        milliseconds, and the number of queries of the last request
+        """
+        durations: List[float] = list()
+        for _ in range(iterations):
+            if before is not None:
+                before()
+            started = time.perf_counter()
+            response = request()
+            if response.streaming:
+                b''.join(response.streaming_content)
+            durations.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'{response.request["PATH_INFO"]} returned {response.status_code}'
+                )
+        durations.sort()
+        queries = QUERIES_PATTERN.search(response.get('Server-Timing', ''))
+        return {
+            'median_ms': round(statistics.median(durations), 3),
+            'p95_ms': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+            'queries': int(queries.group(1)) if queries else None,
+        }
+
+    def report(self, name: str, modes: Dict[str, Dict[str, float]]) -> None:
+        for mode, result in modes.items():
+            self.stdout.write(
+                f'{name:<28}{mode:<6}{result["median_ms"]:>10.2f} ms'
+                f'{result["p95_ms"]:>10.2f} ms p95{result["queries"] or 0:>6} queries'
+            )
+
+    def regressions(
+            self,
+            results: Results,
+            baseline: Results,
+            threshold: float,
+            min_delta: float,
+        ) -> List[str]:
+        """
+        Endpoints and modes whose median is slower than
+        the baseline by more than `threshold`
+        """
+        regressions = list()
+        for name, modes in results.items():
+            for mode, result in modes.items():
+                base = baseline.get(name, {}).get(mode)
+                if base is None:
+                    continue
+                median, base_median = result['median_ms'], base['median_ms']
+                if median > base_median * (1 + threshold) and median - base_median >= min_delta:
+                    regressions.append(
+                        f'{name} ({mode}): {median:.2f} ms, baseline {base_median:.2f} ms'
+                    )
+        return regressions
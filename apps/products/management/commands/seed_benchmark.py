@@ -0,0 +1,162 @@
+"""
+Django command to generate synthetic categories, products and prices.
+"""
+import random
+import time
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from typing import (
+    List,
+    Tuple,
+)
+from uuid import UUID
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from products.models import (
+    Category,
+    CategoryPriceRollup,
+    Product,
+    PriceInterval,
+)
+
+
+SKU_PREFIX = 'SEED-'
+CATEGORY_PREFIX = 'Benchmark Category'
+BATCH_SIZE = 5000
+# products written per `set_price_runs` call
+RUNS_CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    """Django command to seed benchmark data"""
+    help = (
+        'Generate categories, products and daily prices for benchmarks, '
+        'the same seed always generates the same data'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--categories',
+            type=int,
+            default=10,
+            help='Number of categories',
+        )
+        parser.add_argument(
+            '--products',
+            type=int,
+            default=1000,
+            help='Number of products, spread over the categories',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Number of days with prices of every product',
+        )
+        parser.add_argument(
+            '--start-date',
+            type=date.fromisoformat,
+            default=date(2024, 1, 1),
+            help='First day with prices (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--run-days',
+            type=int,
+            default=14,
+            help='Average number of days a price lasts',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed of the ids, prices and price changes',
+        )
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Delete previously seeded data first',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        started = time.perf_counter()
+        seeded_products = Product.objects.filter(sku__startswith=SKU_PREFIX)
+        seeded_categories = Category.objects.filter(name__startswith=CATEGORY_PREFIX)
+        if options['flush']:
+            with transaction.atomic():
+                # the rollups go with the categories, detached products
+                # skip the per-product rollup update on delete
+                seeded_products.update(category=None)
+                CategoryPriceRollup.objects.filter(category__in=seeded_categories).delete()
+                seeded_products.delete()
+                seeded_categories.delete()
+        elif seeded_products.exists():
+            raise CommandError('Benchmark data already exists, use --flush to replace it')
+
+        rand = random.Random(options['seed'])
+        categories = Category.objects.bulk_create([
+            Category(id=self.random_id(rand), name=f'{CATEGORY_PREFIX} {index}')
+            for index in range(options['categories'])
+        ], batch_size=BATCH_SIZE)
+        products = Product.objects.bulk_create([
+            Product(
+                id=self.random_id(rand),
+                name=f'Benchmark Product {index}',
+                sku=f'{SKU_PREFIX}{index}',
+                category=categories[index % len(categories)] if categories else None,
+            )
+            for index in range(options['products'])
+        ], batch_size=BATCH_SIZE)
+        self.stdout.write(f'Created {len(categories)} categories and {len(products)} products')
+
+        intervals = 0
+        for offset in range(0, len(products), RUNS_CHUNK_SIZE):
+            runs = {
+                product.id: self.price_runs(
+                    rand,
+                    options['start_date'],
+                    options['days'],
+                    options['run_days'],
+                )
+                for product in products[offset:offset + RUNS_CHUNK_SIZE]
+            }
+            with transaction.atomic():
+                PriceInterval.objects.set_price_runs(runs)
+            intervals += sum(len(product_runs) for product_runs in runs.values())
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {intervals} price intervals in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def random_id(self, rand: random.Random) -> UUID:
+        return UUID(int=rand.getrandbits(128), version=4)
+
+    def price_runs(
+            self,
+            rand: random.Random,
+            start_date: date,
+            days: int,
+            run_days: int,
+        ) -> List[Tuple[date, date, Decimal]]:
+        """
+        Random walk of the price, every run lasts
+        `run_days` on average
+        """
+        runs: List[Tuple[date, date, Decimal]] = list()
+        cents = rand.randint(500, 50000)
+        day = 0
+        while day < days:
+            length = min(max(1, int(rand.expovariate(1 / run_days))), days - day)
+            # consecutive runs never share the price, so they are not merged
+            cents = max(1, cents + rand.choice((-1, 1)) * rand.randint(1, max(1, cents // 10)))
+            runs.append((
+                start_date + timedelta(days=day),
+                start_date + timedelta(days=day + length - 1),
+                Decimal(cents) / 100,
+            ))
+            day += length
+        return runs
@@ -0,0 +1,997 @@
+from collections import defaultdict
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from enum import Enum
+from functools import reduce
+from operator import or_
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Tuple,
+)
+from uuid import UUID
+from django.db import transaction
+from django.db.models import (
+    Case,
+    DateField,
+    DecimalField,
+    F,
+    IntegerField,
+    Manager,
+    Model,
+    Q,
+    QuerySet,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import (
+    RowNumber,
+    Trunc,
+)
+from django.utils import timezone
+from .signals import prices_changed
+
+
+ONE_DAY = timedelta(days=1)
+BATCH_SIZE = 1000
+CHUNK_SIZE = 500
+
+# (category_id, valid_from, valid_to, price, count) added to every
+# day of the range, negative to take the price away
+RollupChange = Tuple[UUID, date, date, Decimal, int]
+
+
+class Granularity(str, Enum):
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+    QUARTER = 'quarter'
+
+
+class ColdPricesError(ValueError):
+    """
+    Prices were written before `cold_prices_until` or `aggregated_until`
+    of the product, days of detached partitions and downsampled days
+    are read-only
+    """
+    def __init__(self, cold_prices_until: date) -> None:
+        super().__init__(f'Prices before {cold_prices_until} are read-only')
+        self.cold_prices_until = cold_prices_until
+
+
+def truncate_date(day: date, granularity: Granularity) -> date:
+    """
+    Start of the period containing `day`, same as Trunc* functions
+    (weeks start on Monday)
+    """
+    if granularity == Granularity.WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == Granularity.MONTH:
+        return day.replace(day=1)
+    if granularity == Granularity.QUARTER:
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day
+
+
+def next_period(day: date, granularity: Granularity) -> date:
+    """
+    Start of the period following the one containing `day`
+    """
+    start = truncate_date(day, granularity)
+    if granularity == Granularity.WEEK:
+        return start + timedelta(days=7)
+    if granularity in (Granularity.MONTH, Granularity.QUARTER):
+        months = 3 if granularity == Granularity.QUARTER else 1
+        month = start.month - 1 + months
+        return start.replace(year=start.year + month // 12, month=month % 12 + 1)
+    return start + ONE_DAY
+
+
+def totals_at(
+        row: Tuple[date, date, Decimal, Decimal, int] | None,
+        day: date,
+    ) -> Tuple[Decimal, int]:
+    """
+    Running totals up to `day` from the `cumulative_row`
+    of the last interval starting before it
+    """
+    if row is None:
+        return Decimal(0), 0
+    valid_from, valid_to, price, cumulative_total, cumulative_days = row
+    covered_days = (min(day, valid_to) - valid_from).days + 1
+    return (
+        cumulative_total + price * covered_days,
+        cumulative_days + covered_days,
+    )
+
+
+def average_between(
+        start: Tuple[Decimal, int],
+        end: Tuple[Decimal, int],
+    ) -> Decimal | None:
+    (start_total, start_days), (end_total, end_days) = start, end
+    days = end_days - start_days
+    if not days:
+        return None
+    return (end_total - start_total) / days
+
+
+def current_price(
+        intervals: List[Model],
+        day: date,
+    ) -> Tuple[Decimal | None, date | None, Decimal | None]:
+    """
+    Current price on `day`, the date it took effect and the price
+    before it, from the two last intervals starting on or before
+    `day` (latest first). A gap without price counts as a price
+    of `None`
+    """
+    if not intervals:
+        return None, None, None
+    latest = intervals[0]
+    if latest.valid_to < day:
+        return None, latest.valid_to + ONE_DAY, latest.price
+    previous_price = None
+    if len(intervals) > 1 and intervals[1].valid_to + ONE_DAY == latest.valid_from:
+        previous_price = intervals[1].price
+    return latest.price, latest.valid_from, previous_price
+
+
+def price_series(
+        intervals: Iterable[Tuple[date, date, Decimal]],
+        start_date: date,
+        end_date: date,
+        granularity: Granularity,
+    ) -> List[Tuple[date, Decimal]]:
+    """
+    Day-weighted average price per period of `granularity` of
+    (valid_from, valid_to, price) intervals within the
+    `start_date`..`end_date` range, periods without prices are omitted
+    """
+    totals: Dict[date, Tuple[Decimal, int]] = dict()
+    for valid_from, valid_to, price in intervals:
+        current = max(valid_from, start_date)
+        last = min(valid_to, end_date)
+        while current <= last:
+            period = truncate_date(current, granularity)
+            period_end = min(next_period(current, granularity) - ONE_DAY, last)
+            covered_days = (period_end - current).days + 1
+            total, days = totals.get(period, (Decimal(0), 0))
+            totals[period] = (total + price * covered_days, days + covered_days)
+            current = period_end + ONE_DAY
+    return [
+        (period, total / days)
+        for period, (total, days) in sorted(totals.items())
+    ]
+
+
+def paint_runs(
+        intervals: List[Tuple[date, date, Decimal]],
+        runs: List[Tuple[date, date, Decimal]],
+    ) -> List[Tuple[date, date, Decimal]]:
+    """
+    Paint sorted non-overlapping `runs` over sorted non-overlapping
+    `intervals`, adjacent pieces with the same price are merged
+    """
+    pieces = list(runs)
+    index = 0
+    for valid_from, valid_to, price in intervals:
+        while index < len(runs) and runs[index][1] < valid_from:
+            index += 1
+        start = valid_from
+        for run_from, run_to, _ in runs[index:]:
+            if run_from > valid_to:
+                break
+            if run_from > start:
+                pieces.append((start, run_from - ONE_DAY, price))
+            start = max(start, run_to + ONE_DAY)
+        if start <= valid_to:
+            pieces.append((start, valid_to, price))
+
+    merged: List[Tuple[date, date, Decimal]] = list()
+    for piece in sorted(pieces):
+        if merged and merged[-1][2] == piece[2] and merged[-1][1] + ONE_DAY == piece[0]:
+            merged[-1] = (merged[-1][0], piece[1], piece[2])
+        else:
+            merged.append(piece)
+    return merged
+
+
+def rollup_deltas(changes: Iterable[RollupChange]) -> Dict[Tuple[UUID, date], Tuple[Decimal, int]]:
+    """
+    Sum of the changes per (category, day), days where
+    the changes cancel out are omitted
+    """
+    bounds: Dict[UUID, Dict[date, Tuple[Decimal, int]]] = defaultdict(dict)
+    for category_id, valid_from, valid_to, price, count in changes:
+        category_bounds = bounds[category_id]
+        total, days = category_bounds.get(valid_from, (Decimal(0), 0))
+        category_bounds[valid_from] = (total + price, days + count)
+        total, days = category_bounds.get(valid_to + ONE_DAY, (Decimal(0), 0))
+        category_bounds[valid_to + ONE_DAY] = (total - price, days - count)
+
+    deltas: Dict[Tuple[UUID, date], Tuple[Decimal, int]] = dict()
+    for category_id, category_bounds in bounds.items():
+        total, count = Decimal(0), 0
+        days = sorted(category_bounds)
+        for day, next_day in zip(days, days[1:]):
+            total += category_bounds[day][0]
+            count += category_bounds[day][1]
+            if not total and not count:
+                continue
+            while day < next_day:
+                deltas[(category_id, day)] = (total, count)
+                day += ONE_DAY
+    return deltas
+
+
+class PriceIntervalQuerySet(QuerySet):
+    def overlapping(
+            self,
+            start_date: date,
+            end_date: date,
+        ) -> QuerySet:
+        return self.filter(
+            valid_from__lte=end_date,
+            valid_to__gte=start_date,
+        )
+
+    def average_price(
+            self,
+            start_date: date,
+            end_date: date,
+        ) -> Decimal | None:
+        """
+        Day-weighted average price of the intervals
+        within the `start_date`..`end_date` range
+        """
+        total = Decimal(0)
+        days = 0
+        intervals = self.overlapping(start_date, end_date).values_list(
+            'valid_from',
+            'valid_to',
+            'price',
+        )
+        for valid_from, valid_to, price in intervals:
+            covered_days = (
+                min(valid_to, end_date) - max(valid_from, start_date)
+            ).days + 1
+            total += price * covered_days
+            days += covered_days
+        if not days:
+            return None
+        return total / days
+
+    def average_price_series(
+            self,
+            start_date: date,
+            end_date: date,
+            granularity: Granularity,
+        ) -> List[Tuple[date, Decimal]]:
+        """
+        Day-weighted average price per period of `granularity`
+        within the `start_date`..`end_date` range, periods
+        without prices are omitted
+        """
+        return price_series(
+            self.overlapping(start_date, end_date).values_list(
+                'valid_from',
+                'valid_to',
+                'price',
+            ),
+            start_date,
+            end_date,
+            granularity,
+        )
+
+    def cumulative_row(self, day: date) -> QuerySet:
+        return self.filter(valid_from__lte=day).order_by('-valid_from').values_list(
+            'valid_from',
+            'valid_to',
+            'price',
+            'cumulative_total',
+            'cumulative_days',
+        )
+
+    def cumulative_at(self, day: date) -> Tuple[Decimal, int]:
+        """
+        Sum of prices and number of priced days up to `day` (inclusive)
+        """
+        return totals_at(self.cumulative_row(day).first(), day)
+
+    async def acumulative_at(self, day: date) -> Tuple[Decimal, int]:
+        return totals_at(await self.cumulative_row(day).afirst(), day)
+
+    def cumulative_average_price(
+            self,
+            start_date: date,
+            end_date: date,
+        ) -> Decimal | None:
+        """
+        Same as `average_price`, but takes two indexed lookups
+        of the running totals instead of a range scan
+        """
+        return average_between(
+            self.cumulative_at(start_date - ONE_DAY),
+            self.cumulative_at(end_date),
+        )
+
+    async def acumulative_average_price(
+            self,
+            start_date: date,
+            end_date: date,
+        ) -> Decimal | None:
+        return average_between(
+            await self.acumulative_at(start_date - ONE_DAY),
+            await self.acumulative_at(end_date),
+        )
+
+    def latest_per_product(
+            self,
+            product_ids: Iterable[UUID],
+            day: date,
+            rows: int = 1,
+        ) -> QuerySet:
+        """
+        The last `rows` intervals starting on or before `day`
+        of every product, in one query
+        """
+        return self.filter(
+            product_id__in=product_ids,
+            valid_from__lte=day,
+        ).annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F('product_id'),
+                order_by=F('valid_from').desc(),
+            ),
+        ).filter(row_number__lte=rows)
+
+    def cumulative_at_many(
+            self,
+            product_ids: Iterable[UUID],
+            day: date,
+        ) -> Dict[UUID, Tuple[Decimal, int]]:
+        """
+        Same as `cumulative_at` for many products at once,
+        products without prices up to `day` are omitted
+        """
+        return {
+            interval.product_id: interval.cumulative_at(day)
+            for interval in self.latest_per_product(product_ids, day)
+        }
+
+    def cumulative_average_prices(
+            self,
+            product_ids: Iterable[UUID],
+            start_date: date,
+            end_date: date,
+        ) -> Dict[UUID, Decimal | None]:
+        """
+        Same as `cumulative_average_price` for many
+        products at once, in two queries
+        """
+        product_ids = list(product_ids)
+        totals_before = self.cumulative_at_many(product_ids, start_date - ONE_DAY)
+        totals_at_end = self.cumulative_at_many(product_ids, end_date)
+        return {
+            product_id: average_between(
+                totals_before.get(product_id, (Decimal(0), 0)),
+                totals_at_end.get(product_id, (Decimal(0), 0)),
+            )
+            for product_id in product_ids
+        }
+
+
+class PriceIntervalManager(Manager.from_queryset(PriceIntervalQuerySet)):
+    def set_price(
+            self,
+            product: Model,
+            start_date: date,
+            end_date: date,
+            price: Decimal,
+        ) -> None:
+        """
+        Set `price` for every day of the `start_date`..`end_date` range.
+        Overlapped intervals are trimmed or split, neighbours with
+        the same price are merged into the new interval
+        """
+        self.set_prices([product.pk], start_date, end_date, price)
+
+    @transaction.atomic
+    def set_prices(
+            self,
+            product_ids: Iterable[UUID],
+            start_date: date,
+            end_date: date,
+            price: Decimal,
+            active_only: bool = False,
+            skip_read_only: bool = False,
+        ) -> List[UUID]:
+        """
+        Same as `set_price` for many products at once,
+        every chunk of products takes a fixed number of queries.
+        Rows of the products are locked until the end of the transaction,
+        products deleted meanwhile (or deactivated with `active_only`)
+        are skipped, as are products whose prices are read-only from
+        `start_date` with `skip_read_only` instead of raising
+        `ColdPricesError`. Returns ids of the written products
+        """
+        product_ids = list(product_ids)
+        written: List[UUID] = list()
+        for offset in range(0, len(product_ids), CHUNK_SIZE):
+            written += self._set_prices(
+                product_ids[offset:offset + CHUNK_SIZE],
+                start_date,
+                end_date,
+                price,
+                active_only,
+                skip_read_only,
+            )
+        transaction.on_commit(lambda: prices_changed.send(
+            sender=self.model,
+            product_ids=written,
+        ))
+        return written
+
+    def _set_prices(
+            self,
+            product_ids: List[UUID],
+            start_date: date,
+            end_date: date,
+            price: Decimal,
+            active_only: bool,
+            skip_read_only: bool,
+        ) -> List[UUID]:
+        # concurrent writers of the same products wait for each other
+        categories = self._lock_products(
+            {product_id: start_date for product_id in product_ids},
+            active_only,
+            skip_read_only,
+        )
+        product_ids = [product_id for product_id in product_ids if product_id in categories]
+        if not product_ids:
+            return product_ids
+
+        neighbours: Dict[UUID, List[Model]] = defaultdict(list)
+        intervals = self.filter(product_id__in=product_ids).overlapping(
+            start_date - ONE_DAY,
+            end_date + ONE_DAY,
+        ).order_by('valid_from')
+        for interval in intervals:
+            neighbours[interval.product_id].append(interval)
+
+        totals_before = self.cumulative_at_many(product_ids, start_date - ONE_DAY)
+
+        to_delete: List[Model] = list()
+        to_save: List[Model] = list()
+        shifts: Dict[UUID, Tuple[date, Decimal, int]] = dict()
+        rollup_changes: List[RollupChange] = list()
+
+        for product_id in product_ids:
+            new_from, new_to = start_date, end_date
+            replaced_total, replaced_days = Decimal(0), 0
+            right_pieces: List[Model] = list()
+            category_id = categories.get(product_id)
+            if category_id:
+                rollup_changes.append((category_id, start_date, end_date, price, 1))
+
+            for interval in neighbours[product_id]:
+                if interval.valid_to >= start_date and interval.valid_from <= end_date:
+                    covered_days = (
+                        min(interval.valid_to, end_date) - max(interval.valid_from, start_date)
+                    ).days + 1
+                    replaced_total += interval.price * covered_days
+                    replaced_days += covered_days
+                    if category_id:
+                        rollup_changes.append((
+                            category_id,
+                            max(interval.valid_from, start_date),
+                            min(interval.valid_to, end_date),
+                            -interval.price,
+                            -1,
+                        ))
+
+                if interval.price == price:
+                    new_from = min(new_from, interval.valid_from)
+                    new_to = max(new_to, interval.valid_to)
+                    to_delete.append(interval)
+                    continue
+                if interval.valid_to < start_date or interval.valid_from > end_date:
+                    continue
+
+                to_delete.append(interval)
+                if interval.valid_from < start_date:
+                    to_save.append(self.model(
+                        product_id=product_id,
+                        valid_from=interval.valid_from,
+                        valid_to=start_date - ONE_DAY,
+                        price=interval.price,
+                        cumulative_total=interval.cumulative_total,
+                        cumulative_days=interval.cumulative_days,
+                    ))
+                if interval.valid_to > end_date:
+                    right_pieces.append(self.model(
+                        product_id=product_id,
+                        valid_from=end_date + ONE_DAY,
+                        valid_to=interval.valid_to,
+                        price=interval.price,
+                    ))
+
+            total_before, days_before = totals_before.get(product_id, (Decimal(0), 0))
+            merged_days = (start_date - new_from).days
+            new_interval = self.model(
+                product_id=product_id,
+                valid_from=new_from,
+                valid_to=new_to,
+                price=price,
+                cumulative_total=total_before - price * merged_days,
+                cumulative_days=days_before - merged_days,
+            )
+            to_save.append(new_interval)
+            for piece in right_pieces:
+                piece.cumulative_total = new_interval.cumulative_total + price * new_interval.days
+                piece.cumulative_days = new_interval.cumulative_days + new_interval.days
+                to_save.append(piece)
+
+            range_days = (end_date - start_date).days + 1
+            shifts[product_id] = (
+                new_to,
+                price * range_days - replaced_total,
+                range_days - replaced_days,
+            )
+
+        self._shift_cumulative(shifts)
+
+        # intervals keeping their start are updated in place by the upsert
+        saved_keys = {(item.product_id, item.valid_from) for item in to_save}
+        to_delete = [
+            item.pk for item in to_delete
+            if (item.product_id, item.valid_from) not in saved_keys
+        ]
+        if to_delete:
+            self.filter(pk__in=to_delete).delete()
+        self.bulk_create(
+            to_save,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['product', 'valid_from'],
+            update_fields=[
+                'valid_to',
+                'price',
+                'cumulative_total',
+                'cumulative_days',
+                'updated_at',
+            ],
+        )
+        self.refresh_current_prices(product_ids)
+        self._rollup_manager().apply_changes(rollup_changes)
+        return product_ids
+
+    @transaction.atomic
+    def set_price_runs(
+            self,
+            runs: Dict[UUID, List[Tuple[date, date, Decimal]]],
+        ) -> None:
+        """
+        Same as `set_price` for every (start_date, end_date, price)
+        run of every product, runs of a product should not overlap.
+        Every chunk of products takes a fixed number of queries
+        """
+        product_ids = list(runs)
+        for offset in range(0, len(product_ids), CHUNK_SIZE):
+            self._set_price_runs({
+                product_id: sorted(runs[product_id])
+                for product_id in product_ids[offset:offset + CHUNK_SIZE]
+            })
+        transaction.on_commit(lambda: prices_changed.send(
+            sender=self.model,
+            product_ids=product_ids,
+        ))
+
+    def _set_price_runs(
+            self,
+            runs: Dict[UUID, List[Tuple[date, date, Decimal]]],
+        ) -> None:
+        categories = self._lock_products({
+            product_id: product_runs[0][0]
+            for product_id, product_runs in runs.items()
+        })
+        runs = {product_id: runs[product_id] for product_id in categories}
+        if not runs:
+            return
+
+        # intervals touching the runs of every product,
+        # they are repainted together with the runs
+        spans = {
+            product_id: (product_runs[0][0] - ONE_DAY, max(run[1] for run in product_runs) + ONE_DAY)
+            for product_id, product_runs in runs.items()
+        }
+        touched: Dict[UUID, List[Model]] = defaultdict(list)
+        intervals = self.filter(product_id__in=runs.keys()).overlapping(
+            min(start for start, _ in spans.values()),
+            max(end for _, end in spans.values()),
+        ).order_by('valid_from')
+        for interval in intervals:
+            start, end = spans[interval.product_id]
+            if interval.valid_to >= start and interval.valid_from <= end:
+                touched[interval.product_id].append(interval)
+
+        region_starts = {
+            product_id: min([product_runs[0][0]] + [
+                interval.valid_from for interval in touched[product_id]
+            ])
+            for product_id, product_runs in runs.items()
+        }
+        previous_intervals = self.filter(
+            product_id__in=runs.keys(),
+            valid_from__lt=Case(
+                *[
+                    When(product_id=product_id, then=Value(region_start))
+                    for product_id, region_start in region_starts.items()
+                ],
+                output_field=DateField(),
+            ),
+        ).annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F('product_id'),
+                order_by=F('valid_from').desc(),
+            ),
+        ).filter(row_number=1)
+        totals_before: Dict[UUID, Tuple[Decimal, int]] = {
+            interval.product_id: interval.cumulative_at(
+                region_starts[interval.product_id] - ONE_DAY,
+            )
+            for interval in previous_intervals
+        }
+
+        to_delete: List[Model] = list()
+        to_save: List[Model] = list()
+        shifts: Dict[UUID, Tuple[date, Decimal, int]] = dict()
+        rollup_changes: List[RollupChange] = list()
+
+        for product_id, product_runs in runs.items():
+            existing = [
+                (interval.valid_from, interval.valid_to, interval.price)
+                for interval in touched[product_id]
+            ]
+            total, days = totals_before.get(product_id, (Decimal(0), 0))
+            replaced_total = sum(
+                (price * ((valid_to - valid_from).days + 1) for valid_from, valid_to, price in existing),
+                Decimal(0),
+            )
+            replaced_days = sum((valid_to - valid_from).days + 1 for valid_from, valid_to, _ in existing)
+            added_total, added_days = Decimal(0), 0
+
+            category_id = categories.get(product_id)
+            if category_id:
+                rollup_changes.extend(
+                    (category_id, valid_from, valid_to, -price, -1)
+                    for valid_from, valid_to, price in existing
+                )
+
+            for valid_from, valid_to, price in paint_runs(existing, product_runs):
+                if category_id:
+                    rollup_changes.append((category_id, valid_from, valid_to, price, 1))
+                interval = self.model(
+                    product_id=product_id,
+                    valid_from=valid_from,
+                    valid_to=valid_to,
+                    price=price,
+                    cumulative_total=total + added_total,
+                    cumulative_days=days + added_days,
+                )
+                to_save.append(interval)
+                added_total += price * interval.days
+                added_days += interval.days
+
+            to_delete.extend(touched[product_id])
+            shifts[product_id] = (
+                to_save[-1].valid_to,
+                added_total - replaced_total,
+                added_days - replaced_days,
+            )
+
+        self._shift_cumulative(shifts)
+
+        saved_keys = {(item.product_id, item.valid_from) for item in to_save}
+        to_delete = [
+            item.pk for item in to_delete
+            if (item.product_id, item.valid_from) not in saved_keys
+        ]
+        if to_delete:
+            self.filter(pk__in=to_delete).delete()
+        self.bulk_create(
+            to_save,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['product', 'valid_from'],
+            update_fields=[
+                'valid_to',
+                'price',
+                'cumulative_total',
+                'cumulative_days',
+                'updated_at',
+            ],
+        )
+        self.refresh_current_prices(runs.keys())
+        self._rollup_manager().apply_changes(rollup_changes)
+
+    def _lock_products(
+            self,
+            start_dates: Dict[UUID, date],
+            active_only: bool = False,
+            skip_read_only: bool = False,
+        ) -> Dict[UUID, UUID | None]:
+        """
+        Lock rows of the products written from the given dates,
+        returns the category whose rollups include the product
+        prices (None if inactive) of every product still there,
+        or still active with `active_only`. Raises `ColdPricesError`
+        for writes into detached partitions or downsampled days,
+        such products are left out with `skip_read_only`
+        """
+        product_model = self.model._meta.get_field('product').related_model
+        products = product_model.objects.select_for_update().filter(
+            id__in=start_dates.keys(),
+        ).order_by('id').values_list('id', 'category_id', 'is_active', 'cold_prices_until', 'aggregated_until')
+        categories: Dict[UUID, UUID | None] = dict()
+        for product_id, category_id, is_active, *boundaries in products:
+            # checked on the locked row, the caller may have read it earlier
+            if active_only and not is_active:
+                continue
+            read_only_until = max(filter(None, boundaries), default=None)
+            if read_only_until and start_dates[product_id] < read_only_until:
+                if skip_read_only:
+                    continue
+                raise ColdPricesError(read_only_until)
+            categories[product_id] = category_id if is_active else None
+        return categories
+
+    def _rollup_manager(self) -> 'CategoryPriceRollupManager':
+        product_model = self.model._meta.get_field('product').related_model
+        category_model = product_model._meta.get_field('category').related_model
+        return category_model._meta.get_field('price_rollups').related_model.objects
+
+    def _shift_cumulative(
+            self,
+            shifts: Dict[UUID, Tuple[date, Decimal, int]],
+        ) -> None:
+        """
+        Add totals to the running totals of the intervals starting
+        after the given date, in one query for all products
+        """
+        shifts = {
+            product_id: shift
+            for product_id, shift in shifts.items()
+            if shift[1] or shift[2]
+        }
+        if not shifts:
+            return
+        self.filter(
+            product_id__in=shifts.keys(),
+            valid_from__gt=Case(
+                *[
+                    When(product_id=product_id, then=Value(after))
+                    for product_id, (after, _, _) in shifts.items()
+                ],
+                output_field=DateField(),
+            ),
+        ).update(
+            cumulative_total=F('cumulative_total') + Case(
+                *[
+                    When(product_id=product_id, then=Value(total))
+                    for product_id, (_, total, _) in shifts.items()
+                ],
+                output_field=DecimalField(max_digits=20, decimal_places=2),
+            ),
+            cumulative_days=F('cumulative_days') + Case(
+                *[
+                    When(product_id=product_id, then=Value(days))
+                    for product_id, (_, _, days) in shifts.items()
+                ],
+                output_field=IntegerField(),
+            ),
+        )
+
+    def update_cumulative(
+            self,
+            product: Model,
+            since: date | None = None,
+        ) -> int:
+        """
+        Recount running totals of the product intervals
+        starting at `since` (all intervals by default),
+        returns the number of updated intervals
+        """
+        intervals = self.filter(product=product).order_by('valid_from')
+        total, days = Decimal(0), 0
+        if since is not None:
+            previous = intervals.filter(valid_from__lt=since).last()
+            if previous is not None:
+                total = previous.cumulative_total + previous.price * previous.days
+                days = previous.cumulative_days + previous.days
+            intervals = intervals.filter(valid_from__gte=since)
+
+        changed: List[Model] = list()
+        for interval in intervals:
+            if (interval.cumulative_total, interval.cumulative_days) != (total, days):
+                interval.cumulative_total = total
+                interval.cumulative_days = days
+                changed.append(interval)
+            total += interval.price * interval.days
+            days += interval.days
+
+        self.bulk_update(
+            changed,
+            ['cumulative_total', 'cumulative_days'],
+            batch_size=BATCH_SIZE,
+        )
+        return len(changed)
+
+    def refresh_current_prices(
+            self,
+            product_ids: Iterable[UUID],
+            day: date | None = None,
+        ) -> int:
+        """
+        Recount `current_price`, `current_price_date` and
+        `previous_price` of the products on `day` (today by default),
+        returns the number of updated products. A price running from
+        the end of the detached partitions or of the downsampled days is
+        followed back into them
+        """
+        from .retention import price_since
+
+        day = day or timezone.localdate()
+        product_ids = list(product_ids)
+        product_model = self.model._meta.get_field('product').related_model
+        updated = 0
+        for offset in range(0, len(product_ids), CHUNK_SIZE):
+            chunk = product_ids[offset:offset + CHUNK_SIZE]
+            intervals: Dict[UUID, List[Model]] = defaultdict(list)
+            for interval in self.latest_per_product(chunk, day, rows=2):
+                intervals[interval.product_id].append(interval)
+
+            changed: List[Model] = list()
+            now = timezone.now()
+            products = product_model.objects.filter(id__in=chunk).only(
+                'id',
+                'current_price',
+                'current_price_date',
+                'previous_price',
+                'cold_prices_until',
+                'aggregated_until',
+            )
+            for product in products:
+                values = current_price(
+                    sorted(intervals[product.id], key=lambda item: item.valid_from, reverse=True),
+                    day,
+                )
+                boundary = product.cold_prices_until or product.aggregated_until
+                if values[0] is not None and values[1] == boundary:
+                    # detaching and downsampling split the interval, the date of the
+                    # same price stored by the refresh before the split is still right
+                    if values[0] == product.current_price and product.current_price_date <= values[1]:
+                        continue
+                    values = (values[0], *price_since(product, values[0], values[1]))
+                if values == (product.current_price, product.current_price_date, product.previous_price):
+                    continue
+                product.current_price, product.current_price_date, product.previous_price = values
+                product.updated_at = now
+                changed.append(product)
+
+            product_model.objects.bulk_update(
+                changed,
+                ['current_price', 'current_price_date', 'previous_price', 'updated_at'],
+                batch_size=BATCH_SIZE,
+            )
+            updated += len(changed)
+        return updated
+
+
+class CategoryPriceRollupManager(Manager):
+    def price_index(
+            self,
+            category_id: UUID,
+            start_date: date,
+            end_date: date,
+            granularity: Granularity,
+        ) -> List[Tuple[date, Decimal]]:
+        """
+        Average price of the category products per period of
+        `granularity`, weighted by priced days of every product.
+        Periods without prices are omitted
+        """
+        rows = self.filter(
+            category_id=category_id,
+            day__range=(start_date, end_date),
+            price_count__gt=0,
+        ).annotate(
+            period=Trunc('day', granularity.value, output_field=DateField()),
+        ).order_by('period').values('period').annotate(
+            total=Sum('price_total'),
+            count=Sum('price_count'),
+        ).values_list('period', 'total', 'count')
+        return [(period, total / count) for period, total, count in rows]
+
+    def apply_changes(self, changes: Iterable[RollupChange]) -> int:
+        """
+        Add price changes to the daily rollups of the categories, rows
+        of the changed days are locked until the end of the transaction.
+        Returns the number of updated rows
+        """
+        deltas = rollup_deltas(changes)
+        if not deltas:
+            return 0
+        spans: Dict[UUID, Tuple[date, date]] = dict()
+        for category_id, day in deltas:
+            first, last = spans.get(category_id, (day, day))
+            spans[category_id] = (min(first, day), max(last, day))
+
+        self.bulk_create(
+            [self.model(category_id=category_id, day=day) for category_id, day in deltas],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        rows = self.select_for_update().filter(
+            reduce(or_, (
+                Q(category_id=category_id, day__range=span)
+                for category_id, span in spans.items()
+            )),
+        ).order_by('category_id', 'day')
+        changed: List[Model] = list()
+        for row in rows:
+            delta = deltas.get((row.category_id, row.day))
+            if delta is None:
+                continue
+            row.price_total += delta[0]
+            row.price_count += delta[1]
+            changed.append(row)
+        self.bulk_update(
+            changed,
+            ['price_total', 'price_count'],
+            batch_size=BATCH_SIZE,
+        )
+        return len(changed)
+
+    def add_intervals(
+            self,
+            intervals: Iterable[Tuple[UUID | None, date, date, Decimal]],
+            sign: int = 1,
+        ) -> int:
+        """
+        Add (category_id, valid_from, valid_to, price) intervals
+        to the rollups, or take them away with `sign=-1`
+        """
+        return self.apply_changes(
+            (category_id, valid_from, valid_to, price * sign, sign)
+            for category_id, valid_from, valid_to, price in intervals
+            if category_id is not None
+        )
+
+    def move_intervals(
+            self,
+            intervals: Iterable[Tuple[date, date, Decimal]],
+            from_category_id: UUID | None,
+            to_category_id: UUID | None,
+        ) -> int:
+        """
+        Move (valid_from, valid_to, price) intervals of a product
+        from the rollups of one category to another, None to only
+        add or only take them away
+        """
+        changes: List[RollupChange] = list()
+        for valid_from, valid_to, price in intervals:
+            if from_category_id is not None:
+                changes.append((from_category_id, valid_from, valid_to, -price, -1))
+            if to_category_id is not None:
+                changes.append((to_category_id, valid_from, valid_to, price, 1))
+        return self.apply_changes(changes)
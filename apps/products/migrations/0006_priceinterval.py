@@ -0,0 +1,109 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:17
+
+import django.db.models.deletion
+import uuid
+from datetime import timedelta
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+ONE_DAY = timedelta(days=1)
+
+
+def collapse_price_items(apps, schema_editor):
+    """
+    Collapse runs of consecutive days with the same price into intervals
+    """
+    PriceItem = apps.get_model('products', 'PriceItem')
+    PriceInterval = apps.get_model('products', 'PriceInterval')
+
+    batch = list()
+    current = None
+    price_items = PriceItem.objects.order_by('product_id', 'date').values_list(
+        'product_id',
+        'date',
+        'price',
+    )
+    for product_id, date, price in price_items.iterator(chunk_size=BATCH_SIZE):
+        same_product = current is not None and current.product_id == product_id
+        if same_product and date <= current.valid_to:
+            # duplicated day, the first stored price wins
+            continue
+        if (
+            same_product
+            and current.price == price
+            and current.valid_to + ONE_DAY == date
+        ):
+            current.valid_to = date
+            continue
+        if current is not None:
+            batch.append(current)
+        current = PriceInterval(
+            product_id=product_id,
+            valid_from=date,
+            valid_to=date,
+            price=price,
+        )
+        if len(batch) >= BATCH_SIZE:
+            PriceInterval.objects.bulk_create(batch)
+            batch = list()
+    if current is not None:
+        batch.append(current)
+    PriceInterval.objects.bulk_create(batch)
+
+
+def expand_price_intervals(apps, schema_editor):
+    """
+    Restore one price item per day of every interval
+    """
+    PriceItem = apps.get_model('products', 'PriceItem')
+    PriceInterval = apps.get_model('products', 'PriceInterval')
+
+    batch = list()
+    for interval in PriceInterval.objects.iterator(chunk_size=BATCH_SIZE):
+        date = interval.valid_from
+        while date <= interval.valid_to:
+            batch.append(PriceItem(
+                product_id=interval.product_id,
+                date=date,
+                price=interval.price,
+            ))
+            date += ONE_DAY
+        if len(batch) >= BATCH_SIZE:
+            PriceItem.objects.bulk_create(batch)
+            batch = list()
+    PriceItem.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_description_product_sku'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceInterval',
+            fields=[
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('valid_from', models.DateField()),
+                ('valid_to', models.DateField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_intervals', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Price Interval',
+                'verbose_name_plural': 'Price Intervals',
+                'ordering': ['-valid_from'],
+            },
+        ),
+        migrations.RunPython(
+            collapse_price_items,
+            expand_price_intervals,
+        ),
+        migrations.DeleteModel(
+            name='PriceItem',
+        ),
+    ]
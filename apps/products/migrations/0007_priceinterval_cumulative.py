@@ -0,0 +1,58 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:19
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def fill_cumulative(apps, schema_editor):
+    PriceInterval = apps.get_model('products', 'PriceInterval')
+
+    batch = list()
+    product_id = None
+    total, days = Decimal(0), 0
+    intervals = PriceInterval.objects.order_by('product_id', 'valid_from')
+    for interval in intervals.iterator(chunk_size=BATCH_SIZE):
+        if interval.product_id != product_id:
+            product_id = interval.product_id
+            total, days = Decimal(0), 0
+        interval.cumulative_total = total
+        interval.cumulative_days = days
+        batch.append(interval)
+        interval_days = (interval.valid_to - interval.valid_from).days + 1
+        total += interval.price * interval_days
+        days += interval_days
+        if len(batch) >= BATCH_SIZE:
+            PriceInterval.objects.bulk_update(batch, ['cumulative_total', 'cumulative_days'])
+            batch = list()
+    PriceInterval.objects.bulk_update(batch, ['cumulative_total', 'cumulative_days'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_priceinterval'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='priceinterval',
+            name='cumulative_days',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='priceinterval',
+            name='cumulative_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=20),
+        ),
+        migrations.AddIndex(
+            model_name='priceinterval',
+            index=models.Index(fields=['product', 'valid_from'], name='priceinterval_product_from_idx'),
+        ),
+        migrations.RunPython(
+            fill_cumulative,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:23
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def remove_duplicates(apps, schema_editor):
+    """
+    Keep the latest updated interval of every (product, valid_from) pair
+    and recount running totals of the affected products
+    """
+    PriceInterval = apps.get_model('products', 'PriceInterval')
+
+    PriceInterval.objects.filter(valid_from__gt=F('valid_to')).delete()
+    duplicates = PriceInterval.objects.values('product_id', 'valid_from').annotate(
+        count=Count('id'),
+    ).filter(count__gt=1)
+
+    product_ids = set()
+    for duplicate in duplicates:
+        intervals = PriceInterval.objects.filter(
+            product_id=duplicate['product_id'],
+            valid_from=duplicate['valid_from'],
+        ).order_by(F('updated_at').desc(nulls_last=True))
+        PriceInterval.objects.filter(
+            pk__in=list(intervals.values_list('pk', flat=True)[1:]),
+        ).delete()
+        product_ids.add(duplicate['product_id'])
+
+    for product_id in product_ids:
+        total, days = Decimal(0), 0
+        intervals = list(PriceInterval.objects.filter(product_id=product_id).order_by('valid_from'))
+        for interval in intervals:
+            interval.cumulative_total = total
+            interval.cumulative_days = days
+            interval_days = (interval.valid_to - interval.valid_from).days + 1
+            total += interval.price * interval_days
+            days += interval_days
+        PriceInterval.objects.bulk_update(intervals, ['cumulative_total', 'cumulative_days'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_priceinterval_cumulative'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicates,
+            migrations.RunPython.noop,
+        ),
+        migrations.RemoveIndex(
+            model_name='priceinterval',
+            name='priceinterval_product_from_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='priceinterval',
+            constraint=models.UniqueConstraint(fields=('product', 'valid_from'), name='priceinterval_product_from_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='priceinterval',
+            constraint=models.CheckConstraint(check=models.Q(('valid_from__lte', models.F('valid_to'))), name='priceinterval_from_before_to'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:25
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+UNIQUE_CONSTRAINT = 'priceinterval_product_from_unique'
+
+
+def cover_unique_constraint(apps, schema_editor):
+    """
+    Let the (product, valid_from) index answer average price
+    lookups without reading the table, PostgreSQL only
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'ALTER TABLE products_priceinterval DROP CONSTRAINT {UNIQUE_CONSTRAINT}, '
+        f'ADD CONSTRAINT {UNIQUE_CONSTRAINT} UNIQUE (product_id, valid_from) '
+        f'INCLUDE (valid_to, price, cumulative_total, cumulative_days)'
+    )
+
+
+def uncover_unique_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'ALTER TABLE products_priceinterval DROP CONSTRAINT {UNIQUE_CONSTRAINT}, '
+        f'ADD CONSTRAINT {UNIQUE_CONSTRAINT} UNIQUE (product_id, valid_from)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_priceinterval_unique_product_from'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='priceinterval',
+            name='id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='priceinterval',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='price_intervals', to='products.product'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AddIndex(
+            model_name='priceinterval',
+            index=models.Index(fields=['product', 'valid_to'], include=('valid_from', 'price'), name='priceinterval_product_to_idx'),
+        ),
+        migrations.RunPython(
+            cover_unique_constraint,
+            uncover_unique_constraint,
+        ),
+    ]
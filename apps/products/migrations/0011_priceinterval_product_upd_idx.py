@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_product_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='priceinterval',
+            index=models.Index(fields=['product', 'updated_at'], name='priceinterval_product_upd_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_priceinterval_product_upd_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='current_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='current_price_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='previous_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=7, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['current_price', 'id'], name='product_current_price_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:58
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_product_current_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryPriceRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('price_count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='price_rollups', to='products.category')),
+            ],
+            options={
+                'verbose_name': 'Category Price Rollup',
+                'verbose_name_plural': 'Category Price Rollups',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='categorypricerollup',
+            constraint=models.UniqueConstraint(fields=('category', 'day'), name='categorypricerollup_category_day_unique'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.0.3 on 2026-10-18 20:11
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import F
+
+
+def date_deactivations(apps, schema_editor):
+    """
+    Products soft-deleted before the column existed
+    count as deactivated at their last update
+    """
+    Product = apps.get_model('products', 'Product')
+    Product.objects.filter(is_active=False).update(deactivated_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_categorypricerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPriceInterval',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('valid_from', models.DateField()),
+                ('valid_to', models.DateField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('cumulative_total', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('cumulative_days', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(null=True)),
+                ('updated_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Price Interval',
+                'verbose_name_plural': 'Archived Price Intervals',
+                'ordering': ['-valid_from'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedProduct',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('sku', models.CharField(blank=True, max_length=50)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(null=True)),
+                ('updated_at', models.DateTimeField(null=True)),
+                ('deactivated_at', models.DateTimeField(null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Product',
+                'verbose_name_plural': 'Archived Products',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_created_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_current_price_idx',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='deactivated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(
+            date_deactivations,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='product_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'created_at', 'id'], name='product_active_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['current_price', 'id'], name='product_active_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deactivated_at'], name='product_inactive_since_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedproduct',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_products', to='products.category'),
+        ),
+        migrations.AddField(
+            model_name='archivedpriceinterval',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_intervals', to='products.archivedproduct'),
+        ),
+    ]
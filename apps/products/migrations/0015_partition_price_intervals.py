@@ -0,0 +1,112 @@
+# Generated by Django 5.0.3 on 2026-10-18 20:22
+
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+TABLE = 'products_priceinterval'
+OLD_TABLE = f'{TABLE}_unpartitioned'
+UNIQUE_CONSTRAINT = 'priceinterval_product_from_unique'
+
+
+def partition_of(day, period):
+    if period == 'year':
+        return f'{TABLE}_p{day.year}', date(day.year, 1, 1), date(day.year + 1, 1, 1)
+    start = day.replace(day=1)
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return f'{TABLE}_p{start.year}_{start.month:02d}', start, end
+
+
+def copy_table(schema_editor, partition_by=''):
+    """
+    Recreate the table from a renamed copy, the constraints and
+    indexes of migrations 0008-0011 are added after the rows
+    """
+    schema_editor.execute(f'ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}')
+    schema_editor.execute(
+        f'CREATE TABLE {TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) {partition_by}'
+    )
+
+
+def add_constraints(schema_editor, primary_key):
+    schema_editor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY ({primary_key})')
+    schema_editor.execute(
+        f'ALTER TABLE {TABLE} ADD CONSTRAINT {UNIQUE_CONSTRAINT} UNIQUE (product_id, valid_from) '
+        f'INCLUDE (valid_to, price, cumulative_total, cumulative_days)'
+    )
+    schema_editor.execute(
+        f'ALTER TABLE {TABLE} ADD CONSTRAINT priceinterval_product_id_fk FOREIGN KEY (product_id) '
+        f'REFERENCES products_product (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    schema_editor.execute(
+        f'CREATE INDEX priceinterval_product_to_idx ON {TABLE} (product_id, valid_to) '
+        f'INCLUDE (valid_from, price)'
+    )
+    schema_editor.execute(
+        f'CREATE INDEX priceinterval_product_upd_idx ON {TABLE} (product_id, updated_at)'
+    )
+
+
+def partition_table(apps, schema_editor):
+    """
+    Partition the price intervals by range of `valid_from` per
+    `PRICE_PARTITION_PERIOD`, up to the period after the current one.
+    Partitioned tables need the partition key in the primary key.
+    PostgreSQL only, see `products.partitions`
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    copy_table(schema_editor, 'PARTITION BY RANGE (valid_from)')
+    schema_editor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN(valid_from) FROM {OLD_TABLE}')
+        first = cursor.fetchone()[0]
+    today = timezone.localdate()
+    _, _, last = partition_of(today, settings.PRICE_PARTITION_PERIOD)
+    day = min(first or today, today)
+    while day <= last:
+        table, start, end = partition_of(day, settings.PRICE_PARTITION_PERIOD)
+        schema_editor.execute(
+            f"CREATE TABLE {table} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        day = end
+
+    schema_editor.execute(f'INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}')
+    schema_editor.execute(f'DROP TABLE {OLD_TABLE}')
+    add_constraints(schema_editor, 'id, valid_from')
+
+
+def unpartition_table(apps, schema_editor):
+    """
+    Rows of detached partitions stay in their tables
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    copy_table(schema_editor)
+    schema_editor.execute(f'INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}')
+    schema_editor.execute(f'DROP TABLE {OLD_TABLE} CASCADE')
+    add_constraints(schema_editor, 'id')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_product_partial_indexes_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='cold_prices_until',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(
+            partition_table,
+            unpartition_table,
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.3 on 2026-10-18 20:28
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_partition_price_intervals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedproduct',
+            name='aggregated_until',
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='aggregated_until',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='PriceAggregate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('granularity', models.CharField(choices=[('week', 'week'), ('month', 'month'), ('quarter', 'quarter')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('price_total', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('days', models.PositiveIntegerField()),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='price_aggregates', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Price Aggregate',
+                'verbose_name_plural': 'Price Aggregates',
+                'ordering': ['-period_start'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='priceaggregate',
+            constraint=models.UniqueConstraint(fields=('product', 'period_start'), name='priceaggregate_product_start_unique'),
+        ),
+    ]
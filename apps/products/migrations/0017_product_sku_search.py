@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 20:33
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_price_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.functions.text.Upper('sku'), name='product_sku_upper_idx'),
+        ),
+    ]
@@ -1,9 +1,43 @@
-from django.db import models
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import (
+    Any,
+    Iterable,
+    Tuple,
+)
+from django.core.exceptions import ValidationError
+from django.db import (
+    models,
+    transaction,
+)
+from django.db.models.functions import Upper
 from common.mixins.models import (
     UUIDModel,
     TimeStampModel,
     BaseModel,
 )
+from .managers import (
+    CategoryPriceRollupManager,
+    Granularity,
+    PriceIntervalManager,
+)
+
+
+class ErrorMessages(str, Enum):
+    DATE_ERROR = 'End of the interval must be after its start'
+    OVERLAP_ERROR = 'Interval overlaps another price interval of the product'
+    COLD_ERROR = 'Prices before {date} are detached or downsampled and can not be changed'
+
+
+PRICE_BOUNDARY_FIELDS = ('cold_prices_until', 'aggregated_until')
+
+
+def rollup_category(category_id: Any, is_active: bool) -> Any:
+    """
+    Category whose rollups include prices of the product
+    """
+    return category_id if is_active else None
 
 
 class Category(
@@ -22,9 +56,9 @@ class Category(
 
 class Product(BaseModel):
     name = models.CharField(max_length=255)
+    # unique unless blank, see `product_sku_unique`
     sku = models.CharField(
         max_length=50,
-        unique=True,
         blank=True,
     )
     description = models.TextField(
@@ -38,20 +72,143 @@ class Product(BaseModel):
         related_name='products',
         on_delete=models.SET_NULL,
     )
+    # denormalized from the price intervals by
+    # `PriceIntervalManager.refresh_current_prices`
+    current_price = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    current_price_date = models.DateField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    previous_price = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    # prices of earlier days are in detached partitions
+    # of the price intervals, see `products.partitions`
+    cold_prices_until = models.DateField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    # prices of earlier days are only kept as
+    # `PriceAggregate` rows, see `products.retention`
+    aggregated_until = models.DateField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
+        # partial indexes cover only the rows `active_objects`
+        # reads, backends without them skip these indexes
+        indexes = [
+            models.Index(
+                fields=['created_at', 'id'],
+                name='product_active_created_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['category', 'created_at', 'id'],
+                name='product_active_category_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['current_price', 'id'],
+                name='product_active_price_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # candidates of `archive_products`
+            models.Index(
+                fields=['deactivated_at'],
+                name='product_inactive_since_idx',
+                condition=models.Q(is_active=False),
+            ),
+            # case insensitive sku search of the admin
+            models.Index(
+                Upper('sku'),
+                name='product_sku_upper_idx',
+            ),
+        ]
+        constraints = [
+            # products without a sku do not collide
+            models.UniqueConstraint(
+                fields=['sku'],
+                name='product_sku_unique',
+                condition=~models.Q(sku=''),
+                violation_error_message='Product with this Sku already exists.',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs) -> None:
+        """
+        Prices of the product move between category rollups when it
+        changes category, is soft-deleted or restored, in the
+        transaction of the save
+        """
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # only `detach_partition` and `downsample_prices` move these,
+        # saving a stale instance must not hide detached or downsampled prices
+        if kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in PRICE_BOUNDARY_FIELDS
+            ]
+        if not {'category', 'category_id', 'is_active'} & set(kwargs['update_fields']):
+            super().save(*args, **kwargs)
+            return
+        # the partitions module imports the models
+        from .partitions import price_rows
+        with transaction.atomic():
+            # concurrent saves of the product wait until the prices are moved
+            saved = Product.objects.select_for_update().filter(
+                pk=self.pk,
+            ).values_list('category_id', 'is_active').first()
+            super().save(*args, **kwargs)
+            from_category_id = rollup_category(*saved) if saved else None
+            to_category_id = rollup_category(self.category_id, self.is_active)
+            if from_category_id != to_category_id:
+                CategoryPriceRollup.objects.move_intervals(
+                    price_rows(self),
+                    from_category_id,
+                    to_category_id,
+                )
+
+    @classmethod
+    def restore_archived(cls, pks: Iterable[Any]) -> int:
+        # the archive module imports the models
+        from .archive import restore_products
+        return restore_products(pks)
 
-class PriceItem(
+
+class PriceInterval(
         UUIDModel,
         TimeStampModel
     ):
-    date = models.DateField()
+    """
+    Price of the product for every day of the
+    `valid_from`..`valid_to` range (both inclusive).
+    `cumulative_*` fields hold running totals of all
+    earlier intervals of the product
+    """
+    valid_from = models.DateField()
+    valid_to = models.DateField()
     price = models.DecimalField(
         max_digits=7,
         decimal_places=2,
@@ -59,13 +216,247 @@ class PriceItem(
     product = models.ForeignKey(
         to=Product,
         on_delete=models.CASCADE,
-        related_name='price_items',
+        related_name='price_intervals',
+        db_index=False,
+    )
+    cumulative_total = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+        editable=False,
+    )
+    cumulative_days = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+
+    objects = PriceIntervalManager()
+
+    class Meta:
+        verbose_name = 'Price Interval'
+        verbose_name_plural = 'Price Intervals'
+        ordering = ['-valid_from']
+        # both composite indexes lead with `product`, so the
+        # foreign key does not need an index of its own.
+        # On PostgreSQL the unique constraint also covers the
+        # read columns, see migration 0009
+        indexes = [
+            models.Index(
+                fields=['product', 'valid_to'],
+                include=['valid_from', 'price'],
+                name='priceinterval_product_to_idx',
+            ),
+            # ETag of the product prices
+            models.Index(
+                fields=['product', 'updated_at'],
+                name='priceinterval_product_upd_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'valid_from'],
+                name='priceinterval_product_from_unique',
+            ),
+            models.CheckConstraint(
+                check=models.Q(valid_from__lte=models.F('valid_to')),
+                name='priceinterval_from_before_to',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.product} - {self.price} ({self.valid_from} - {self.valid_to})'
+
+    @property
+    def days(self) -> int:
+        return (self.valid_to - self.valid_from).days + 1
+
+    def cumulative_at(self, day: date) -> Tuple[Decimal, int]:
+        """
+        Running totals of the product up to `day` (inclusive),
+        `day` should not be before the start of the interval
+        """
+        covered_days = (min(day, self.valid_to) - self.valid_from).days + 1
+        return (
+            self.cumulative_total + self.price * covered_days,
+            self.cumulative_days + covered_days,
+        )
+
+    def clean(self) -> None:
+        if self.valid_from and self.valid_to:
+            if self.valid_from > self.valid_to:
+                raise ValidationError(ErrorMessages.DATE_ERROR.value)
+            boundaries = Product.objects.filter(
+                pk=self.product_id,
+            ).values_list(*PRICE_BOUNDARY_FIELDS).first() or ()
+            read_only_until = max(filter(None, boundaries), default=None)
+            if read_only_until and self.valid_from < read_only_until:
+                raise ValidationError(ErrorMessages.COLD_ERROR.value.format(date=read_only_until))
+            overlapping = PriceInterval.objects.filter(
+                product_id=self.product_id,
+            ).overlapping(
+                self.valid_from,
+                self.valid_to,
+            ).exclude(pk=self.pk)
+            if overlapping.exists():
+                raise ValidationError(ErrorMessages.OVERLAP_ERROR.value)
+
+
+class CategoryPriceRollup(UUIDModel):
+    """
+    Sum and number of the prices of the active products
+    of the category on `day`, kept in step with the price
+    intervals by `PriceIntervalManager`
+    """
+    category = models.ForeignKey(
+        to=Category,
+        on_delete=models.CASCADE,
+        related_name='price_rollups',
+        db_index=False,
+    )
+    day = models.DateField()
+    price_total = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+    )
+    price_count = models.PositiveIntegerField(default=0)
+
+    objects = CategoryPriceRollupManager()
+
+    class Meta:
+        verbose_name = 'Category Price Rollup'
+        verbose_name_plural = 'Category Price Rollups'
+        # also the index of the category time series
+        constraints = [
+            models.UniqueConstraint(
+                fields=['category', 'day'],
+                name='categorypricerollup_category_day_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.category} - {self.day}'
+
+
+class ArchivedProduct(UUIDModel):
+    """
+    Long-inactive product moved out of the `Product`
+    table with its price intervals by `archive_products`.
+    `Product.restore` brings it back
+    """
+    name = models.CharField(max_length=255)
+    sku = models.CharField(
+        max_length=50,
+        blank=True,
+    )
+    description = models.TextField(
+        blank=True,
+        null=True
+    )
+    category = models.ForeignKey(
+        to=Category,
+        blank=True,
+        null=True,
+        related_name='archived_products',
+        on_delete=models.SET_NULL,
+    )
+    created_at = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(null=True)
+    deactivated_at = models.DateTimeField(null=True)
+    aggregated_until = models.DateField(null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Archived Product'
+        verbose_name_plural = 'Archived Products'
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class ArchivedPriceInterval(UUIDModel):
+    """
+    Price interval of an archived product
+    """
+    product = models.ForeignKey(
+        to=ArchivedProduct,
+        on_delete=models.CASCADE,
+        related_name='price_intervals',
+    )
+    valid_from = models.DateField()
+    valid_to = models.DateField()
+    price = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+    )
+    cumulative_total = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+    )
+    cumulative_days = models.PositiveIntegerField()
+    created_at = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name = 'Archived Price Interval'
+        verbose_name_plural = 'Archived Price Intervals'
+        ordering = ['-valid_from']
+
+    def __str__(self) -> str:
+        return f'{self.product} - {self.price} ({self.valid_from} - {self.valid_to})'
+
+
+class PriceAggregate(UUIDModel):
+    """
+    Prices of the product over the `period_start`..`period_end`
+    range (both inclusive) after `downsample_prices` replaced its
+    intervals. `days` counts the priced days, `price_total` is the
+    sum of their prices, so averages merge exactly with intervals
+    """
+    # aggregates outlive products moved into the archive,
+    # restoring the product brings them back
+    product = models.ForeignKey(
+        to=Product,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='price_aggregates',
+        db_index=False,
+    )
+    granularity = models.CharField(
+        max_length=10,
+        choices=[(item.value, item.value) for item in Granularity if item != Granularity.DAY],
     )
+    period_start = models.DateField()
+    period_end = models.DateField()
+    price_total = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+    )
+    days = models.PositiveIntegerField()
+    min_price = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+    )
+    max_price = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        verbose_name = 'Price Item'
-        verbose_name_plural = 'Price Items'
-        ordering = ['-date']
+        verbose_name = 'Price Aggregate'
+        verbose_name_plural = 'Price Aggregates'
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'period_start'],
+                name='priceaggregate_product_start_unique',
+            ),
+        ]
 
     def __str__(self) -> str:
-        return f'{self.product} - {self.price} - {self.price}'
+        return f'{self.product_id} - {self.average_price} ({self.period_start} - {self.period_end})'
+
+    @property
+    def average_price(self) -> Decimal:
+        return self.price_total / self.days
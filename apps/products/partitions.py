@@ -0,0 +1,604 @@
+"""
+Time partitions of the price intervals by `valid_from`, per
+month or year (`PRICE_PARTITION_PERIOD`).
+
+On PostgreSQL the table is partitioned natively (see migration
+0015), with a default partition for days without one. Elsewhere
+the live table stays whole and only detached partitions get
+tables of their own, named the same way.
+
+Detaching a partition moves every interval starting before its
+end out of the live table, intervals running over the end are
+split first. Running totals of what stays are rebased, so reads
+of later days never touch the detached tables.
+`Product.cold_prices_until` marks the products whose earlier prices
+were detached: reads starting before it add the detached tables,
+writes starting before it are refused
+"""
+import re
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Tuple,
+    Type,
+)
+from uuid import UUID
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import (
+    connection,
+    models,
+    transaction,
+)
+from django.db.models import (
+    Model,
+    QuerySet,
+)
+from django.utils import timezone
+
+from common.cache import bump_generation
+from .managers import (
+    BATCH_SIZE,
+    CHUNK_SIZE,
+    ONE_DAY,
+    Granularity,
+    PriceIntervalManager,
+    average_between,
+    next_period,
+)
+from .models import (
+    Product,
+    PriceInterval,
+)
+
+
+LIVE_TABLE = PriceInterval._meta.db_table
+PARTITION_PATTERN = re.compile(rf'^{LIVE_TABLE}_p(\d{{4}})(?:_(\d{{2}}))?$')
+INTERVAL_COLUMNS = [field.column for field in PriceInterval._meta.concrete_fields]
+
+IntervalRow = Tuple[date, date, Decimal]
+
+
+class Period(str, Enum):
+    MONTH = 'month'
+    YEAR = 'year'
+
+
+class Partition(NamedTuple):
+    table: str
+    start: date
+    end: date
+
+
+class DetachResult(NamedTuple):
+    partition: Partition
+    products: int
+    price_intervals: int
+
+
+def partition_period() -> Period:
+    return Period(settings.PRICE_PARTITION_PERIOD)
+
+
+def partition_of(day: date, period: Period) -> Partition:
+    """
+    Partition of `period` holding intervals starting on `day`
+    """
+    if period == Period.YEAR:
+        start = date(day.year, 1, 1)
+        return Partition(f'{LIVE_TABLE}_p{start.year}', start, date(day.year + 1, 1, 1))
+    start = day.replace(day=1)
+    return Partition(
+        f'{LIVE_TABLE}_p{start.year}_{start.month:02d}',
+        start,
+        next_period(start, Granularity.MONTH),
+    )
+
+
+def parse_partition(table: str) -> Partition | None:
+    """
+    Partition of a table named by `partition_of`
+    """
+    match = PARTITION_PATTERN.match(table)
+    if match is None:
+        return None
+    year, month = match.groups()
+    if month is None:
+        return partition_of(date(int(year), 1, 1), Period.YEAR)
+    return partition_of(date(int(year), int(month), 1), Period.MONTH)
+
+
+class Partitions:
+    """
+    Partitions of a live table without native partitioning:
+    detached partitions are tables of their own, the live
+    table holds every period that has not been detached
+    """
+    def __init__(self, connection: Any) -> None:
+        self.connection = connection
+
+    def quote(self, name: str) -> str:
+        return self.connection.ops.quote_name(name)
+
+    def tables(self) -> List[Partition]:
+        """
+        Attached and detached partitions, oldest first
+        """
+        with self.connection.cursor() as cursor:
+            names = self.connection.introspection.table_names(cursor)
+        return sorted(
+            partition for partition in map(parse_partition, names)
+            if partition is not None
+        )
+
+    def attached(self) -> List[Partition]:
+        return []
+
+    def detached(self) -> List[Partition]:
+        attached = set(self.attached())
+        return [partition for partition in self.tables() if partition not in attached]
+
+    def create(self, partition: Partition) -> bool:
+        """
+        Create an attached partition, returns
+        False if the backend has none
+        """
+        return False
+
+    def create_detached(self, partition: Partition) -> None:
+        """
+        Empty table with the columns of the live table
+        """
+        table = self.quote(partition.table)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE {table} AS SELECT * FROM {self.quote(LIVE_TABLE)} WHERE 1 = 0')
+            cursor.execute(
+                f'CREATE INDEX {self.quote(partition.table + "_product_idx")} '
+                f'ON {table} ({self.quote("product_id")}, {self.quote("valid_from")})'
+            )
+
+    def detach(self, partition: Partition) -> int:
+        """
+        Move intervals starting before the end of the partition
+        from the live table into the partition table,
+        returns the number of moved intervals
+        """
+        if partition.table not in {table for table, _, _ in self.tables()}:
+            self.create_detached(partition)
+        columns = ', '.join(map(self.quote, INTERVAL_COLUMNS))
+        condition = f'{self.quote("valid_from")} < %s'
+        end = self.connection.ops.adapt_datefield_value(partition.end)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.quote(partition.table)} ({columns}) '
+                f'SELECT {columns} FROM {self.quote(LIVE_TABLE)} WHERE {condition}',
+                [end],
+            )
+            cursor.execute(f'DELETE FROM {self.quote(LIVE_TABLE)} WHERE {condition}', [end])
+            return cursor.rowcount
+
+
+class NativePartitions(Partitions):
+    """
+    Partitions of a PostgreSQL table partitioned by range of
+    `valid_from`, detaching a partition keeps its table
+    """
+    DEFAULT_TABLE = f'{LIVE_TABLE}_default'
+
+    def attached(self) -> List[Partition]:
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT child.relname FROM pg_inherits '
+                'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+                'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+                'WHERE parent.relname = %s',
+                [LIVE_TABLE],
+            )
+            names = [name for name, in cursor.fetchall()]
+        return sorted(
+            partition for partition in map(parse_partition, names)
+            if partition is not None
+        )
+
+    def create(self, partition: Partition) -> bool:
+        if partition.table in {table for table, _, _ in self.tables()}:
+            return False
+        live, default, table = map(self.quote, (LIVE_TABLE, self.DEFAULT_TABLE, partition.table))
+        bounds = f"FROM ('{partition.start.isoformat()}') TO ('{partition.end.isoformat()}')"
+        condition = 'valid_from >= %s AND valid_from < %s'
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {default} WHERE {condition})',
+                [partition.start, partition.end],
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(f'CREATE TABLE {table} PARTITION OF {live} FOR VALUES {bounds}')
+                return True
+            # the default partition may not hold rows of a new partition
+            cursor.execute(f'ALTER TABLE {live} DETACH PARTITION {default}')
+            cursor.execute(f'CREATE TABLE {table} PARTITION OF {live} FOR VALUES {bounds}')
+            cursor.execute(
+                f'INSERT INTO {table} SELECT * FROM {default} WHERE {condition}',
+                [partition.start, partition.end],
+            )
+            cursor.execute(
+                f'DELETE FROM {default} WHERE {condition}',
+                [partition.start, partition.end],
+            )
+            cursor.execute(f'ALTER TABLE {live} ATTACH PARTITION {default} DEFAULT')
+        return True
+
+    def detach(self, partition: Partition) -> int:
+        if partition in self.attached():
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f'ALTER TABLE {self.quote(LIVE_TABLE)} '
+                    f'DETACH PARTITION {self.quote(partition.table)}'
+                )
+                cursor.execute(f'SELECT COUNT(*) FROM {self.quote(partition.table)}')
+                moved = cursor.fetchone()[0]
+                # products stay deletable, detached rows are not cascaded
+                constraints = self.connection.introspection.get_constraints(cursor, partition.table)
+                for name, constraint in constraints.items():
+                    if constraint['foreign_key']:
+                        cursor.execute(
+                            f'ALTER TABLE {self.quote(partition.table)} '
+                            f'DROP CONSTRAINT {self.quote(name)}'
+                        )
+            # rows of the period left in the default partition
+            return moved + super().detach(partition)
+        return super().detach(partition)
+
+
+def get_partitions() -> Partitions:
+    if connection.vendor == 'postgresql':
+        return NativePartitions(connection)
+    return Partitions(connection)
+
+
+COLD_APPS = Apps()
+_cold_models: Dict[str, Type[Model]] = dict()
+
+
+def cold_model(table: str) -> Type[Model]:
+    """
+    Unmanaged model of a detached partition, with the fields and
+    queryset methods of the price intervals. Products are referenced
+    by id only, detached rows are not part of the relations
+    """
+    model = _cold_models.get(table)
+    if model is None:
+        attrs: Dict[str, Any] = {
+            '__module__': __name__,
+            'Meta': type('Meta', (), {
+                'app_label': PriceInterval._meta.app_label,
+                'apps': COLD_APPS,
+                'db_table': table,
+                'managed': False,
+                'ordering': PriceInterval._meta.ordering,
+            }),
+            'objects': PriceIntervalManager(),
+            'product_id': models.UUIDField(),
+            'days': PriceInterval.days,
+            'cumulative_at': PriceInterval.cumulative_at,
+        }
+        for field in PriceInterval._meta.concrete_fields:
+            if field.name != 'product':
+                attrs[field.name] = field.clone()
+        model = type(f'ColdPriceInterval_{table[len(LIVE_TABLE) + 1:]}', (Model,), attrs)
+        _cold_models[table] = model
+    return model
+
+
+def reads_cold(product: Product, start_date: date) -> bool:
+    """
+    Whether prices of the product from `start_date`
+    on are partly in detached partitions
+    """
+    return product.cold_prices_until is not None and start_date < product.cold_prices_until
+
+
+def cold_querysets(product: Product, start_date: date) -> List[QuerySet]:
+    """
+    Intervals of the product in the detached partitions that
+    may hold its prices from `start_date` on, newest first
+    """
+    if not reads_cold(product, start_date):
+        return []
+    return [
+        cold_model(partition.table).objects.filter(product_id=product.pk)
+        for partition in reversed(get_partitions().detached())
+        if start_date < partition.end <= product.cold_prices_until
+    ]
+
+
+def cold_intervals(product_ids: Iterable[UUID] | QuerySet) -> List[QuerySet]:
+    """
+    Intervals of the products in every detached partition
+    """
+    return [
+        cold_model(partition.table).objects.filter(product_id__in=product_ids)
+        for partition in get_partitions().detached()
+    ]
+
+
+def price_rows(product: Product) -> List[IntervalRow]:
+    """
+    (valid_from, valid_to, price) of every interval of
+    the product, detached partitions included
+    """
+    # instances of signal receivers may predate the last detach
+    product = Product(
+        pk=product.pk,
+        cold_prices_until=Product.objects.filter(
+            pk=product.pk,
+        ).values_list('cold_prices_until', flat=True).first(),
+    )
+    querysets = [PriceInterval.objects.filter(product=product)] + cold_querysets(product, date.min)
+    return [
+        row
+        for queryset in querysets
+        for row in queryset.values_list('valid_from', 'valid_to', 'price')
+    ]
+
+
+def interval_rows(
+        product: Product,
+        start_date: date,
+        end_date: date,
+    ) -> List[IntervalRow]:
+    """
+    (valid_from, valid_to, price) of the product intervals within
+    the `start_date`..`end_date` range, in order of `valid_from`
+    """
+    querysets = [PriceInterval.objects.filter(product=product)] + cold_querysets(product, start_date)
+    return sorted(
+        row
+        for queryset in querysets
+        for row in queryset.overlapping(start_date, end_date).values_list(
+            'valid_from',
+            'valid_to',
+            'price',
+        )
+    )
+
+
+def history_rows(
+        product: Product,
+        from_date: date | None,
+        to_date: date | None,
+        before: date | None,
+        limit: int,
+    ) -> List[IntervalRow]:
+    """
+    Up to `limit` intervals of the product, latest first, detached
+    partitions are read only when the live ones do not fill the page
+    """
+    querysets = [PriceInterval.objects.filter(product=product)]
+    querysets += cold_querysets(product, from_date or date.min)
+    rows: List[IntervalRow] = list()
+    for intervals in querysets:
+        if len(rows) >= limit:
+            break
+        if from_date:
+            intervals = intervals.filter(valid_to__gte=from_date)
+        if to_date:
+            intervals = intervals.filter(valid_from__lte=to_date)
+        if before:
+            intervals = intervals.filter(valid_from__lt=before)
+        rows.extend(intervals.order_by('-valid_from').values_list(
+            'valid_from',
+            'valid_to',
+            'price',
+        )[:limit - len(rows)])
+    return rows
+
+
+def price_since(
+        product: Product,
+        price: Decimal,
+        start: date,
+    ) -> Tuple[date, Decimal | None]:
+    """
+    Date the price of the product running from `start`, the end
+    of its detached partitions, took effect and the price before it.
+    Detaching splits the interval running over the end, detached
+    intervals of the same price are followed back
+    """
+    for intervals in cold_querysets(product, date.min):
+        rows = intervals.filter(valid_to__lt=start).order_by('-valid_from').values_list(
+            'valid_from',
+            'valid_to',
+            'price',
+        )
+        for valid_from, valid_to, interval_price in rows.iterator(chunk_size=BATCH_SIZE):
+            if valid_to + ONE_DAY != start:
+                return start, None
+            if interval_price != price:
+                return start, interval_price
+            start = valid_from
+    return start, None
+
+
+PriceTotals = Tuple[Decimal, int]
+
+
+def price_totals(
+        product: Product,
+        start_date: date,
+        end_date: date,
+    ) -> PriceTotals:
+    """
+    Sum of prices and number of priced days of the product within
+    the `start_date`..`end_date` range, from two running total lookups
+    of the live table and of every detached partition with its prices
+    """
+    querysets = [PriceInterval.objects.filter(product=product)] + cold_querysets(product, start_date)
+    total, days = Decimal(0), 0
+    for queryset in querysets:
+        total_before, days_before = queryset.cumulative_at(start_date - ONE_DAY)
+        total_at_end, days_at_end = queryset.cumulative_at(end_date)
+        total += total_at_end - total_before
+        days += days_at_end - days_before
+    return total, days
+
+
+def average_price(
+        product: Product,
+        start_date: date,
+        end_date: date,
+    ) -> Decimal | None:
+    """
+    `cumulative_average_price` of the product, detached partitions
+    add their running totals to the ones of the live table
+    """
+    return average_between((Decimal(0), 0), price_totals(product, start_date, end_date))
+
+
+def price_totals_many(
+        products: Iterable[Tuple[UUID, date | None]],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[UUID, PriceTotals]:
+    """
+    `price_totals` of (id, cold_prices_until) products, the detached
+    partitions are read only for products with prices in them
+    """
+    products = list(products)
+    product_ids = [product_id for product_id, _ in products]
+    cold_ids = [
+        product_id for product_id, cold_prices_until in products
+        if cold_prices_until is not None and start_date < cold_prices_until
+    ]
+    querysets: List[Tuple[QuerySet, List[UUID]]] = [(PriceInterval.objects.all(), product_ids)]
+    if cold_ids:
+        querysets += [
+            (cold_model(partition.table).objects.all(), cold_ids)
+            for partition in get_partitions().detached()
+            if start_date < partition.end
+        ]
+
+    totals: Dict[UUID, PriceTotals] = {product_id: (Decimal(0), 0) for product_id in product_ids}
+    for queryset, ids in querysets:
+        for sign, day in ((-1, start_date - ONE_DAY), (1, end_date)):
+            for product_id, (total, days) in queryset.cumulative_at_many(ids, day).items():
+                totals[product_id] = (
+                    totals[product_id][0] + sign * total,
+                    totals[product_id][1] + sign * days,
+                )
+    return totals
+
+
+def average_prices(
+        products: Iterable[Tuple[UUID, date | None]],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[UUID, Decimal | None]:
+    """
+    `cumulative_average_prices` of (id, cold_prices_until) products
+    """
+    return {
+        product_id: average_between((Decimal(0), 0), totals)
+        for product_id, totals in price_totals_many(products, start_date, end_date).items()
+    }
+
+
+def create_partitions(ahead: int, day: date | None = None) -> List[Partition]:
+    """
+    Create the partition of `day` (today by default) and
+    `ahead` following ones, returns the created partitions
+    """
+    period = partition_period()
+    partition = partition_of(day or timezone.localdate(), period)
+    backend = get_partitions()
+    created: List[Partition] = list()
+    for _ in range(ahead + 1):
+        with transaction.atomic():
+            if backend.create(partition):
+                created.append(partition)
+        partition = partition_of(partition.end, period)
+    return created
+
+
+def detach_partition(
+        partition: Partition,
+        backend: Partitions | None = None,
+    ) -> DetachResult:
+    """
+    Move intervals starting before the end of the partition
+    out of the live table, in one transaction
+    """
+    backend = backend or get_partitions()
+    end = partition.end
+    with transaction.atomic():
+        # set_prices of the same products waits for the detach
+        product_ids = list(Product.objects.select_for_update().filter(
+            id__in=PriceInterval.objects.filter(valid_from__lt=end).values('product_id'),
+        ).order_by('id').values_list('id', flat=True))
+        # where current prices took effect is seen before their intervals are split
+        PriceInterval.objects.refresh_current_prices(product_ids)
+
+        now = timezone.now()
+        crossing = list(PriceInterval.objects.filter(valid_from__lt=end, valid_to__gte=end))
+        PriceInterval.objects.bulk_create([
+            PriceInterval(
+                product_id=interval.product_id,
+                valid_from=end,
+                valid_to=interval.valid_to,
+                price=interval.price,
+                cumulative_total=interval.cumulative_at(end - ONE_DAY)[0],
+                cumulative_days=interval.cumulative_at(end - ONE_DAY)[1],
+            )
+            for interval in crossing
+        ], batch_size=BATCH_SIZE)
+        for interval in crossing:
+            interval.valid_to = end - ONE_DAY
+            interval.updated_at = now
+        PriceInterval.objects.bulk_update(crossing, ['valid_to', 'updated_at'], batch_size=BATCH_SIZE)
+
+        totals: Dict[UUID, Tuple[Decimal, int]] = dict()
+        for offset in range(0, len(product_ids), CHUNK_SIZE):
+            totals.update(PriceInterval.objects.cumulative_at_many(
+                product_ids[offset:offset + CHUNK_SIZE],
+                end - ONE_DAY,
+            ))
+        moved = backend.detach(partition)
+
+        # running totals of the live table restart at the end of the partition
+        for offset in range(0, len(product_ids), CHUNK_SIZE):
+            chunk = product_ids[offset:offset + CHUNK_SIZE]
+            PriceInterval.objects._shift_cumulative({
+                product_id: (end - ONE_DAY, -totals[product_id][0], -totals[product_id][1])
+                for product_id in chunk
+            })
+            Product.objects.filter(id__in=chunk).update(cold_prices_until=end, updated_at=now)
+
+        transaction.on_commit(lambda: [bump_generation(model) for model in (Product, PriceInterval)])
+    return DetachResult(partition, len(product_ids), moved)
+
+
+def detach_partitions(before: date) -> List[DetachResult]:
+    """
+    Detach partitions ending on or before `before`, oldest first,
+    one transaction per partition
+    """
+    if before > timezone.localdate():
+        raise ValueError('Only partitions of past days can be detached')
+    period = partition_period()
+    backend = get_partitions()
+    results: List[DetachResult] = list()
+    while True:
+        first = PriceInterval.objects.order_by('valid_from').values_list('valid_from', flat=True).first()
+        if first is None:
+            break
+        partition = partition_of(first, period)
+        if partition.end > before:
+            break
+        results.append(detach_partition(partition, backend))
+    return results
@@ -0,0 +1,77 @@
+from typing import (
+    Any,
+    Type,
+)
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from common.cache import bump_generation
+from .models import (
+    ArchivedProduct,
+    Category,
+    CategoryPriceRollup,
+    Product,
+    PriceAggregate,
+    PriceInterval,
+    rollup_category,
+)
+from .partitions import (
+    cold_intervals,
+    price_rows,
+)
+from .signals import prices_changed
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=PriceInterval)
+@receiver(post_delete, sender=PriceInterval)
+def invalidate_model_cache(sender: Type[Model], **kwargs: Any) -> None:
+    # bumped before the commit, a concurrent reader could still
+    # cache the old rows under the new generation
+    transaction.on_commit(lambda: bump_generation(sender))
+
+
+@receiver(prices_changed)
+def invalidate_price_cache(sender: Type[Model], **kwargs: Any) -> None:
+    transaction.on_commit(lambda: bump_generation(PriceInterval))
+
+
+@receiver(pre_delete, sender=Product)
+def remove_category_rollups(sender: Type[Model], instance: Product, **kwargs: Any) -> None:
+    saved = Product.objects.filter(pk=instance.pk).values_list('category_id', 'is_active').first()
+    if saved is None or rollup_category(*saved) is None:
+        return
+    CategoryPriceRollup.objects.move_intervals(
+        price_rows(instance),
+        rollup_category(*saved),
+        None,
+    )
+
+
+@receiver(post_delete, sender=Product)
+def delete_cold_prices(sender: Type[Model], instance: Product, **kwargs: Any) -> None:
+    """
+    Detached partitions do not cascade deletes of the products
+    """
+    if instance.cold_prices_until is None:
+        return
+    for intervals in cold_intervals([instance.pk]):
+        intervals.delete()
+
+
+@receiver(post_delete, sender=Product)
+def delete_price_aggregates(sender: Type[Model], instance: Product, **kwargs: Any) -> None:
+    """
+    Aggregates of archived products wait for their restore
+    """
+    if instance.aggregated_until is None or ArchivedProduct.objects.filter(pk=instance.pk).exists():
+        return
+    PriceAggregate.objects.filter(product_id=instance.pk).delete()
@@ -0,0 +1,424 @@
+"""
+Retention of the daily price resolution. `downsample_prices` replaces
+the intervals starting before the cutoff, in the live table and in the
+detached partitions, with a `PriceAggregate` per product and week,
+month or quarter (`PRICE_DOWNSAMPLE_GRANULARITY`).
+
+Intervals running over the cutoff are split and the running totals
+of what stays are rebased, as when detaching partitions.
+`Product.aggregated_until` marks the products with downsampled days:
+reads starting before it add the aggregates, writes starting before
+it are refused. Category rollups of downsampled days are kept as they
+were, later category changes of the product only move its daily prices
+"""
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from functools import reduce
+from operator import add
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Tuple,
+)
+from uuid import UUID
+from django.conf import settings
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models import (
+    CharField,
+    Q,
+    QuerySet,
+    Sum,
+    Value,
+)
+from django.db.models.functions import (
+    Cast,
+    Coalesce,
+    Length,
+)
+from django.utils import timezone
+
+from common.cache import bump_generation
+from .managers import (
+    BATCH_SIZE,
+    CHUNK_SIZE,
+    ONE_DAY,
+    Granularity,
+    average_between,
+    next_period,
+    truncate_date,
+)
+from .models import (
+    Product,
+    PriceAggregate,
+    PriceInterval,
+)
+from .partitions import (
+    PriceTotals,
+    cold_model,
+    get_partitions,
+    history_rows as interval_history_rows,
+    price_since as cold_price_since,
+    price_totals,
+    price_totals_many,
+)
+
+
+class RetentionReport(NamedTuple):
+    cutoff: date
+    products: int
+    price_intervals: int
+    price_aggregates: int
+    bytes_reclaimed: int
+
+
+def downsample_granularity() -> Granularity:
+    granularity = Granularity(settings.PRICE_DOWNSAMPLE_GRANULARITY)
+    if granularity == Granularity.DAY:
+        raise ValueError('Prices are downsampled per week, month or quarter')
+    return granularity
+
+
+def retention_cutoff(
+        days: int,
+        granularity: Granularity,
+        day: date | None = None,
+    ) -> date:
+    """
+    First day kept at daily resolution, the start of the
+    period `days` before `day` (today by default)
+    """
+    return truncate_date((day or timezone.localdate()) - timedelta(days=days), granularity)
+
+
+def payload_bytes(queryset: QuerySet) -> int:
+    """
+    Size of the column values of the rows as text, without
+    page, row header and index overhead of the database
+    """
+    lengths = [
+        Coalesce(Length(Cast(field.attname, output_field=CharField())), Value(0))
+        for field in queryset.model._meta.concrete_fields
+    ]
+    return queryset.aggregate(size=Sum(reduce(add, lengths)))['size'] or 0
+
+
+def delete_rows(queryset: QuerySet) -> int:
+    """
+    Delete rows of the queryset in one statement, without the
+    per-row signals `QuerySet.delete` sends for the live intervals
+    """
+    quote = connection.ops.quote_name
+    meta = queryset.model._meta
+    select, params = queryset.values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(meta.db_table)} WHERE {quote(meta.pk.column)} IN ({select})',
+            params,
+        )
+        return cursor.rowcount
+
+
+def reads_coarse(product: Product, start_date: date) -> bool:
+    """
+    Whether prices of the product from `start_date`
+    on are partly downsampled
+    """
+    return product.aggregated_until is not None and start_date < product.aggregated_until
+
+
+def coarse_totals(
+        product_ids: Iterable[UUID],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[UUID, Tuple[Decimal, Decimal]]:
+    """
+    Sum of prices and number of priced days of the products
+    aggregates within the `start_date`..`end_date` range,
+    aggregates partly in the range count in proportion to the overlap
+    """
+    totals: Dict[UUID, Tuple[Decimal, Decimal]] = dict()
+    aggregates = PriceAggregate.objects.filter(
+        product_id__in=product_ids,
+        period_start__lte=end_date,
+        period_end__gte=start_date,
+    ).values_list('product_id', 'period_start', 'period_end', 'price_total', 'days')
+    for product_id, period_start, period_end, total, days in aggregates:
+        overlap = (min(end_date, period_end) - max(start_date, period_start)).days + 1
+        span = (period_end - period_start).days + 1
+        sum_total, sum_days = totals.get(product_id, (Decimal(0), Decimal(0)))
+        totals[product_id] = (
+            sum_total + total * overlap / span,
+            sum_days + Decimal(days) * overlap / span,
+        )
+    return totals
+
+
+def average_price(
+        product: Product,
+        start_date: date,
+        end_date: date,
+    ) -> Decimal | None:
+    """
+    Day-weighted average price of the product, downsampled
+    days before `aggregated_until` come from the aggregates
+    """
+    total, days = Decimal(0), Decimal(0)
+    if reads_coarse(product, start_date):
+        total, days = coarse_totals(
+            [product.pk],
+            start_date,
+            min(end_date, product.aggregated_until - ONE_DAY),
+        ).get(product.pk, (total, days))
+        start_date = product.aggregated_until
+    if start_date <= end_date:
+        fine_total, fine_days = price_totals(product, start_date, end_date)
+        total, days = total + fine_total, days + fine_days
+    return average_between((Decimal(0), 0), (total, days))
+
+
+def average_prices(
+        products: Iterable[Tuple[UUID, date | None, date | None]],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[UUID, Decimal | None]:
+    """
+    `average_price` of (id, cold_prices_until, aggregated_until)
+    products, products sharing a cutoff are read together
+    """
+    products = list(products)
+    totals: Dict[UUID, PriceTotals] = {product_id: (Decimal(0), 0) for product_id, _, _ in products}
+    fine_groups: Dict[date, List[Tuple[UUID, date | None]]] = dict()
+    coarse_groups: Dict[date, List[UUID]] = dict()
+    for product_id, cold_prices_until, aggregated_until in products:
+        fine_start = start_date
+        if aggregated_until is not None and start_date < aggregated_until:
+            coarse_groups.setdefault(aggregated_until, []).append(product_id)
+            fine_start = aggregated_until
+        fine_groups.setdefault(fine_start, []).append((product_id, cold_prices_until))
+
+    for aggregated_until, product_ids in coarse_groups.items():
+        group_totals = coarse_totals(product_ids, start_date, min(end_date, aggregated_until - ONE_DAY))
+        for product_id, (total, days) in group_totals.items():
+            totals[product_id] = (totals[product_id][0] + total, totals[product_id][1] + days)
+    for fine_start, group in fine_groups.items():
+        if fine_start > end_date:
+            continue
+        for product_id, (total, days) in price_totals_many(group, fine_start, end_date).items():
+            totals[product_id] = (totals[product_id][0] + total, totals[product_id][1] + days)
+    return {
+        product_id: average_between((Decimal(0), 0), product_totals)
+        for product_id, product_totals in totals.items()
+    }
+
+
+def history_rows(
+        product: Product,
+        from_date: date | None,
+        to_date: date | None,
+        before: date | None,
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+    """
+    Up to `limit` entries of the price history of the product,
+    latest first. Aggregates follow the intervals when these do
+    not fill the page, with their min and max price and priced days
+    """
+    rows: List[Dict[str, Any]] = [
+        {'valid_from': valid_from, 'valid_to': valid_to, 'price': price}
+        for valid_from, valid_to, price in interval_history_rows(
+            product,
+            from_date,
+            to_date,
+            before,
+            limit,
+        )
+    ]
+    if len(rows) >= limit or not reads_coarse(product, from_date or date.min):
+        return rows
+    aggregates = PriceAggregate.objects.filter(product_id=product.pk)
+    if from_date:
+        aggregates = aggregates.filter(period_end__gte=from_date)
+    if to_date:
+        aggregates = aggregates.filter(period_start__lte=to_date)
+    if before:
+        aggregates = aggregates.filter(period_start__lt=before)
+    rows.extend(
+        {
+            'valid_from': aggregate.period_start,
+            'valid_to': aggregate.period_end,
+            'price': round(aggregate.average_price, 2),
+            'min_price': aggregate.min_price,
+            'max_price': aggregate.max_price,
+            'days': aggregate.days,
+            'granularity': aggregate.granularity,
+        }
+        for aggregate in aggregates.order_by('-period_start')[:limit - len(rows)]
+    )
+    return rows
+
+
+def price_since(
+        product: Product,
+        price: Decimal,
+        start: date,
+    ) -> Tuple[date, Decimal | None]:
+    """
+    Date the price of the product running from `start`, the first day
+    of its live intervals, took effect and the price before it.
+    Detached intervals are followed back, then aggregates priced every
+    day at the same price. An aggregate with a change or a day without
+    price inside does not tell when, the price counts from its end
+    """
+    if product.cold_prices_until is not None:
+        start, previous_price = cold_price_since(product, price, start)
+        if previous_price is not None or start != product.aggregated_until:
+            return start, previous_price
+    aggregates = PriceAggregate.objects.filter(product_id=product.pk, period_end__lt=start)
+    for aggregate in aggregates.order_by('-period_start').iterator(chunk_size=BATCH_SIZE):
+        if (
+            aggregate.period_end + ONE_DAY != start
+            or aggregate.days <= (aggregate.period_end - aggregate.period_start).days
+            or aggregate.min_price != aggregate.max_price
+        ):
+            break
+        if aggregate.min_price != price:
+            return start, aggregate.min_price
+        start = aggregate.period_start
+    return start, None
+
+
+def downsample_products(
+        product_ids: List[UUID],
+        cutoff: date,
+        granularity: Granularity,
+        cold_tables: List[str],
+    ) -> RetentionReport:
+    """
+    Replace intervals of the products starting before `cutoff`
+    with aggregates, in one transaction
+    """
+    with transaction.atomic():
+        # set_prices of the same products waits for the downsampling
+        products = {
+            product_id: (cold_prices_until, aggregated_until)
+            for product_id, cold_prices_until, aggregated_until in Product.objects.select_for_update().filter(
+                Q(aggregated_until__isnull=True) | Q(aggregated_until__lt=cutoff),
+                id__in=product_ids,
+            ).order_by('id').values_list('id', 'cold_prices_until', 'aggregated_until')
+        }
+        if not products:
+            return RetentionReport(cutoff, 0, 0, 0, 0)
+        # where current prices took effect is seen before their intervals are split
+        PriceInterval.objects.refresh_current_prices(products.keys())
+        cold_ids = [product_id for product_id, (cold_prices_until, _) in products.items() if cold_prices_until]
+        tables = [(PriceInterval.objects, list(products))]
+        if cold_ids:
+            tables += [(cold_model(table).objects, cold_ids) for table in cold_tables]
+
+        now = timezone.now()
+        aggregates: Dict[Tuple[UUID, date], PriceAggregate] = dict()
+        removed = reclaimed = 0
+        for manager, ids in tables:
+            old = manager.filter(product_id__in=ids, valid_from__lt=cutoff)
+            crossing = list(old.filter(valid_to__gte=cutoff))
+            manager.bulk_create([
+                manager.model(
+                    product_id=interval.product_id,
+                    valid_from=cutoff,
+                    valid_to=interval.valid_to,
+                    price=interval.price,
+                    cumulative_total=interval.cumulative_at(cutoff - ONE_DAY)[0],
+                    cumulative_days=interval.cumulative_at(cutoff - ONE_DAY)[1],
+                )
+                for interval in crossing
+            ], batch_size=BATCH_SIZE)
+            for interval in crossing:
+                interval.valid_to = cutoff - ONE_DAY
+                interval.updated_at = now
+            manager.bulk_update(crossing, ['valid_to', 'updated_at'], batch_size=BATCH_SIZE)
+            totals = manager.cumulative_at_many(ids, cutoff - ONE_DAY)
+
+            intervals = old.values_list('product_id', 'valid_from', 'valid_to', 'price')
+            for product_id, valid_from, valid_to, price in intervals.iterator(chunk_size=BATCH_SIZE):
+                floor = products[product_id][1] or date.min
+                current = valid_from
+                while current <= valid_to:
+                    period_start = max(truncate_date(current, granularity), floor)
+                    period_end = min(next_period(current, granularity), cutoff) - ONE_DAY
+                    last = min(period_end, valid_to)
+                    days = (last - current).days + 1
+                    aggregate = aggregates.get((product_id, period_start))
+                    if aggregate is None:
+                        aggregate = aggregates[(product_id, period_start)] = PriceAggregate(
+                            product_id=product_id,
+                            granularity=granularity.value,
+                            period_start=period_start,
+                            period_end=period_end,
+                            price_total=Decimal(0),
+                            days=0,
+                            min_price=price,
+                            max_price=price,
+                        )
+                    aggregate.price_total += price * days
+                    aggregate.days += days
+                    aggregate.min_price = min(aggregate.min_price, price)
+                    aggregate.max_price = max(aggregate.max_price, price)
+                    current = last + ONE_DAY
+
+            reclaimed += payload_bytes(old)
+            removed += delete_rows(old)
+            manager._shift_cumulative({
+                product_id: (cutoff - ONE_DAY, -total, -days)
+                for product_id, (total, days) in totals.items()
+            })
+
+        PriceAggregate.objects.bulk_create(aggregates.values(), batch_size=BATCH_SIZE)
+        reclaimed -= payload_bytes(PriceAggregate.objects.filter(pk__in=[
+            aggregate.pk for aggregate in aggregates.values()
+        ]))
+        Product.objects.filter(id__in=products.keys()).update(aggregated_until=cutoff, updated_at=now)
+        # every detached interval of these was downsampled
+        Product.objects.filter(
+            id__in=products.keys(),
+            cold_prices_until__lte=cutoff,
+        ).update(cold_prices_until=None)
+        transaction.on_commit(lambda: [bump_generation(model) for model in (Product, PriceInterval)])
+    return RetentionReport(cutoff, len(products), removed, len(aggregates), reclaimed)
+
+
+def downsample_prices(
+        cutoff: date,
+        granularity: Granularity,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> RetentionReport:
+    """
+    Downsample intervals starting before `cutoff` of every
+    product, one transaction per chunk of products
+    """
+    cold_tables = [partition.table for partition in get_partitions().detached()]
+    product_ids = set(PriceInterval.objects.filter(
+        valid_from__lt=cutoff,
+    ).values_list('product_id', flat=True).distinct())
+    if cold_tables:
+        product_ids.update(Product.objects.filter(
+            Q(aggregated_until__isnull=True) | Q(aggregated_until__lt=cutoff),
+            cold_prices_until__isnull=False,
+        ).values_list('id', flat=True))
+    product_ids = sorted(product_ids)
+
+    report = RetentionReport(cutoff, 0, 0, 0, 0)
+    for offset in range(0, len(product_ids), chunk_size):
+        chunk = downsample_products(product_ids[offset:offset + chunk_size], cutoff, granularity, cold_tables)
+        report = RetentionReport(cutoff, *(
+            total + value for total, value in zip(report[1:], chunk[1:])
+        ))
+    return report
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# sent by bulk price writes, which skip model signals,
+# with `product_ids` of the changed products
+prices_changed = Signal()
@@ -0,0 +1,314 @@
+"""
+Columnar snapshot of the price intervals for analytics.
+
+Every version of the snapshot is a directory of flat little-endian
+column files, rows of a product are contiguous and sorted by
+`valid_from`. `CURRENT` holds the name of the latest version,
+readers memory-map it and never touch the database
+"""
+import json
+import os
+import shutil
+from collections import defaultdict
+from datetime import (
+    date,
+    datetime,
+    timedelta,
+    timezone as dt_timezone,
+)
+from pathlib import Path
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Tuple,
+)
+from uuid import UUID
+import numpy
+from django.conf import settings
+from django.db.models import (
+    Count,
+    Max,
+)
+from django.utils import timezone
+
+from .models import Product, PriceInterval
+from .partitions import cold_intervals
+
+
+EPOCH = date(1970, 1, 1)
+EPOCH_DATETIME = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+CHUNK_SIZE = 500
+
+CURRENT_FILE = 'CURRENT'
+META_FILE = 'meta.json'
+# sorted product ids, `offsets` of a product are its first row
+# and the first row of the next one, `updated` is the latest
+# `updated_at` of its intervals in microseconds
+PRODUCTS_FILE = 'products.s16'
+OFFSETS_FILE = 'offsets.i8'
+UPDATED_FILE = 'updated.i8'
+# days since `EPOCH` and prices in cents
+COLUMNS = (
+    'valid_from',
+    'valid_to',
+    'price',
+)
+PRODUCT_DTYPE = numpy.dtype('S16')
+OFFSET_DTYPE = numpy.dtype('<i8')
+COLUMN_DTYPE = numpy.dtype('<i4')
+
+ProductStats = Tuple[int, int]
+
+
+class BuildResult(NamedTuple):
+    version: str
+    products: int
+    rows: int
+    rebuilt_products: int
+
+
+def to_days(day: date) -> int:
+    return (day - EPOCH).days
+
+
+def from_days(days: int) -> date:
+    return EPOCH + timedelta(days=int(days))
+
+
+def to_microseconds(moment: datetime | None) -> int:
+    if moment is None:
+        return 0
+    return (moment - EPOCH_DATETIME) // ONE_MICROSECOND
+
+
+def snapshot_root(root: Path | str | None = None) -> Path:
+    return Path(root or settings.PRICE_SNAPSHOT_DIR)
+
+
+def product_stats() -> Dict[UUID, ProductStats]:
+    """
+    Number of intervals and their latest `updated_at` per product,
+    an index-only scan of (product, updated_at). A deleted interval
+    changes the count even though no row is updated. Intervals of
+    detached partitions are counted too, detaching splits intervals
+    and downsampling deletes them
+    """
+    rows = PriceInterval.objects.order_by().values('product').annotate(
+        count=Count('id'),
+        updated=Max('updated_at'),
+    ).values_list('product', 'count', 'updated')
+    stats = {
+        product_id: (count, to_microseconds(updated))
+        for product_id, count, updated in rows
+    }
+    cold_products = Product.objects.filter(cold_prices_until__isnull=False).values('id')
+    for queryset in cold_intervals(cold_products):
+        cold_rows = queryset.order_by().values('product_id').annotate(
+            count=Count('id'),
+        ).values_list('product_id', 'count')
+        for product_id, count in cold_rows:
+            live_count, updated = stats.get(product_id, (0, 0))
+            stats[product_id] = (live_count + count, updated)
+    return stats
+
+
+class PriceSnapshot:
+    """
+    Read-only snapshot version. Columns are memory maps,
+    slices of them are views of the files, not copies
+    """
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self.meta = json.loads((self.path / META_FILE).read_text())
+        self.products = self._map(PRODUCTS_FILE, PRODUCT_DTYPE)
+        self.offsets = self._map(OFFSETS_FILE, OFFSET_DTYPE)
+        self.updated = self._map(UPDATED_FILE, OFFSET_DTYPE)
+        self.valid_from, self.valid_to, self.price = (
+            self._map(f'{column}.i4', COLUMN_DTYPE) for column in COLUMNS
+        )
+
+    @classmethod
+    def open(cls, root: Path | str | None = None) -> 'PriceSnapshot':
+        """
+        Latest version of the snapshot,
+        raises `FileNotFoundError` if there is none
+        """
+        root = snapshot_root(root)
+        return cls(root / (root / CURRENT_FILE).read_text().strip())
+
+    def _map(self, name: str, dtype: numpy.dtype) -> numpy.ndarray:
+        path = self.path / name
+        # empty files can not be mapped
+        if not path.stat().st_size:
+            return numpy.empty(0, dtype=dtype)
+        return numpy.memmap(path, dtype=dtype, mode='r')
+
+    @property
+    def version(self) -> str:
+        return self.path.name
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def __contains__(self, product_id: UUID) -> bool:
+        return self.index(product_id) is not None
+
+    def product_ids(self) -> Iterator[UUID]:
+        for value in self.products:
+            # numpy strips trailing zero bytes of `S` values
+            yield UUID(bytes=bytes(value).ljust(PRODUCT_DTYPE.itemsize, b'\0'))
+
+    def index(self, product_id: UUID) -> int | None:
+        key = product_id.bytes
+        index = int(numpy.searchsorted(self.products, key))
+        if index < len(self.products) and self.products[index] == key.rstrip(b'\0'):
+            return index
+        return None
+
+    def stats(self, product_id: UUID) -> ProductStats | None:
+        index = self.index(product_id)
+        if index is None:
+            return None
+        return (
+            int(self.offsets[index + 1] - self.offsets[index]),
+            int(self.updated[index]),
+        )
+
+    def columns(
+            self,
+            product_id: UUID,
+            start_date: date | None = None,
+            end_date: date | None = None,
+        ) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        `valid_from`, `valid_to` (days since `EPOCH`) and `price`
+        (cents) of the product intervals overlapping the period
+        """
+        index = self.index(product_id)
+        if index is None:
+            return tuple(numpy.empty(0, dtype=COLUMN_DTYPE) for _ in COLUMNS)
+        first, last = int(self.offsets[index]), int(self.offsets[index + 1])
+        valid_from = self.valid_from[first:last]
+        valid_to = self.valid_to[first:last]
+        # intervals do not overlap, so both ends are sorted
+        start = 0
+        stop = len(valid_from)
+        if start_date is not None:
+            start = int(numpy.searchsorted(valid_to, to_days(start_date), side='left'))
+        if end_date is not None:
+            stop = int(numpy.searchsorted(valid_from, to_days(end_date), side='right'))
+        return (
+            valid_from[start:stop],
+            valid_to[start:stop],
+            self.price[first:last][start:stop],
+        )
+
+
+def fetch_columns(product_ids: List[UUID]) -> Dict[UUID, numpy.ndarray]:
+    """
+    Columns of the products from the database, one query
+    plus one per detached partition
+    """
+    rows: Dict[UUID, List[Tuple[int, int, int]]] = defaultdict(list)
+    cold_products = Product.objects.filter(
+        id__in=product_ids,
+        cold_prices_until__isnull=False,
+    ).values('id')
+    querysets = [PriceInterval.objects.filter(product_id__in=product_ids)] + cold_intervals(cold_products)
+    for queryset in querysets:
+        intervals = queryset.values_list(
+            'product_id',
+            'valid_from',
+            'valid_to',
+            'price',
+        )
+        for product_id, valid_from, valid_to, price in intervals:
+            rows[product_id].append((to_days(valid_from), to_days(valid_to), int(price * 100)))
+    return {
+        product_id: numpy.array(sorted(product_rows), dtype=COLUMN_DTYPE).reshape(-1, len(COLUMNS))
+        for product_id, product_rows in rows.items()
+    }
+
+
+def build_snapshot(
+        root: Path | str | None = None,
+        full: bool = False,
+    ) -> BuildResult:
+    """
+    Write a new snapshot version and make it current. Products whose
+    interval count or latest `updated_at` differ from the current
+    version are read from the database, the rest is copied from it
+    """
+    root = snapshot_root(root)
+    previous: PriceSnapshot | None = None
+    try:
+        previous = PriceSnapshot.open(root)
+    except FileNotFoundError:
+        pass
+
+    stats = product_stats()
+    product_ids = sorted(stats, key=lambda product_id: product_id.bytes)
+    changed = {
+        product_id for product_id in product_ids
+        if full or previous is None or previous.stats(product_id) != stats[product_id]
+    }
+
+    version = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    path = root / version
+    path.mkdir(parents=True)
+    offsets = [0]
+    files = [open(path / f'{column}.i4', 'wb') for column in COLUMNS]
+    try:
+        for offset in range(0, len(product_ids), CHUNK_SIZE):
+            chunk = product_ids[offset:offset + CHUNK_SIZE]
+            fetched = fetch_columns([product_id for product_id in chunk if product_id in changed])
+            for product_id in chunk:
+                if product_id in changed:
+                    # rows may be gone since the stats were read
+                    rows = fetched.get(product_id, numpy.empty((0, len(COLUMNS)), dtype=COLUMN_DTYPE))
+                    columns = rows.T
+                else:
+                    columns = previous.columns(product_id)
+                for file, column in zip(files, columns):
+                    numpy.ascontiguousarray(column, dtype=COLUMN_DTYPE).tofile(file)
+                offsets.append(offsets[-1] + len(columns[0]))
+    finally:
+        for file in files:
+            file.close()
+
+    numpy.array(
+        [product_id.bytes for product_id in product_ids],
+        dtype=PRODUCT_DTYPE,
+    ).tofile(path / PRODUCTS_FILE)
+    numpy.array(offsets, dtype=OFFSET_DTYPE).tofile(path / OFFSETS_FILE)
+    numpy.array(
+        [stats[product_id][1] for product_id in product_ids],
+        dtype=OFFSET_DTYPE,
+    ).tofile(path / UPDATED_FILE)
+    (path / META_FILE).write_text(json.dumps({
+        'epoch': EPOCH.isoformat(),
+        'products': len(product_ids),
+        'rows': offsets[-1],
+        'built_at': timezone.now().isoformat(),
+    }))
+
+    # readers see either the old or the new version
+    current = root / f'{CURRENT_FILE}.tmp'
+    current.write_text(version)
+    os.replace(current, root / CURRENT_FILE)
+
+    # the previous version may still be mapped by readers
+    keep = {version, previous.version if previous else None}
+    for item in root.iterdir():
+        if item.is_dir() and item.name not in keep:
+            shutil.rmtree(item, ignore_errors=True)
+
+    return BuildResult(
+        version=version,
+        products=len(product_ids),
+        rows=offsets[-1],
+        rebuilt_products=len(changed),
+    )
@@ -0,0 +1,143 @@
+"""
+Price statistics of a period, computed with numpy vector
+operations over the daily price series of the product.
+Days without a price are left out of every metric
+"""
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from typing import (
+    Any,
+    Dict,
+    List,
+    Tuple,
+)
+import numpy
+
+
+MOVING_AVERAGE_WINDOWS = (7, 30)
+PERCENTILES = {
+    'p10': 10,
+    'median': 50,
+    'p90': 90,
+}
+
+IntervalRow = Tuple[date, date, Decimal]
+
+
+def history_start(start_date: date) -> date:
+    """
+    First day of prices needed for the moving averages
+    of the first day of the period
+    """
+    return start_date - timedelta(days=max(MOVING_AVERAGE_WINDOWS) - 1)
+
+
+def daily_prices(
+        rows: List[IntervalRow],
+        start_date: date,
+        end_date: date,
+    ) -> numpy.ndarray:
+    """
+    Price of every day of the period from the (valid_from, valid_to,
+    price) rows of non-overlapping intervals, NaN for days without price
+    """
+    daily = numpy.full((end_date - start_date).days + 1, numpy.nan)
+    if not rows:
+        return daily
+    valid_from, valid_to, price = zip(*rows)
+    start = numpy.datetime64(start_date, 'D')
+    first = numpy.maximum(
+        (numpy.array(valid_from, dtype='datetime64[D]') - start).astype(numpy.int64),
+        0,
+    )
+    last = numpy.minimum(
+        (numpy.array(valid_to, dtype='datetime64[D]') - start).astype(numpy.int64),
+        len(daily) - 1,
+    )
+    lengths = numpy.maximum(last - first + 1, 0)
+    # day indexes of every interval, without a loop over the intervals
+    starts = numpy.cumsum(lengths) - lengths
+    positions = numpy.repeat(first - starts, lengths) + numpy.arange(lengths.sum())
+    daily[positions] = numpy.repeat(numpy.array(price, dtype=numpy.float64), lengths)
+    return daily
+
+
+def moving_averages(daily: numpy.ndarray, window: int) -> numpy.ndarray:
+    """
+    Trailing `window`-day average of every day starting with
+    the `window`-th one, NaN if the window has no prices
+    """
+    priced = ~numpy.isnan(daily)
+    sums = numpy.concatenate(([0], numpy.cumsum(numpy.where(priced, daily, 0))))
+    counts = numpy.concatenate(([0], numpy.cumsum(priced)))
+    window_counts = counts[window:] - counts[:-window]
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        return (sums[window:] - sums[:-window]) / window_counts
+
+
+def to_number(value: float) -> float | None:
+    if numpy.isnan(value):
+        return None
+    return round(float(value), 2)
+
+
+def to_numbers(values: numpy.ndarray) -> List[float | None]:
+    return numpy.where(numpy.isnan(values), None, numpy.round(values, 2)).tolist()
+
+
+def price_statistics(
+        rows: List[IntervalRow],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[str, Any]:
+    """
+    Statistics of the `start_date`..`end_date` period, `rows`
+    should cover the period since `history_start(start_date)`
+    """
+    history = daily_prices(rows, history_start(start_date), end_date)
+    days = (end_date - start_date).days + 1
+    period = history[-days:]
+    priced = period[~numpy.isnan(period)]
+
+    dates = numpy.arange(
+        numpy.datetime64(start_date, 'D'),
+        numpy.datetime64(end_date, 'D') + 1,
+    ).tolist()
+    averages = {
+        f'ma_{window}': to_numbers(moving_averages(history, window)[-days:])
+        for window in MOVING_AVERAGE_WINDOWS
+    }
+    series = [
+        {'date': day, **{name: values[index] for name, values in averages.items()}}
+        for index, day in enumerate(dates)
+    ]
+
+    if not priced.size:
+        return {
+            'days': 0,
+            'min': None,
+            'max': None,
+            'mean': None,
+            'stddev': None,
+            **{name: None for name in PERCENTILES},
+            'changes': 0,
+            'moving_averages': series,
+        }
+
+    percentiles = numpy.percentile(priced, list(PERCENTILES.values()))
+    return {
+        'days': int(priced.size),
+        'min': to_number(priced.min()),
+        'max': to_number(priced.max()),
+        'mean': to_number(priced.mean()),
+        'stddev': to_number(priced.std()),
+        **{
+            name: to_number(value)
+            for name, value in zip(PERCENTILES, percentiles)
+        },
+        'changes': int(numpy.count_nonzero(numpy.diff(priced))),
+        'moving_averages': series,
+    }
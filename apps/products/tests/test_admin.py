@@ -0,0 +1,86 @@
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from products.admin import RecentIntervalsFormSet
+from products.models import (
+    Category,
+    Product,
+    PriceInterval,
+)
+
+
+class ProductAdminTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.category = Category.objects.create(name='Test Category')
+        self.product = Product.objects.create(name='Test Product', sku='SKU-1', category=self.category)
+        self.other = Product.objects.create(name='Other Product', sku='SKU-2', category=self.category)
+        # one interval per week, more than the inline shows
+        PriceInterval.objects.set_price_runs({self.product.id: [
+            (date(2024, 1, 1) + timedelta(weeks=week), date(2024, 1, 7) + timedelta(weeks=week), Decimal(10 + week % 2))
+            for week in range(60)
+        ]})
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def set_price(self, *products, **data):
+        return self.client.post(
+            '/admin/products/product/',
+            {
+                'action': 'set_price',
+                '_selected_action': [product.pk for product in products],
+                **data,
+            },
+            follow=True,
+        )
+
+    def test_change_page_shows_newest_intervals(self):
+        response = self.client.get(f'/admin/products/product/{self.product.pk}/change/')
+        formset = response.context['inline_admin_formsets'][0].formset
+        self.assertEqual(formset.initial_form_count(), RecentIntervalsFormSet.limit)
+        self.assertEqual(formset.forms[0].instance.valid_from, date(2024, 1, 1) + timedelta(weeks=59))
+        self.assertContains(response, f'/admin/products/priceinterval/?product__id__exact={self.product.pk}')
+
+        response = self.client.get('/admin/products/priceinterval/', {'product__id__exact': self.product.pk})
+        self.assertEqual(response.context['cl'].result_count, 60)
+
+    def test_search_by_sku(self):
+        response = self.client.get('/admin/products/product/', {'q': 'sku-2'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.other])
+
+    def test_set_price_action(self):
+        self.other.soft_delete()
+        response = self.set_price(
+            self.product,
+            self.other,
+            start_date='2025-06-01',
+            end_date='2025-06-30',
+            price='25.00',
+        )
+        self.assertContains(response, 'Price 25.00 is set from 2025-06-01 to 2025-06-30 for 1 products')
+        self.assertContains(response, '1 inactive products are skipped')
+        self.assertEqual(
+            PriceInterval.objects.filter(product=self.product).first().price,
+            Decimal('25.00'),
+        )
+        self.assertFalse(PriceInterval.objects.filter(product=self.other).exists())
+
+    def test_set_price_action_errors(self):
+        response = self.set_price(self.product, start_date='2025-01-31', end_date='2025-01-01', price='25.00')
+        self.assertContains(response, 'End date must be after start date')
+        Product.objects.filter(pk=self.product.pk).update(aggregated_until=date(2024, 6, 1))
+        response = self.set_price(
+            self.product,
+            self.other,
+            start_date='2024-05-01',
+            end_date='2024-06-30',
+            price='25.00',
+        )
+        self.assertContains(response, 'for 1 products')
+        self.assertContains(response, '1 products with detached or downsampled prices in the range are skipped')
+        self.assertFalse(PriceInterval.objects.filter(product=self.product, price=Decimal('25.00')).exists())
@@ -0,0 +1,161 @@
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from io import StringIO
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management import call_command
+from django.test import (
+    RequestFactory,
+    TestCase,
+)
+from django.utils import timezone
+
+from products.admin import (
+    ArchivedProductAdmin,
+    ProductAdmin,
+)
+from products.archive import (
+    archive_products,
+    restore_products,
+)
+from products.models import (
+    ArchivedPriceInterval,
+    ArchivedProduct,
+    Category,
+    CategoryPriceRollup,
+    Product,
+    PriceInterval,
+)
+
+
+class ArchiveTestCase(TestCase):
+    def setUp(self) -> None:
+        self.category = Category.objects.create(name='Test Category')
+        self.products = [
+            Product.objects.create(
+                name=f'Test Product {index}',
+                sku=f'SKU-{index}',
+                category=self.category,
+            )
+            for index in range(3)
+        ]
+        for month in range(1, 4):
+            PriceInterval.objects.set_prices(
+                [product.id for product in self.products],
+                date(2024, month, 1),
+                date(2024, month, 20),
+                Decimal(10 + month),
+            )
+        self.archived, self.inactive, self.active = self.products
+        self.archived.soft_delete()
+        self.inactive.soft_delete()
+        Product.objects.filter(pk=self.archived.pk).update(
+            deactivated_at=timezone.now() - timedelta(days=400),
+        )
+        self.intervals = self.interval_rows(self.archived)
+        self.rollups = self.rollup_rows()
+        self.request = RequestFactory().post('/')
+        self.request.user = User(is_superuser=True)
+        self.request._messages = CookieStorage(self.request)
+
+    def interval_rows(self, product):
+        return list(PriceInterval.objects.filter(product_id=product.pk).order_by('valid_from').values_list(
+            'valid_from',
+            'valid_to',
+            'price',
+            'cumulative_total',
+            'cumulative_days',
+        ))
+
+    def rollup_rows(self):
+        return set(CategoryPriceRollup.objects.values_list('day', 'price_total', 'price_count'))
+
+    def archive(self):
+        call_command('archive_products', '--days', '180', stdout=StringIO())
+
+    def test_soft_delete_records_time(self):
+        self.assertIsNotNone(Product.objects.get(pk=self.inactive.pk).deactivated_at)
+        self.inactive.restore()
+        self.assertIsNone(Product.objects.get(pk=self.inactive.pk).deactivated_at)
+
+    def test_archive_moves_long_inactive_products(self):
+        self.archive()
+        self.assertFalse(Product.objects.filter(pk=self.archived.pk).exists())
+        self.assertFalse(PriceInterval.objects.filter(product_id=self.archived.pk).exists())
+        self.assertTrue(Product.objects.filter(pk=self.inactive.pk).exists())
+        archived = ArchivedProduct.objects.get(pk=self.archived.pk)
+        self.assertEqual((archived.sku, archived.category_id), ('SKU-0', self.category.id))
+        self.assertEqual(ArchivedPriceInterval.objects.filter(product=archived).count(), 3)
+        self.assertEqual(self.rollup_rows(), self.rollups)
+
+    def test_restore_brings_archived_product_back(self):
+        created_at = self.archived.created_at
+        self.archive()
+        self.archived.restore()
+        product = Product.objects.get(pk=self.archived.pk)
+        self.assertTrue(product.is_active)
+        self.assertIsNone(product.deactivated_at)
+        self.assertEqual(product.created_at, created_at)
+        # the last interval has ended
+        self.assertEqual((product.current_price, product.current_price_date), (None, date(2024, 3, 21)))
+        self.assertEqual(self.interval_rows(product), self.intervals)
+        self.assertFalse(ArchivedProduct.objects.exists())
+        self.assertFalse(ArchivedPriceInterval.objects.exists())
+        # prices count in the category again
+        self.assertEqual(
+            CategoryPriceRollup.objects.get(category=self.category, day=date(2024, 2, 1)).price_count,
+            2,
+        )
+
+    def test_restore_keeps_product_whose_sku_is_taken(self):
+        self.archive()
+        Product.objects.create(name='New Product', sku='SKU-0')
+        self.assertEqual(restore_products([self.archived.pk]), 0)
+        self.assertTrue(ArchivedProduct.objects.filter(pk=self.archived.pk).exists())
+
+    def test_restore_without_sku(self):
+        Product.objects.filter(pk=self.archived.pk).update(sku='')
+        self.archive()
+        Product.objects.create(name='New Product')
+        self.assertEqual(restore_products([self.archived.pk]), 1)
+
+    def test_admin_reports_products_left_in_archive(self):
+        self.archive()
+        Product.objects.create(name='New Product', sku='SKU-0')
+        ArchivedProductAdmin(ArchivedProduct, AdminSite()).restore(
+            self.request,
+            ArchivedProduct.objects.all(),
+        )
+        self.assertEqual(
+            [(message.level_tag, message.message) for message in self.request._messages],
+            [('warning', '1 products are left in the archive, their sku is taken')],
+        )
+        self.assertTrue(ArchivedProduct.objects.filter(pk=self.archived.pk).exists())
+
+    def test_archive_skips_restored_products(self):
+        self.archived.restore()
+        self.assertEqual(archive_products(timezone.now()).products, 1)
+        self.assertTrue(Product.active_objects.filter(pk=self.archived.pk).exists())
+
+    def test_admin_actions(self):
+        ProductAdmin(Product, AdminSite()).soft_delete(
+            self.request,
+            Product.objects.filter(pk=self.active.pk),
+        )
+        self.assertIsNotNone(Product.objects.get(pk=self.active.pk).deactivated_at)
+        self.assertFalse(CategoryPriceRollup.objects.filter(price_count__gt=0).exists())
+
+        self.archive()
+        ArchivedProductAdmin(ArchivedProduct, AdminSite()).restore(
+            self.request,
+            ArchivedProduct.objects.all(),
+        )
+        self.assertTrue(Product.active_objects.filter(pk=self.archived.pk).exists())
+        self.assertEqual(
+            CategoryPriceRollup.objects.get(category=self.category, day=date(2024, 2, 1)).price_count,
+            1,
+        )
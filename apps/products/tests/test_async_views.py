@@ -0,0 +1,84 @@
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import (
+    include,
+    path,
+)
+from rest_framework import status
+
+from products.api.urls import (
+    async_urlpatterns,
+    sync_urlpatterns,
+)
+from products.models import Category, Product, PriceInterval
+
+
+urlpatterns = [
+    path('async/', include((async_urlpatterns, 'products'), namespace='async')),
+    path('sync/', include((sync_urlpatterns, 'products'), namespace='sync')),
+]
+
+
+@override_settings(ROOT_URLCONF='products.tests.test_async_views')
+class AsyncReadViewsTestCase(TestCase):
+    """
+    Async views should answer exactly like the sync ones
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        self.category = Category.objects.create(name='Test Category')
+        self.products = [
+            Product.objects.create(name=f'Test Product {index}', sku=f'SKU-{index}', category=self.category)
+            for index in range(5)
+        ]
+        self.product = self.products[0]
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 2, 1), date(2024, 2, 29), Decimal('12.00'))
+
+    async def assert_same_response(self, url, query_params=None):
+        sync_response = await self.async_client.get(f'/sync/{url}', query_params)
+        async_response = await self.async_client.get(f'/async/{url}', query_params)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(
+            async_response.content.replace(b'/async/', b'/sync/'),
+            sync_response.content,
+        )
+        return async_response
+
+    async def test_category_list(self):
+        await self.assert_same_response('categories/')
+
+    async def test_product_list(self):
+        response = await self.assert_same_response('products/', {'limit': 2, 'offset': 1})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response = await self.async_client.get('/async/products/', {'limit': 2, 'offset': 1})
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    async def test_product_list_with_cursor(self):
+        response = await self.assert_same_response('products/', {'limit': 2, 'pagination': 'cursor'})
+        self.assertIsNotNone(response.json()['next'])
+        await self.assert_same_response('products/', {'pagination': 'cursor', 'cursor': 'broken'})
+
+    async def test_product_details(self):
+        await self.assert_same_response(f'products/{self.product.id}/')
+        await self.assert_same_response(f'products/{self.product.id}/', {'price_intervals': 1})
+        await self.assert_same_response(f'products/{self.products[1].id}/')
+        await self.assert_same_response('products/00000000-0000-0000-0000-000000000000/')
+
+    async def test_average_price(self):
+        url = f'prices/products/get-price/{self.product.id}/'
+        response = await self.assert_same_response(url, {'start_date': '2024-01-15', 'end_date': '2024-02-14'})
+        self.assertEqual(response.json(), {'average_price': 10.9})
+        await self.assert_same_response(url, {'start_date': '2024-05-01', 'end_date': '2024-05-02'})
+        await self.assert_same_response(url, {'start_date': '2024-05-01'})
+
+    async def test_not_modified(self):
+        url = f'/async/products/{self.product.id}/'
+        response = await self.async_client.get(url)
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
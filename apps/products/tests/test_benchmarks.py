@@ -0,0 +1,84 @@
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from products.models import (
+    Category,
+    CategoryPriceRollup,
+    Product,
+    PriceInterval,
+)
+
+
+class BenchmarkCommandsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.seed('--seed', '1')
+
+    def seed(self, *args):
+        call_command(
+            'seed_benchmark',
+            '--categories', '2',
+            '--products', '6',
+            '--days', '60',
+            *args,
+            stdout=StringIO(),
+        )
+
+    def intervals(self):
+        return list(PriceInterval.objects.order_by('product__sku', 'valid_from').values_list(
+            'product_id',
+            'valid_from',
+            'valid_to',
+            'price',
+        ))
+
+    def test_seed_covers_every_day(self):
+        self.assertEqual(Category.objects.count(), 2)
+        self.assertEqual(Product.objects.count(), 6)
+        for product in Product.objects.all():
+            intervals = list(product.price_intervals.order_by('valid_from'))
+            self.assertEqual(sum((interval.valid_to - interval.valid_from).days + 1 for interval in intervals), 60)
+        self.assertTrue(CategoryPriceRollup.objects.exists())
+
+    def test_seed_is_reproducible(self):
+        intervals = self.intervals()
+        with self.assertRaises(CommandError):
+            self.seed('--seed', '1')
+        self.seed('--seed', '1', '--flush')
+        self.assertEqual(self.intervals(), intervals)
+        self.assertEqual(Category.objects.count(), 2)
+        self.assertEqual(
+            CategoryPriceRollup.objects.filter(category__isnull=False).count(),
+            CategoryPriceRollup.objects.count(),
+        )
+
+    def test_run_benchmarks_writes_results(self):
+        path = Path(self.directory.name) / 'results.json'
+        call_command('run_benchmarks', '--iterations', '1', '--output', str(path), stdout=StringIO())
+        results = json.loads(path.read_text())['results']
+        self.assertEqual(set(results['product_list']), {'cold', 'warm'})
+        self.assertEqual(set(results['set_price_for_period']), {'write'})
+        self.assertIn('get_price_statistics', results)
+        self.assertNotIn('create_product', results)
+        # writes are rolled back
+        self.assertEqual(PriceInterval.objects.filter(price='9.99').count(), 0)
+
+    def test_run_benchmarks_fails_on_regression(self):
+        path = Path(self.directory.name) / 'baseline.json'
+        path.write_text(json.dumps({'results': {
+            'product_list': {'cold': {'median_ms': 0.0, 'p95_ms': 0.0, 'queries': 0}},
+        }}))
+        with self.assertRaisesMessage(CommandError, 'product_list (cold)'):
+            call_command(
+                'run_benchmarks',
+                '--iterations', '1',
+                '--baseline', str(path),
+                '--min-delta', '0',
+                stdout=StringIO(),
+            )
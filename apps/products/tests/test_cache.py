@@ -0,0 +1,101 @@
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.utils import timezone
+from rest_framework import status
+
+from common.cache import (
+    cache_stats,
+    generation_key,
+    get_generations,
+    page_cache_timeout,
+)
+from products.models import Category, Product, PriceInterval
+
+
+class CachedListViewTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.category = Category.objects.create(name='Test Category')
+        self.product = Product.objects.create(name='Test Product', sku='SKU-1', category=self.category)
+
+    def test_second_request_is_served_from_cache(self):
+        response = self.client.get('/api/v1/products/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        hits = cache_stats.hits
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/products/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(cache_stats.hits, hits + 1)
+
+    def test_process_local_cache_expires_soon(self):
+        self.assertEqual(page_cache_timeout(), 100)
+        with override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost'},
+        }):
+            self.assertEqual(page_cache_timeout(), 60 * 60)
+
+    def test_pages_are_cached_separately(self):
+        self.client.get('/api/v1/categories/', {'limit': 1})
+        response = self.client.get('/api/v1/categories/', {'limit': 2})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_product_change_invalidates_list(self):
+        self.client.get('/api/v1/products/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Other Product', sku='SKU-2')
+        response = self.client.get('/api/v1/products/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+
+    def test_category_rename_invalidates_product_list(self):
+        self.client.get('/api/v1/products/')
+        self.category.name = 'Renamed Category'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        response = self.client.get('/api/v1/products/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['category_name'], 'Renamed Category')
+
+    def test_set_price_updates_listed_current_price(self):
+        self.client.get('/api/v1/products/')
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            PriceInterval.objects.set_price(self.product, today, today, Decimal('10.00'))
+        response = self.client.get('/api/v1/products/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['current_price'], '10.00')
+
+    def test_soft_deleted_products_are_not_listed(self):
+        self.product.soft_delete()
+        response = self.client.get('/api/v1/products/')
+        self.assertEqual(response.data['count'], 0)
+
+    def test_set_price_bumps_price_generation(self):
+        key = generation_key(PriceInterval)
+        generation = get_generations([PriceInterval])[key]
+        with self.captureOnCommitCallbacks(execute=True):
+            PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00'))
+        self.assertNotEqual(get_generations([PriceInterval])[key], generation)
+
+    def test_generation_is_bumped_after_commit(self):
+        key = generation_key(Product)
+        generation = get_generations([Product])[key]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Renamed Product'
+            self.product.save()
+            # readers before the commit still see the old rows
+            self.assertEqual(get_generations([Product])[key], generation)
+        self.assertNotEqual(get_generations([Product])[key], generation)
+
+    def test_cache_stats_endpoint(self):
+        response = self.client.get('/api/v1/cache/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'hits', 'misses'})
@@ -0,0 +1,88 @@
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+
+from products.models import Category, Product, PriceInterval
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.category = Category.objects.create(name='Test Category')
+        self.product = Product.objects.create(name='Test Product', sku='SKU-1', category=self.category)
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 2, 1), date(2024, 2, 29), Decimal('12.00'))
+        self.details_url = f'/api/v1/products/{self.product.id}/'
+        self.average_url = f'/api/v1/prices/products/get-price/{self.product.id}/'
+
+    def get_etag(self, url, query_params=None):
+        response = self.client.get(url, query_params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response['ETag']
+
+    def assert_not_modified(self, url, etag, query_params=None):
+        response = self.client.get(url, query_params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def assert_modified(self, url, etag, query_params=None):
+        response = self.client.get(url, query_params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_details_not_modified_in_one_query(self):
+        etag = self.get_etag(self.details_url)
+        with self.assertNumQueries(1):
+            self.assert_not_modified(self.details_url, etag)
+
+    def test_average_price_not_modified(self):
+        query_params = {'start_date': '2024-01-01', 'end_date': '2024-02-29'}
+        etag = self.get_etag(self.average_url, query_params)
+        with self.assertNumQueries(1):
+            self.assert_not_modified(self.average_url, etag, query_params)
+
+    def test_query_params_change_etag(self):
+        first = self.get_etag(self.average_url, {'start_date': '2024-01-01', 'end_date': '2024-01-31'})
+        second = self.get_etag(self.average_url, {'start_date': '2024-01-01', 'end_date': '2024-02-29'})
+        self.assertNotEqual(first, second)
+
+    def test_set_price_changes_etag(self):
+        etag = self.get_etag(self.details_url)
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 10), date(2024, 1, 12), Decimal('11.00'))
+        self.assert_modified(self.details_url, etag)
+
+    def test_deleted_interval_changes_etag(self):
+        etag = self.get_etag(self.details_url)
+        self.product.price_intervals.filter(valid_from=date(2024, 1, 1)).delete()
+        self.assert_modified(self.details_url, etag)
+
+    def test_category_rename_changes_etag(self):
+        etag = self.get_etag(self.details_url)
+        self.category.name = 'Renamed Category'
+        self.category.save()
+        self.assert_modified(self.details_url, etag)
+
+    def test_deleted_interval_is_not_hidden_by_if_modified_since(self):
+        response = self.client.get(self.details_url)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.product.price_intervals.filter(valid_from=date(2024, 1, 1)).delete()
+        response = self.client.get(
+            self.details_url,
+            HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 2099 00:00:00 GMT',
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.details_url, HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 2099 00:00:00 GMT')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_not_modified_without_queries(self):
+        etag = self.get_etag('/api/v1/products/')
+        with self.assertNumQueries(0):
+            self.assert_not_modified('/api/v1/products/', etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Other Product', sku='SKU-2')
+        self.assert_modified('/api/v1/products/', etag)
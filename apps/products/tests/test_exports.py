@@ -0,0 +1,79 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from rest_framework import status
+
+from products.models import Category, Product, PriceInterval
+
+
+@override_settings(PRICE_EXPORT_CHUNK_SIZE=2)
+class PriceExportTestCase(TestCase):
+    def setUp(self) -> None:
+        self.category = Category.objects.create(name='Test Category')
+        self.product = Product.objects.create(name='Test Product', sku='SKU-1', category=self.category)
+        self.other_product = Product.objects.create(name='Other Product', sku='SKU-2')
+        for product in (self.product, self.other_product):
+            for month in range(1, 4):
+                PriceInterval.objects.set_price(
+                    product,
+                    date(2024, month, 1),
+                    date(2024, month, 10),
+                    Decimal(month),
+                )
+
+    def export(self, query_params):
+        response = self.client.get('/api/v1/prices/export/', query_params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.reader(StringIO(self.export({'product_id': str(self.product.id)}))))
+        self.assertEqual(rows[0], ['product_id', 'sku', 'valid_from', 'valid_to', 'price'])
+        self.assertEqual(rows[1:], [
+            [str(self.product.id), 'SKU-1', f'2024-0{month}-01', f'2024-0{month}-10', f'{month}.00']
+            for month in range(1, 4)
+        ])
+
+    def test_ndjson_filtered_by_category_and_dates(self):
+        content = self.export({
+            'output': 'ndjson',
+            'category_id': str(self.category.id),
+            'from': '2024-02-05',
+            'to': '2024-03-01',
+        })
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['valid_from'] for row in rows], ['2024-02-01', '2024-03-01'])
+        self.assertEqual({row['product_id'] for row in rows}, {str(self.product.id)})
+
+    def test_all_products(self):
+        content = self.export({'output': 'ndjson'})
+        self.assertEqual(len(content.splitlines()), 6)
+
+    def test_streams_before_querying(self):
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/prices/export/')
+
+    def test_invalid_params(self):
+        response = self.client.get('/api/v1/prices/export/', {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/v1/prices/export/', {'product_id': 'broken'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'prices.csv')
+            call_command('export_prices', '--product', str(self.other_product.id), '--output', path, stdout=StringIO())
+            with open(path, newline='') as output:
+                rows = list(csv.reader(output))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row[1] for row in rows[1:]}, {'SKU-2'})
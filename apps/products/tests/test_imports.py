@@ -0,0 +1,174 @@
+import json
+import os
+import random
+import tempfile
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+
+from products.imports import collapse_observations
+from products.managers import Granularity
+from products.models import Product, PriceInterval
+from products.retention import downsample_prices
+
+
+class SetPriceRunsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.products = [
+            Product.objects.create(name=f'Product {index}', sku=f'SKU-{index}')
+            for index in range(2)
+        ]
+        self.other_products = [
+            Product.objects.create(name=f'Other Product {index}', sku=f'SKU-OTHER-{index}')
+            for index in range(2)
+        ]
+
+    def intervals(self, product):
+        return list(
+            product.price_intervals.order_by('valid_from').values_list(
+                'valid_from',
+                'valid_to',
+                'price',
+                'cumulative_total',
+                'cumulative_days',
+            )
+        )
+
+    def test_matches_set_price(self):
+        rand = random.Random(7)
+        for _ in range(10):
+            observations = list()
+            for index in range(2):
+                for _ in range(rand.randint(1, 40)):
+                    observations.append((
+                        index,
+                        date(2024, 1, 1) + timedelta(days=rand.randint(0, 120)),
+                        Decimal(rand.choice(['9.99', '10.00', '12.50'])),
+                    ))
+            runs = collapse_observations(
+                (self.products[index].id, day, price)
+                for index, day, price in observations
+            )
+            PriceInterval.objects.set_price_runs(runs)
+            for index, product in enumerate(self.products):
+                for start_date, end_date, price in runs.get(product.id, []):
+                    PriceInterval.objects.set_price(self.other_products[index], start_date, end_date, price)
+
+        for product, other_product in zip(self.products, self.other_products):
+            self.assertEqual(self.intervals(product), self.intervals(other_product))
+            self.assertEqual(PriceInterval.objects.update_cumulative(product), 0)
+
+    def test_last_observation_of_a_day_wins(self):
+        product_id = self.products[0].id
+        runs = collapse_observations([
+            (product_id, date(2024, 1, 1), Decimal('10.00')),
+            (product_id, date(2024, 1, 2), Decimal('11.00')),
+            (product_id, date(2024, 1, 3), Decimal('10.00')),
+            (product_id, date(2024, 1, 2), Decimal('10.00')),
+        ])
+        self.assertEqual(runs, {product_id: [(date(2024, 1, 1), date(2024, 1, 3), Decimal('10.00'))]})
+
+
+class ImportPricesCommandTestCase(TestCase):
+    def setUp(self) -> None:
+        self.product = Product.objects.create(name='Test Product', sku='SKU-1')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as output:
+            output.write(content)
+        return path
+
+    def intervals(self):
+        return list(
+            self.product.price_intervals.order_by('valid_from').values_list(
+                'valid_from',
+                'valid_to',
+                'price',
+            )
+        )
+
+    def test_csv(self):
+        path = self.write('prices.csv', '\n'.join([
+            'sku,date,price',
+            'SKU-1,2024-01-01,10',
+            'SKU-1,2024-01-02,10.00',
+            'SKU-1,2024-01-03,12.50',
+            'SKU-MISSING,2024-01-01,10',
+            'SKU-1,broken,10',
+            'SKU-1,2024-01-05,12.50',
+        ]))
+        stdout = StringIO()
+        call_command('import_prices', path, '--batch-size', '2', stdout=stdout)
+
+        self.assertEqual(self.intervals(), [
+            (date(2024, 1, 1), date(2024, 1, 2), Decimal('10.00')),
+            (date(2024, 1, 3), date(2024, 1, 3), Decimal('12.50')),
+            (date(2024, 1, 5), date(2024, 1, 5), Decimal('12.50')),
+        ])
+        self.assertIn('Imported 4 records, skipped 2', stdout.getvalue())
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+        self.assertEqual(PriceInterval.objects.update_cumulative(self.product), 0)
+
+    def test_ndjson(self):
+        path = self.write('prices.ndjson', '\n'.join(
+            json.dumps({'sku': 'SKU-1', 'date': f'2024-01-0{day}', 'price': '10.00'})
+            for day in range(1, 4)
+        ))
+        call_command('import_prices', path, stdout=StringIO())
+        self.assertEqual(self.intervals(), [
+            (date(2024, 1, 1), date(2024, 1, 3), Decimal('10.00')),
+        ])
+
+    def test_broken_ndjson_lines_are_skipped(self):
+        path = self.write('prices.ndjson', '\n'.join([
+            json.dumps({'sku': 'SKU-1', 'date': '2024-01-01', 'price': '10.00'}),
+            '{"sku": "SKU-1", "date": "2024-01-0',
+            json.dumps(['SKU-1', '2024-01-02', '10.00']),
+            json.dumps({'sku': 'SKU-1', 'date': '2024-01-03', 'price': '10.00'}),
+        ]))
+        stdout = StringIO()
+        call_command('import_prices', path, stdout=stdout)
+        self.assertEqual(self.intervals(), [
+            (date(2024, 1, 1), date(2024, 1, 1), Decimal('10.00')),
+            (date(2024, 1, 3), date(2024, 1, 3), Decimal('10.00')),
+        ])
+        self.assertIn('Imported 2 records, skipped 2', stdout.getvalue())
+
+    def test_resume_from_checkpoint(self):
+        path = self.write('prices.csv', '\n'.join([
+            'sku,date,price',
+            'SKU-1,2024-01-01,10',
+            'SKU-1,2024-01-02,10',
+            'SKU-1,2024-01-03,10',
+        ]))
+        self.write('prices.csv.checkpoint', json.dumps({'records': 2}))
+        call_command('import_prices', path, '--resume', stdout=StringIO())
+        self.assertEqual(self.intervals(), [
+            (date(2024, 1, 3), date(2024, 1, 3), Decimal('10.00')),
+        ])
+
+    def test_rows_before_downsampled_days_are_skipped(self):
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 2, 29), Decimal('10.00'))
+        downsample_prices(date(2024, 2, 1), Granularity.MONTH)
+        path = self.write('prices.csv', '\n'.join([
+            'sku,date,price',
+            'SKU-1,2024-01-15,99',
+            'SKU-1,2024-02-01,12',
+            'SKU-1,2024-02-02,12',
+        ]))
+        stdout = StringIO()
+        call_command('import_prices', path, stdout=stdout)
+
+        self.assertEqual(self.intervals(), [
+            (date(2024, 2, 1), date(2024, 2, 2), Decimal('12.00')),
+            (date(2024, 2, 3), date(2024, 2, 29), Decimal('10.00')),
+        ])
+        self.assertIn('Imported 2 records, skipped 1', stdout.getvalue())
@@ -0,0 +1,288 @@
+import random
+import threading
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from products.models import Product, PriceInterval
+
+
+class SetPriceIntervalTestCase(TestCase):
+    def setUp(self) -> None:
+        self.product = Product.objects.create(name='Test Product')
+
+    def intervals(self):
+        return list(
+            self.product.price_intervals.order_by('valid_from').values_list(
+                'valid_from',
+                'valid_to',
+                'price',
+            )
+        )
+
+    def test_split_interval(self):
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 10), date(2024, 1, 19), Decimal('15.00'))
+
+        self.assertEqual(self.intervals(), [
+            (date(2024, 1, 1), date(2024, 1, 9), Decimal('10.00')),
+            (date(2024, 1, 10), date(2024, 1, 19), Decimal('15.00')),
+            (date(2024, 1, 20), date(2024, 1, 31), Decimal('10.00')),
+        ])
+
+    def test_trim_and_replace_intervals(self):
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 10), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 11), date(2024, 1, 15), Decimal('12.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 16), date(2024, 1, 31), Decimal('14.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 5), date(2024, 1, 20), Decimal('20.00'))
+
+        self.assertEqual(self.intervals(), [
+            (date(2024, 1, 1), date(2024, 1, 4), Decimal('10.00')),
+            (date(2024, 1, 5), date(2024, 1, 20), Decimal('20.00')),
+            (date(2024, 1, 21), date(2024, 1, 31), Decimal('14.00')),
+        ])
+
+    def test_coalesce_adjacent_intervals_with_same_price(self):
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 10), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 21), date(2024, 1, 31), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 11), date(2024, 1, 20), Decimal('10.00'))
+
+        self.assertEqual(self.intervals(), [
+            (date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00')),
+        ])
+
+    def test_adjacent_interval_with_other_price_is_kept(self):
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 10), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 11), date(2024, 1, 20), Decimal('11.00'))
+
+        self.assertEqual(self.intervals(), [
+            (date(2024, 1, 1), date(2024, 1, 10), Decimal('10.00')),
+            (date(2024, 1, 11), date(2024, 1, 20), Decimal('11.00')),
+        ])
+
+
+class AveragePriceTestCase(TestCase):
+    def setUp(self) -> None:
+        self.product = Product.objects.create(name='Test Product')
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 3), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 4), date(2024, 1, 4), Decimal('30.00'))
+
+    def test_day_weighted_average(self):
+        average_price = PriceInterval.objects.filter(
+            product=self.product,
+        ).average_price(date(2024, 1, 1), date(2024, 1, 4))
+        self.assertEqual(round(average_price, 2), Decimal('15.00'))
+
+    def test_average_of_partially_covered_interval(self):
+        average_price = PriceInterval.objects.filter(
+            product=self.product,
+        ).average_price(date(2024, 1, 3), date(2024, 1, 10))
+        self.assertEqual(round(average_price, 2), Decimal('20.00'))
+
+    def test_average_without_prices(self):
+        average_price = PriceInterval.objects.filter(
+            product=self.product,
+        ).average_price(date(2024, 2, 1), date(2024, 2, 10))
+        self.assertIsNone(average_price)
+
+
+class CumulativeAveragePriceTestCase(TestCase):
+    def setUp(self) -> None:
+        self.product = Product.objects.create(name='Test Product')
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 3, 31), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 2, 1), date(2024, 2, 10), Decimal('12.50'))
+        PriceInterval.objects.set_price(self.product, date(2024, 5, 1), date(2024, 5, 31), Decimal('9.99'))
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 20), date(2024, 1, 25), Decimal('11.00'))
+
+    def assert_same_as_scan(self, start_date, end_date):
+        intervals = PriceInterval.objects.filter(product=self.product)
+        self.assertEqual(
+            intervals.cumulative_average_price(start_date, end_date),
+            intervals.average_price(start_date, end_date),
+        )
+
+    def test_matches_range_scan(self):
+        self.assert_same_as_scan(date(2024, 1, 1), date(2024, 12, 31))
+        self.assert_same_as_scan(date(2024, 1, 22), date(2024, 2, 5))
+        self.assert_same_as_scan(date(2024, 3, 15), date(2024, 5, 10))
+        self.assert_same_as_scan(date(2023, 12, 1), date(2024, 1, 1))
+
+    def test_period_without_prices(self):
+        intervals = PriceInterval.objects.filter(product=self.product)
+        self.assertIsNone(intervals.cumulative_average_price(date(2024, 4, 1), date(2024, 4, 30)))
+
+    def test_uses_two_lookups(self):
+        intervals = PriceInterval.objects.filter(product=self.product)
+        with self.assertNumQueries(2):
+            intervals.cumulative_average_price(date(2024, 1, 1), date(2024, 12, 31))
+
+    def test_rebuild_command(self):
+        PriceInterval.objects.filter(product=self.product).update(cumulative_total=0, cumulative_days=0)
+        call_command('rebuild_price_rollups', stdout=StringIO())
+        self.assert_same_as_scan(date(2024, 1, 1), date(2024, 12, 31))
+
+
+class SetPricesConsistencyTestCase(TestCase):
+    def setUp(self) -> None:
+        self.products = [
+            Product.objects.create(name=f'Product {index}', sku=f'SKU-{index}')
+            for index in range(3)
+        ]
+
+    def test_matches_daily_prices(self):
+        rand = random.Random(42)
+        daily_prices = {product.id: dict() for product in self.products}
+        for _ in range(60):
+            start_date = date(2024, 1, 1) + timedelta(days=rand.randint(0, 90))
+            end_date = start_date + timedelta(days=rand.randint(0, 20))
+            price = Decimal(rand.choice(['9.99', '10.00', '12.50']))
+            products = rand.sample(self.products, rand.randint(1, 3))
+
+            PriceInterval.objects.set_prices([product.id for product in products], start_date, end_date, price)
+            for product in products:
+                day = start_date
+                while day <= end_date:
+                    daily_prices[product.id][day] = price
+                    day += timedelta(days=1)
+
+        for product in self.products:
+            stored = dict()
+            for interval in PriceInterval.objects.filter(product=product):
+                day = interval.valid_from
+                while day <= interval.valid_to:
+                    self.assertNotIn(day, stored)
+                    stored[day] = interval.price
+                    day += timedelta(days=1)
+            self.assertEqual(stored, daily_prices[product.id])
+            self.assertEqual(PriceInterval.objects.update_cumulative(product), 0)
+
+
+class CurrentPriceTestCase(TestCase):
+    def setUp(self) -> None:
+        self.product = Product.objects.create(name='Test Product')
+        self.today = timezone.localdate()
+
+    def current(self):
+        self.product.refresh_from_db()
+        return (
+            self.product.current_price,
+            self.product.current_price_date,
+            self.product.previous_price,
+        )
+
+    def test_follows_set_price(self):
+        self.assertEqual(self.current(), (None, None, None))
+        start = self.today - timedelta(days=10)
+        PriceInterval.objects.set_price(self.product, start, self.today + timedelta(days=10), Decimal('10.00'))
+        self.assertEqual(self.current(), (Decimal('10.00'), start, None))
+        PriceInterval.objects.set_price(self.product, self.today, self.today, Decimal('12.00'))
+        self.assertEqual(self.current(), (Decimal('12.00'), self.today, Decimal('10.00')))
+        PriceInterval.objects.set_price(self.product, self.today, self.today, Decimal('10.00'))
+        self.assertEqual(self.current(), (Decimal('10.00'), start, None))
+
+    def test_future_and_ended_prices(self):
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 2, 1), date(2024, 2, 29), Decimal('12.00'))
+        PriceInterval.objects.refresh_current_prices([self.product.pk], date(2023, 12, 31))
+        self.assertEqual(self.current(), (None, None, None))
+        PriceInterval.objects.refresh_current_prices([self.product.pk], date(2024, 2, 10))
+        self.assertEqual(self.current(), (Decimal('12.00'), date(2024, 2, 1), Decimal('10.00')))
+        PriceInterval.objects.refresh_current_prices([self.product.pk], date(2024, 3, 10))
+        self.assertEqual(self.current(), (None, date(2024, 3, 1), Decimal('12.00')))
+
+    def test_refresh_command(self):
+        PriceInterval.objects.set_price(self.product, self.today, self.today, Decimal('10.00'))
+        Product.objects.update(current_price=None, current_price_date=None)
+        call_command('refresh_current_prices', stdout=StringIO())
+        self.assertEqual(self.current(), (Decimal('10.00'), self.today, None))
+        stdout = StringIO()
+        call_command('refresh_current_prices', stdout=stdout)
+        self.assertIn('0 updated', stdout.getvalue())
+
+
+class ProductLockTestCase(TestCase):
+    def setUp(self) -> None:
+        self.products = [
+            Product.objects.create(name=f'Test Product {index}', sku=f'SKU-{index}')
+            for index in range(2)
+        ]
+        self.product_ids = [product.id for product in self.products]
+
+    def test_product_rows_are_locked(self):
+        # runs on every backend, SQLite only leaves out the FOR UPDATE clause
+        with mock.patch.object(
+            QuerySet,
+            'select_for_update',
+            autospec=True,
+            side_effect=QuerySet.select_for_update,
+        ) as select_for_update:
+            PriceInterval.objects.set_prices(self.product_ids, date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00'))
+            PriceInterval.objects.set_price_runs({
+                self.product_ids[0]: [(date(2024, 2, 1), date(2024, 2, 29), Decimal('12.00'))],
+            })
+        self.assertEqual(
+            [call.args[0].model for call in select_for_update.call_args_list],
+            [Product, Product],
+        )
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_lock_is_taken_before_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            PriceInterval.objects.set_prices(self.product_ids, date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00'))
+        statements = [query['sql'] for query in queries.captured_queries]
+        lock = next(index for index, sql in enumerate(statements) if 'FOR UPDATE' in sql)
+        self.assertIn(Product._meta.db_table, statements[lock])
+        self.assertFalse([
+            sql for sql in statements[:lock]
+            if sql.startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ])
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentSetPricesTestCase(TransactionTestCase):
+    def setUp(self) -> None:
+        self.product = Product.objects.create(name='Test Product')
+
+    def set_prices(self, seed: int, errors: list) -> None:
+        rand = random.Random(seed)
+        try:
+            for _ in range(20):
+                start_date = date(2024, 1, 1) + timedelta(days=rand.randint(0, 30))
+                end_date = start_date + timedelta(days=rand.randint(0, 15))
+                price = Decimal(rand.choice(['9.99', '10.00', '12.50']))
+                PriceInterval.objects.set_prices([self.product.id], start_date, end_date, price)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    def test_overlapping_ranges_from_threads(self):
+        errors = list()
+        threads = [
+            threading.Thread(target=self.set_prices, args=(seed, errors))
+            for seed in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        intervals = list(self.product.price_intervals.order_by('valid_from'))
+        for previous, interval in zip(intervals, intervals[1:]):
+            self.assertLess(previous.valid_to, interval.valid_from)
+        self.assertEqual(PriceInterval.objects.update_cumulative(self.product), 0)
@@ -0,0 +1,66 @@
+import re
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+
+from common.metrics import metrics
+from products.models import Category, Product, PriceInterval
+
+
+class MetricsMiddlewareTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        metrics.reset()
+        self.category = Category.objects.create(name='Test Category')
+        self.product = Product.objects.create(name='Test Product', sku='SKU-1', category=self.category)
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00'))
+
+    def metric(self, text, name, view):
+        match = re.search(rf'^{name}{{view="{view}"}} (\S+)$', text, re.MULTILINE)
+        return float(match.group(1)) if match else None
+
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/v1/products/{self.product.id}/')
+            query_count = len(queries)
+        timing = dict(
+            item.strip().split(';', 1)
+            for item in response['Server-Timing'].split(',')
+        )
+        self.assertEqual(set(timing), {'db', 'render', 'total'})
+        self.assertIn(f'desc="{query_count} queries"', timing['db'])
+
+    def test_histograms_per_view(self):
+        for _ in range(3):
+            self.client.get('/api/v1/products/')
+        self.client.get('/api/v1/missing/')
+
+        text = self.client.get('/api/v1/metrics/').content.decode()
+        self.assertIn('# TYPE request_duration_seconds histogram', text)
+        self.assertEqual(self.metric(text, 'request_duration_seconds_count', 'products:product_list'), 3)
+        self.assertEqual(self.metric(text, 'request_duration_seconds_count', 'unresolved'), 1)
+        self.assertGreater(self.metric(text, 'render_duration_seconds_sum', 'products:product_list'), 0)
+        # a miss, then two pages served from the cache without queries
+        self.assertIn(
+            'db_queries_bucket{view="products:product_list",le="0"} 2',
+            text,
+        )
+        self.assertIn(
+            'db_queries_bucket{view="products:product_list",le="+Inf"} 3',
+            text,
+        )
+
+    @override_settings(ROOT_URLCONF='products.tests.test_async_views')
+    async def test_async_views(self):
+        await self.async_client.get(f'/async/products/{self.product.id}/')
+        response = await self.async_client.get(f'/async/products/{self.product.id}/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        text = metrics.render()
+        self.assertEqual(self.metric(text, 'db_queries_count', 'async:product_details'), 2)
+        self.assertGreater(self.metric(text, 'db_queries_sum', 'async:product_details'), 0)
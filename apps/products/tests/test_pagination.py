@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from products.models import Category, Product
+
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        # bulk created products share timestamps, ties are broken by `id`
+        Product.objects.bulk_create([
+            Product(name=f'Test Product {index}', sku=f'SKU-{index}')
+            for index in range(25)
+        ])
+
+    def test_walk_all_pages(self):
+        seen = list()
+        response = self.client.get('/api/v1/products/', {'pagination': 'cursor', 'limit': 10})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen += [item['id'] for item in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        expected = [
+            str(product_id) for product_id in
+            Product.active_objects.order_by('created_at', 'id').values_list('id', flat=True)
+        ]
+        self.assertEqual(seen, expected)
+
+    def test_no_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/v1/products/', {'pagination': 'cursor'})
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/products/', {'pagination': 'cursor', 'cursor': 'broken'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_limit_offset_is_default(self):
+        response = self.client.get('/api/v1/products/', {'limit': 10, 'offset': 20})
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_categories_with_null_timestamps(self):
+        categories = [Category.objects.create(name=f'Test Category {index}') for index in range(3)]
+        Category.objects.filter(id=categories[0].id).update(created_at=None)
+
+        seen = list()
+        response = self.client.get('/api/v1/categories/', {'pagination': 'cursor', 'limit': 1})
+        while True:
+            seen += [item['id'] for item in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(sorted(seen), sorted(str(category.id) for category in categories))
+        self.assertEqual(seen[0], str(categories[0].id))
@@ -0,0 +1,246 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from tempfile import TemporaryDirectory
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from rest_framework import status
+
+from products.models import (
+    Category,
+    CategoryPriceRollup,
+    Product,
+    PriceInterval,
+)
+from products.partitions import (
+    cold_model,
+    get_partitions,
+)
+from products.snapshot import (
+    PriceSnapshot,
+    build_snapshot,
+    from_days,
+)
+
+
+@override_settings(PRICE_PARTITION_PERIOD='year')
+class PricePartitionsTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.category = Category.objects.create(name='Test Category')
+        self.product = Product.objects.create(name='Test Product', sku='SKU-1', category=self.category)
+        self.other = Product.objects.create(name='Other Product', sku='SKU-2', category=self.category)
+        PriceInterval.objects.set_price_runs({
+            self.product.id: [
+                (date(2024, 1, 1), date(2024, 10, 31), Decimal('10.00')),
+                # runs over the end of the 2024 partition
+                (date(2024, 11, 1), date(2025, 2, 28), Decimal('20.00')),
+                (date(2025, 3, 1), date(2025, 3, 31), Decimal('30.00')),
+            ],
+            self.other.id: [
+                (date(2025, 1, 1), date(2025, 3, 31), Decimal('5.00')),
+            ],
+        })
+        self.periods = [
+            (date(2024, 1, 1), date(2025, 3, 31)),
+            (date(2024, 6, 1), date(2024, 11, 15)),
+            (date(2024, 12, 1), date(2025, 1, 31)),
+            (date(2025, 2, 1), date(2025, 3, 15)),
+        ]
+        self.rollups = self.rollup_rows()
+
+    def rollup_rows(self):
+        return set(CategoryPriceRollup.objects.filter(price_count__gt=0).values_list(
+            'day',
+            'price_total',
+            'price_count',
+        ))
+
+    def average_prices(self):
+        return [
+            self.client.get(
+                f'/api/v1/prices/products/get-price/{self.product.id}/',
+                {'start_date': start_date, 'end_date': end_date},
+            ).data['average_price']
+            for start_date, end_date in self.periods
+        ]
+
+    def read(self, url, **params):
+        cache.clear()
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def detach(self, before='2025-01-01'):
+        call_command('maintain_price_partitions', '--detach-before', before, stdout=StringIO())
+
+    def test_detach_moves_old_intervals(self):
+        self.detach()
+        self.assertFalse(PriceInterval.objects.filter(valid_from__lt=date(2025, 1, 1)).exists())
+        cold = cold_model('products_priceinterval_p2024').objects.order_by('valid_from')
+        self.assertEqual(
+            list(cold.values_list('product_id', 'valid_from', 'valid_to', 'price')),
+            [
+                (self.product.id, date(2024, 1, 1), date(2024, 10, 31), Decimal('10.00')),
+                (self.product.id, date(2024, 11, 1), date(2024, 12, 31), Decimal('20.00')),
+            ],
+        )
+        self.product.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.product.cold_prices_until, date(2025, 1, 1))
+        self.assertIsNone(self.other.cold_prices_until)
+        # running totals of the live table restart at the partition end
+        self.assertEqual(
+            PriceInterval.objects.filter(product=self.product).cumulative_at(date(2025, 1, 31)),
+            (Decimal('620.00'), 31),
+        )
+
+    def test_reads_span_detached_partitions(self):
+        average_prices = self.average_prices()
+        series = self.read(
+            f'/api/v1/prices/products/get-price-series/{self.product.id}/',
+            start_date='2024-09-01',
+            end_date='2025-03-31',
+        )
+        statistics = self.read(
+            f'/api/v1/prices/products/get-price-stats/{self.product.id}/',
+            start_date='2024-12-01',
+            end_date='2025-01-31',
+        )
+        batch = self.read(
+            '/api/v1/prices/products/get-prices/',
+            category_id=self.category.id,
+            start_date='2024-12-01',
+            end_date='2025-01-31',
+        )
+        self.detach()
+        self.assertEqual(self.average_prices(), average_prices)
+        self.assertEqual(self.read(
+            f'/api/v1/prices/products/get-price-series/{self.product.id}/',
+            start_date='2024-09-01',
+            end_date='2025-03-31',
+        ), series)
+        self.assertEqual(self.read(
+            f'/api/v1/prices/products/get-price-stats/{self.product.id}/',
+            start_date='2024-12-01',
+            end_date='2025-01-31',
+        ), statistics)
+        self.assertEqual(self.read(
+            '/api/v1/prices/products/get-prices/',
+            category_id=self.category.id,
+            start_date='2024-12-01',
+            end_date='2025-01-31',
+        ), batch)
+
+    def test_history_continues_into_detached_partitions(self):
+        self.detach()
+        url = f'/api/v1/products/{self.product.id}/price-history/'
+        page = self.read(url, limit=3)
+        self.assertEqual(
+            [row['valid_from'] for row in page['results']],
+            [date(2025, 3, 1), date(2025, 1, 1), date(2024, 11, 1)],
+        )
+        page = self.read(url, limit=3, before='2024-11-01')
+        self.assertEqual([row['valid_from'] for row in page['results']], [date(2024, 1, 1)])
+        self.assertIsNone(page['next'])
+
+    def test_writes_before_partition_end_are_refused(self):
+        self.detach()
+        response = self.client.post(
+            '/api/v1/prices/products/set-price/',
+            {
+                'product_id': self.product.id,
+                'start_date': '2024-12-01',
+                'end_date': '2025-01-31',
+                'price': '15.00',
+            },
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('start_date', response.data)
+
+        # products without detached prices are still written
+        PriceInterval.objects.set_price(self.other, date(2024, 12, 1), date(2024, 12, 31), Decimal('5.00'))
+        PriceInterval.objects.set_price(self.product, date(2025, 1, 1), date(2025, 1, 31), Decimal('15.00'))
+        self.periods.append((date(2024, 12, 1), date(2025, 2, 28)))
+        self.assertEqual(self.average_prices()[-1], round(Decimal(31 * 20 + 31 * 15 + 28 * 20) / 90, 2))
+
+    def test_rollups_include_detached_prices(self):
+        self.detach()
+        self.product.soft_delete()
+        self.product.restore()
+        self.assertEqual(self.rollup_rows(), self.rollups)
+        CategoryPriceRollup.objects.all().delete()
+        call_command('rebuild_category_rollups', stdout=StringIO())
+        self.assertEqual(self.rollup_rows(), self.rollups)
+
+    @override_settings(PRICE_PARTITION_PERIOD='month')
+    def test_monthly_partitions(self):
+        average_prices = self.average_prices()
+        self.detach('2024-03-01')
+        self.assertEqual(
+            [partition.table for partition in get_partitions().detached()],
+            ['products_priceinterval_p2024_01', 'products_priceinterval_p2024_02'],
+        )
+        self.assertEqual(self.average_prices(), average_prices)
+        self.assertEqual(
+            PriceInterval.objects.filter(product=self.product).order_by('valid_from').first().valid_from,
+            date(2024, 3, 1),
+        )
+
+    @override_settings(PRICE_PARTITION_PERIOD='month')
+    def test_current_price_runs_into_detached_partitions(self):
+        self.detach()
+        self.assertEqual(
+            PriceInterval.objects.filter(product=self.product).order_by('valid_from').first().valid_from,
+            date(2025, 1, 1),
+        )
+        PriceInterval.objects.refresh_current_prices([self.product.id], date(2025, 2, 1))
+        self.product.refresh_from_db()
+        self.assertEqual(
+            (self.product.current_price, self.product.current_price_date, self.product.previous_price),
+            (Decimal('20.00'), date(2024, 11, 1), Decimal('10.00')),
+        )
+
+    def test_future_partitions_can_not_be_detached(self):
+        with self.assertRaises(CommandError):
+            self.detach('2999-01-01')
+
+    def test_export_includes_detached_prices(self):
+        self.detach()
+        stdout = StringIO()
+        call_command('export_prices', '--from', '2024-06-01', stdout=stdout)
+        rows = [line.split(',') for line in stdout.getvalue().splitlines()[1:]]
+        self.assertEqual(
+            [(sku, valid_from, valid_to, price) for _, sku, valid_from, valid_to, price in rows],
+            sorted([
+                ('SKU-1', '2024-01-01', '2024-10-31', '10.00'),
+                ('SKU-1', '2024-11-01', '2024-12-31', '20.00'),
+                ('SKU-1', '2025-01-01', '2025-02-28', '20.00'),
+                ('SKU-1', '2025-03-01', '2025-03-31', '30.00'),
+                ('SKU-2', '2025-01-01', '2025-03-31', '5.00'),
+            ], key=lambda row: (str(self.product.id if row[0] == 'SKU-1' else self.other.id), row[1])),
+        )
+
+    def test_snapshot_includes_detached_prices(self):
+        root = TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        build_snapshot(root.name)
+        self.detach()
+        # detaching split an interval, so the product is rebuilt
+        self.assertEqual(build_snapshot(root.name).rebuilt_products, 1)
+        valid_from, valid_to, price = PriceSnapshot.open(root.name).columns(self.product.id)
+        self.assertEqual(
+            [(from_days(start), from_days(end), int(cents)) for start, end, cents in zip(valid_from, valid_to, price)],
+            [
+                (date(2024, 1, 1), date(2024, 10, 31), 1000),
+                (date(2024, 11, 1), date(2024, 12, 31), 2000),
+                (date(2025, 1, 1), date(2025, 2, 28), 2000),
+                (date(2025, 3, 1), date(2025, 3, 31), 3000),
+            ],
+        )
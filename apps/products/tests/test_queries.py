@@ -0,0 +1,54 @@
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+
+from common.testing import QueryBudgetMixin
+from products.models import Category, Product, PriceInterval
+
+
+class ReadQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        for index in range(20):
+            category = Category.objects.create(name=f'Test Category {index}')
+            product = Product.objects.create(
+                name=f'Test Product {index}',
+                sku=f'SKU-{index}',
+                category=category,
+            )
+        PriceInterval.objects.set_price(product, date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00'))
+        PriceInterval.objects.set_price(product, date(2024, 2, 1), date(2024, 2, 29), Decimal('12.00'))
+        self.product = product
+
+    def get_page(self, path: str, query_params: dict) -> None:
+        # a cached page would hide the queries
+        cache.clear()
+        response = self.client.get(path, query_params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), query_params['limit'])
+
+    def test_product_list(self):
+        self.assertQueriesDoNotGrow(
+            lambda limit: self.get_page('/api/v1/products/', {'limit': limit}),
+            sizes=(1, 20),
+        )
+
+    def test_product_list_with_cursor(self):
+        self.assertQueriesDoNotGrow(
+            lambda limit: self.get_page('/api/v1/products/', {'limit': limit, 'pagination': 'cursor'}),
+            sizes=(1, 20),
+        )
+
+    def test_category_list(self):
+        self.assertQueriesDoNotGrow(
+            lambda limit: self.get_page('/api/v1/categories/', {'limit': limit}),
+            sizes=(1, 20),
+        )
+
+    def test_product_details(self):
+        # the product with its category, then the embedded intervals
+        self.assertQueryBudget(
+            2,
+            lambda: self.client.get(f'/api/v1/products/{self.product.id}/'),
+        )
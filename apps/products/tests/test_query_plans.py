@@ -0,0 +1,101 @@
+import re
+from datetime import date
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+
+from products.api.views import with_validators
+from products.models import Category, Product, PriceInterval
+
+
+class PriceIntervalQueryPlanTestCase(TestCase):
+    """
+    Hot price queries should be answered by the composite
+    indexes instead of scanning the whole table
+    """
+    def setUp(self) -> None:
+        self.product = Product.objects.create(name='Test Product')
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 2, 1), date(2024, 2, 29), Decimal('12.00'))
+
+    def explain(self, queryset: QuerySet) -> str:
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    # tiny test tables are cheaper to read sequentially,
+                    # the check is whether an index can serve the query
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def assert_uses_index(self, queryset: QuerySet) -> None:
+        plan = self.explain(queryset)
+        table = PriceInterval._meta.db_table
+        if connection.vendor == 'sqlite':
+            self.assertIn(f'SEARCH {table} USING', plan)
+            self.assertIsNone(re.search(rf'SCAN {table}\b', plan), plan)
+        elif connection.vendor == 'postgresql':
+            self.assertIn('Index', plan)
+            self.assertNotIn('Seq Scan', plan)
+
+    def product_intervals(self) -> QuerySet:
+        return PriceInterval.objects.filter(product=self.product)
+
+    def test_cumulative_lookup_uses_index(self):
+        self.assert_uses_index(
+            self.product_intervals().filter(
+                valid_from__lte=date(2024, 2, 10),
+            ).order_by('-valid_from')[:1]
+        )
+
+    def test_average_range_uses_index(self):
+        self.assert_uses_index(
+            self.product_intervals().overlapping(
+                date(2024, 1, 10),
+                date(2024, 2, 10),
+            ).values_list('valid_from', 'valid_to', 'price')
+        )
+
+    def test_history_uses_index(self):
+        self.assert_uses_index(
+            self.product_intervals().order_by('-valid_from')
+        )
+
+    def test_validators_use_index(self):
+        self.assert_uses_index(
+            with_validators(Product.active_objects).filter(id=self.product.id)
+        )
+
+
+class ProductQueryPlanTestCase(TestCase):
+    """
+    Reads of active products should use the partial indexes
+    """
+    explain = PriceIntervalQueryPlanTestCase.explain
+
+    def setUp(self) -> None:
+        self.category = Category.objects.create(name='Test Category')
+        Product.objects.create(name='Test Product', category=self.category)
+
+    def assert_uses_partial_index(self, queryset: QuerySet, name: str) -> None:
+        if connection.features.supports_partial_indexes:
+            self.assertIn(name, self.explain(queryset))
+
+    def test_product_list_uses_partial_index(self):
+        self.assert_uses_partial_index(
+            Product.active_objects.order_by('created_at', 'id')[:20],
+            'product_active_created_idx',
+        )
+
+    def test_category_products_use_partial_index(self):
+        self.assert_uses_partial_index(
+            Product.active_objects.filter(category=self.category).order_by('created_at', 'id'),
+            'product_active_category_idx',
+        )
+
+    def test_archive_candidates_use_partial_index(self):
+        self.assert_uses_partial_index(
+            Product.objects.filter(is_active=False, deactivated_at__lt=timezone.now()),
+            'product_inactive_since_idx',
+        )
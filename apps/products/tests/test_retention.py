@@ -0,0 +1,215 @@
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.utils import timezone
+from rest_framework import status
+
+from products.managers import Granularity
+from products.models import (
+    Category,
+    CategoryPriceRollup,
+    Product,
+    PriceAggregate,
+    PriceInterval,
+)
+from products.retention import (
+    downsample_prices,
+    downsample_products,
+)
+
+
+class RetentionTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.category = Category.objects.create(name='Test Category')
+        self.product = Product.objects.create(name='Test Product', sku='SKU-1', category=self.category)
+        PriceInterval.objects.set_price_runs({self.product.id: [
+            (date(2024, 1, 1), date(2024, 1, 20), Decimal('10.00')),
+            (date(2024, 1, 21), date(2024, 2, 10), Decimal('12.00')),
+            # no price from 2024-02-11 to 2024-02-19
+            (date(2024, 2, 20), date(2024, 4, 15), Decimal('15.00')),
+            (date(2024, 4, 16), date(2024, 5, 31), Decimal('20.00')),
+        ]})
+        self.url = f'/api/v1/prices/products/get-price/{self.product.id}/'
+
+    def downsample(self):
+        return downsample_prices(date(2024, 4, 1), Granularity.MONTH)
+
+    def average_price(self, start_date, end_date):
+        cache.clear()
+        return self.client.get(self.url, {'start_date': start_date, 'end_date': end_date}).data['average_price']
+
+    def test_intervals_are_replaced_by_aggregates(self):
+        report = self.downsample()
+        self.assertEqual((report.products, report.price_intervals, report.price_aggregates), (1, 3, 3))
+        self.assertGreater(report.bytes_reclaimed, 0)
+        self.assertEqual(
+            list(PriceAggregate.objects.order_by('period_start').values_list(
+                'period_start',
+                'period_end',
+                'price_total',
+                'days',
+                'min_price',
+                'max_price',
+            )),
+            [
+                (date(2024, 1, 1), date(2024, 1, 31), Decimal('332.00'), 31, Decimal('10.00'), Decimal('12.00')),
+                (date(2024, 2, 1), date(2024, 2, 29), Decimal('270.00'), 20, Decimal('12.00'), Decimal('15.00')),
+                (date(2024, 3, 1), date(2024, 3, 31), Decimal('465.00'), 31, Decimal('15.00'), Decimal('15.00')),
+            ],
+        )
+        self.assertEqual(
+            list(PriceInterval.objects.order_by('valid_from').values_list('valid_from', 'cumulative_total')),
+            [(date(2024, 4, 1), Decimal('0.00')), (date(2024, 4, 16), Decimal('225.00'))],
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.aggregated_until, date(2024, 4, 1))
+        # nothing is left to downsample
+        self.assertEqual(self.downsample().products, 0)
+
+    def test_average_price_merges_aggregates(self):
+        periods = [
+            (date(2024, 1, 1), date(2024, 5, 31)),
+            (date(2024, 3, 1), date(2024, 4, 30)),
+            (date(2024, 4, 10), date(2024, 5, 10)),
+        ]
+        average_prices = [self.average_price(*period) for period in periods]
+        self.downsample()
+        # whole aggregated periods are exact
+        self.assertEqual([self.average_price(*period) for period in periods], average_prices)
+        # periods partly in the range count in proportion
+        self.assertEqual(
+            self.average_price(date(2024, 2, 15), date(2024, 4, 10)),
+            round((Decimal(270) * 15 / 29 + 465 + 150) / (Decimal(20) * 15 / 29 + 31 + 10), 2),
+        )
+        response = self.client.get(
+            '/api/v1/prices/products/get-prices/',
+            {'product_id': self.product.id, 'start_date': '2024-03-01', 'end_date': '2024-04-30'},
+        )
+        self.assertEqual(response.data['average_prices'][0]['average_price'], average_prices[1])
+
+    def test_history_continues_into_aggregates(self):
+        self.downsample()
+        url = f'/api/v1/products/{self.product.id}/price-history/'
+        page = self.client.get(url, {'limit': 3}).data
+        self.assertEqual(
+            [(row['valid_from'], row['price']) for row in page['results']],
+            [(date(2024, 4, 16), Decimal('20.00')), (date(2024, 4, 1), Decimal('15.00')), (date(2024, 3, 1), Decimal('15.00'))],
+        )
+        self.assertEqual(page['results'][-1]['granularity'], Granularity.MONTH)
+        page = self.client.get(url, {'limit': 3, 'before': '2024-03-01'}).data
+        self.assertEqual(
+            [(row['valid_from'], row['days'], row['min_price']) for row in page['results']],
+            [(date(2024, 2, 1), 20, Decimal('12.00')), (date(2024, 1, 1), 31, Decimal('10.00'))],
+        )
+
+    def test_statistics_and_series_refuse_downsampled_days(self):
+        self.downsample()
+        for url in (
+            f'/api/v1/prices/products/get-price-stats/{self.product.id}/',
+            f'/api/v1/prices/products/get-price-series/{self.product.id}/',
+        ):
+            response = self.client.get(url, {'start_date': '2024-03-01', 'end_date': '2024-04-30'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('2024-04-01', response.data['error'])
+            response = self.client.get(url, {'start_date': '2024-04-01', 'end_date': '2024-04-30'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_writes_before_cutoff_are_refused(self):
+        self.downsample()
+        data = {
+            'product_id': self.product.id,
+            'start_date': '2024-03-20',
+            'end_date': '2024-04-20',
+            'price': '9.00',
+        }
+        response = self.client.post('/api/v1/prices/products/set-price/', data, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        data['start_date'] = '2024-04-01'
+        response = self.client.post('/api/v1/prices/products/set-price/', data, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.average_price(date(2024, 4, 1), date(2024, 4, 20)), Decimal('9.00'))
+
+    @override_settings(PRICE_PARTITION_PERIOD='month')
+    def test_detached_partitions_are_downsampled(self):
+        average_price = self.average_price(date(2024, 1, 1), date(2024, 4, 30))
+        call_command('maintain_price_partitions', '--detach-before', '2024-03-01', stdout=StringIO())
+        report = self.downsample()
+        # detaching split the runs over the month ends
+        self.assertEqual((report.price_intervals, report.price_aggregates), (5, 3))
+        self.assertEqual(
+            list(PriceAggregate.objects.order_by('period_start').values_list('price_total', 'days')),
+            [(Decimal('332.00'), 31), (Decimal('270.00'), 20), (Decimal('465.00'), 31)],
+        )
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.cold_prices_until)
+        self.assertEqual(self.average_price(date(2024, 1, 1), date(2024, 4, 30)), average_price)
+
+    def test_rebuilt_rollups_mix_aggregated_and_daily_products(self):
+        category = Category.objects.create(name='Mixed Category')
+        downsampled = Product.objects.create(name='Downsampled Product', sku='SKU-2', category=category)
+        daily = Product.objects.create(name='Daily Product', sku='SKU-3', category=category)
+        PriceInterval.objects.set_price_runs({
+            downsampled.id: [(date(2024, 1, 1), date(2024, 4, 30), Decimal('10.00'))],
+            daily.id: [
+                (date(2024, 1, 10), date(2024, 2, 14), Decimal('20.00')),
+                (date(2024, 2, 15), date(2024, 4, 30), Decimal('25.00')),
+            ],
+        })
+        rollups = CategoryPriceRollup.objects.filter(category=category, price_count__gt=0)
+        expected = set(rollups.values_list('day', 'price_total', 'price_count'))
+        downsample_products([downsampled.id], date(2024, 4, 1), Granularity.MONTH, [])
+        # days before the cutoff of one product are recounted for the other
+        CategoryPriceRollup.objects.filter(category=category, day__lt=date(2024, 3, 1)).update(price_total=0)
+
+        call_command('rebuild_category_rollups', '--category', str(category.id), stdout=StringIO())
+        self.assertEqual(set(rollups.values_list('day', 'price_total', 'price_count')), expected)
+
+    def test_current_price_runs_into_aggregates(self):
+        product = Product.objects.create(name='Current Product', sku='SKU-2', category=self.category)
+        PriceInterval.objects.set_price_runs({product.id: [
+            (date(2024, 1, 1), date(2024, 1, 31), Decimal('10.00')),
+            (date(2024, 2, 1), timezone.localdate() + timedelta(days=30), Decimal('12.00')),
+        ]})
+        downsample_products([product.id], date(2024, 4, 1), Granularity.MONTH, [])
+        self.assertEqual(PriceInterval.objects.get(product=product).valid_from, date(2024, 4, 1))
+        current = (Decimal('12.00'), date(2024, 2, 1), Decimal('10.00'))
+        PriceInterval.objects.refresh_current_prices([product.id])
+        product.refresh_from_db()
+        self.assertEqual((product.current_price, product.current_price_date, product.previous_price), current)
+
+        # without the date of the last refresh the whole aggregates are followed back
+        Product.objects.filter(pk=product.pk).update(current_price=None)
+        PriceInterval.objects.refresh_current_prices([product.id])
+        product.refresh_from_db()
+        self.assertEqual((product.current_price, product.current_price_date, product.previous_price), current)
+
+    def test_archived_products_keep_aggregates(self):
+        self.downsample()
+        self.product.soft_delete()
+        Product.objects.filter(pk=self.product.pk).update(deactivated_at=timezone.now() - timedelta(days=400))
+        call_command('archive_products', stdout=StringIO())
+        self.assertEqual(PriceAggregate.objects.count(), 3)
+        self.product.restore()
+        self.product = Product.objects.get(pk=self.product.pk)
+        self.assertEqual(self.product.aggregated_until, date(2024, 4, 1))
+        self.assertEqual(self.average_price(date(2024, 3, 1), date(2024, 3, 31)), Decimal('15.00'))
+
+        Product.objects.filter(pk=self.product.pk).delete()
+        self.assertFalse(PriceAggregate.objects.exists())
+
+    def test_command_reports_reclaimed_rows(self):
+        stdout = StringIO()
+        call_command('downsample_prices', '--days', '0', '--granularity', 'week', stdout=stdout)
+        self.assertIn('4 price intervals replaced', stdout.getvalue())
+        self.assertIn('bytes reclaimed', stdout.getvalue())
+        self.assertFalse(PriceInterval.objects.exists())
@@ -0,0 +1,185 @@
+import random
+from collections import defaultdict
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase
+from rest_framework import status
+
+from products.models import (
+    Category,
+    CategoryPriceRollup,
+    Product,
+    PriceInterval,
+)
+
+
+class CategoryPriceRollupTestCase(TestCase):
+    def setUp(self) -> None:
+        self.categories = [Category.objects.create(name=f'Test Category {index}') for index in range(2)]
+        self.products = [
+            Product.objects.create(
+                name=f'Test Product {index}',
+                sku=f'SKU-{index}',
+                category=self.categories[index % 2],
+            )
+            for index in range(4)
+        ]
+        PriceInterval.objects.set_prices(
+            [product.id for product in self.products],
+            date(2024, 1, 1),
+            date(2024, 1, 31),
+            Decimal('10.00'),
+        )
+
+    def rollups(self):
+        return {
+            (row.category_id, row.day): (row.price_total, row.price_count)
+            for row in CategoryPriceRollup.objects.all()
+            if row.price_total or row.price_count
+        }
+
+    def expected_rollups(self):
+        totals = defaultdict(lambda: (Decimal(0), 0))
+        intervals = PriceInterval.objects.filter(
+            product__is_active=True,
+            product__category__isnull=False,
+        ).select_related('product')
+        for interval in intervals:
+            day = interval.valid_from
+            while day <= interval.valid_to:
+                total, count = totals[(interval.product.category_id, day)]
+                totals[(interval.product.category_id, day)] = (total + interval.price, count + 1)
+                day += timedelta(days=1)
+        return dict(totals)
+
+    def assert_consistent(self):
+        self.assertEqual(self.rollups(), self.expected_rollups())
+
+    def test_set_prices(self):
+        self.assert_consistent()
+        rand = random.Random(0)
+        for _ in range(30):
+            start_date = date(2024, 1, 1) + timedelta(days=rand.randint(0, 60))
+            end_date = start_date + timedelta(days=rand.randint(0, 20))
+            products = rand.sample(self.products, rand.randint(1, 4))
+            PriceInterval.objects.set_prices(
+                [product.id for product in products],
+                start_date,
+                end_date,
+                Decimal(rand.choice(['9.99', '10.00', '12.50'])),
+            )
+        self.assert_consistent()
+
+    def test_set_price_runs(self):
+        PriceInterval.objects.set_price_runs({
+            self.products[0].id: [
+                (date(2024, 1, 10), date(2024, 1, 12), Decimal('11.00')),
+                (date(2024, 1, 20), date(2024, 2, 5), Decimal('12.00')),
+            ],
+            self.products[1].id: [(date(2023, 12, 25), date(2024, 1, 2), Decimal('9.00'))],
+        })
+        self.assert_consistent()
+
+    def test_product_moves_between_categories(self):
+        product = self.products[0]
+        product.category = self.categories[1]
+        product.save()
+        self.assert_consistent()
+        product.category = None
+        product.save()
+        self.assert_consistent()
+
+    def test_move_reads_category_of_the_locked_row(self):
+        product = self.products[0]
+        stale = Product.objects.get(pk=product.pk)
+        product.category = self.categories[1]
+        product.save()
+        # the moved prices are found where the saved row puts them
+        stale.name = 'Renamed Product'
+        with mock.patch.object(
+            QuerySet,
+            'select_for_update',
+            autospec=True,
+            side_effect=QuerySet.select_for_update,
+        ) as select_for_update:
+            stale.save()
+        self.assertEqual(select_for_update.call_args_list[0].args[0].model, Product)
+        self.assert_consistent()
+
+    def test_soft_delete_and_restore(self):
+        self.products[0].soft_delete()
+        self.assert_consistent()
+        self.products[0].restore()
+        self.assert_consistent()
+
+    def test_delete_product(self):
+        self.products[0].delete()
+        self.assert_consistent()
+
+    def test_uncategorized_product(self):
+        product = Product.objects.create(name='Other Product', sku='SKU-9')
+        PriceInterval.objects.set_price(product, date(2024, 1, 1), date(2024, 1, 31), Decimal('1.00'))
+        self.assert_consistent()
+        product.category = self.categories[0]
+        product.save()
+        self.assert_consistent()
+
+    def test_rebuild_command(self):
+        expected = self.rollups()
+        CategoryPriceRollup.objects.update(price_total=0, price_count=0)
+        call_command('rebuild_category_rollups', stdout=StringIO())
+        self.assertEqual(self.rollups(), expected)
+
+
+class CategoryPriceIndexViewTestCase(TestCase):
+    def setUp(self) -> None:
+        self.category = Category.objects.create(name='Test Category')
+        products = [
+            Product.objects.create(name=f'Test Product {index}', sku=f'SKU-{index}', category=self.category)
+            for index in range(2)
+        ]
+        PriceInterval.objects.set_price(products[0], date(2024, 1, 1), date(2024, 2, 29), Decimal('10.00'))
+        PriceInterval.objects.set_price(products[1], date(2024, 1, 1), date(2024, 1, 31), Decimal('20.00'))
+        PriceInterval.objects.set_price(products[1], date(2024, 2, 1), date(2024, 2, 10), Decimal('30.00'))
+        self.url = f'/api/v1/categories/{self.category.id}/price-index/'
+
+    def test_month_buckets(self):
+        response = self.client.get(self.url, {'start_date': '2024-01-01', 'end_date': '2024-03-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['granularity'], 'month')
+        self.assertEqual(response.data['price_index'], [
+            {'period': date(2024, 1, 1), 'average_price': Decimal('15.00')},
+            # (29 * 10 + 10 * 30) / 39
+            {'period': date(2024, 2, 1), 'average_price': Decimal('15.13')},
+        ])
+
+    def test_week_buckets(self):
+        response = self.client.get(self.url, {
+            'start_date': '2024-01-03',
+            'end_date': '2024-01-10',
+            'granularity': 'week',
+        })
+        self.assertEqual(
+            [item['period'] for item in response.data['price_index']],
+            [date(2024, 1, 1), date(2024, 1, 8)],
+        )
+
+    def test_errors(self):
+        response = self.client.get(self.url, {
+            'start_date': '2024-01-01',
+            'end_date': '2024-03-31',
+            'granularity': 'year',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            '/api/v1/categories/00000000-0000-0000-0000-000000000000/price-index/',
+            {'start_date': '2024-01-01', 'end_date': '2024-03-31'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
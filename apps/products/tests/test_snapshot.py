@@ -0,0 +1,100 @@
+from datetime import date
+from decimal import Decimal
+from tempfile import TemporaryDirectory
+from uuid import uuid4
+import numpy
+from django.test import TestCase
+
+from products.models import Product, PriceInterval
+from products.snapshot import (
+    PriceSnapshot,
+    build_snapshot,
+    from_days,
+)
+
+
+class PriceSnapshotTestCase(TestCase):
+    def setUp(self) -> None:
+        self.root = TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        self.products = [
+            Product.objects.create(name=f'Test Product {index}', sku=f'SKU-{index}')
+            for index in range(3)
+        ]
+        for index, product in enumerate(self.products[:2]):
+            for month in range(1, 7):
+                PriceInterval.objects.set_price(
+                    product,
+                    date(2024, month, 1),
+                    date(2024, month, 20),
+                    Decimal(10 + index + month),
+                )
+
+    def intervals(self, snapshot, product, start_date=None, end_date=None):
+        valid_from, valid_to, price = snapshot.columns(product.id, start_date, end_date)
+        return [
+            (from_days(start), from_days(end), Decimal(int(cents)) / 100)
+            for start, end, cents in zip(valid_from, valid_to, price)
+        ]
+
+    def assert_matches_database(self, snapshot):
+        for product in self.products:
+            self.assertEqual(
+                self.intervals(snapshot, product),
+                list(product.price_intervals.order_by('valid_from').values_list(
+                    'valid_from',
+                    'valid_to',
+                    'price',
+                )),
+            )
+
+    def test_full_build(self):
+        result = build_snapshot(self.root.name)
+        self.assertEqual((result.products, result.rows, result.rebuilt_products), (2, 12, 2))
+        snapshot = PriceSnapshot.open(self.root.name)
+        self.assertEqual(len(snapshot), 2)
+        self.assertNotIn(self.products[2].id, snapshot)
+        self.assertEqual(set(snapshot.product_ids()), {product.id for product in self.products[:2]})
+        self.assert_matches_database(snapshot)
+
+    def test_columns_are_views_of_the_files(self):
+        build_snapshot(self.root.name)
+        snapshot = PriceSnapshot.open(self.root.name)
+        valid_from, _, price = snapshot.columns(self.products[1].id)
+        self.assertIsInstance(valid_from, numpy.memmap)
+        self.assertTrue(numpy.shares_memory(price, snapshot.price))
+
+    def test_period_slicing(self):
+        build_snapshot(self.root.name)
+        snapshot = PriceSnapshot.open(self.root.name)
+        self.assertEqual(
+            self.intervals(snapshot, self.products[0], date(2024, 2, 25), date(2024, 4, 1)),
+            [
+                (date(2024, 3, 1), date(2024, 3, 20), Decimal('13')),
+                (date(2024, 4, 1), date(2024, 4, 20), Decimal('14')),
+            ],
+        )
+        self.assertEqual(self.intervals(snapshot, self.products[0], date(2024, 7, 1)), [])
+        self.assertEqual(self.intervals(snapshot, self.products[2]), [])
+
+    def test_incremental_build(self):
+        build_snapshot(self.root.name)
+        PriceInterval.objects.set_price(self.products[0], date(2024, 1, 10), date(2024, 2, 10), Decimal('99.00'))
+        self.products[1].price_intervals.filter(valid_from=date(2024, 6, 1)).delete()
+        PriceInterval.objects.set_price(self.products[2], date(2024, 1, 1), date(2024, 1, 1), Decimal('5.00'))
+
+        result = build_snapshot(self.root.name)
+        self.assertEqual(result.rebuilt_products, 3)
+        snapshot = PriceSnapshot.open(self.root.name)
+        self.assertEqual(snapshot.version, result.version)
+        self.assert_matches_database(snapshot)
+
+        result = build_snapshot(self.root.name)
+        self.assertEqual(result.rebuilt_products, 0)
+        self.assert_matches_database(PriceSnapshot.open(self.root.name))
+
+    def test_missing_snapshot(self):
+        with self.assertRaises(FileNotFoundError):
+            PriceSnapshot.open(self.root.name)
+        build_snapshot(self.root.name)
+        self.assertIsNone(PriceSnapshot.open(self.root.name).index(uuid4()))
@@ -0,0 +1,111 @@
+import statistics
+from datetime import (
+    date,
+    timedelta,
+)
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+
+from products.models import Product, PriceInterval
+from products.statistics import (
+    daily_prices,
+    price_statistics,
+)
+
+
+class PriceStatisticsTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.product = Product.objects.create(name='Test Product', sku='SKU-1')
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 1), date(2024, 1, 10), Decimal('10.00'))
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 11), date(2024, 1, 20), Decimal('12.50'))
+        # no price from 2024-01-21 to 2024-01-24
+        PriceInterval.objects.set_price(self.product, date(2024, 1, 25), date(2024, 2, 15), Decimal('9.99'))
+        PriceInterval.objects.set_price(self.product, date(2024, 2, 16), date(2024, 3, 31), Decimal('11.00'))
+        self.url = f'/api/v1/prices/products/get-price-stats/{self.product.id}/'
+
+    def prices_by_day(self, start_date, end_date):
+        prices = dict()
+        for interval in self.product.price_intervals.all():
+            day = interval.valid_from
+            while day <= interval.valid_to:
+                prices[day] = interval.price
+                day += timedelta(days=1)
+        days = [start_date + timedelta(days=index) for index in range((end_date - start_date).days + 1)]
+        return [(day, prices.get(day)) for day in days]
+
+    def rows(self):
+        return list(self.product.price_intervals.order_by('valid_from').values_list('valid_from', 'valid_to', 'price'))
+
+    def test_daily_prices(self):
+        daily = daily_prices(self.rows(), date(2024, 1, 9), date(2024, 1, 26))
+        expected = [price for _, price in self.prices_by_day(date(2024, 1, 9), date(2024, 1, 26))]
+        self.assertEqual(
+            [None if value != value else Decimal(str(value)) for value in daily],
+            [None if price is None else price.normalize() for price in expected],
+        )
+
+    def test_matches_python_statistics(self):
+        start_date, end_date = date(2024, 1, 5), date(2024, 3, 10)
+        result = price_statistics(self.rows(), start_date, end_date)
+        prices = [float(price) for _, price in self.prices_by_day(start_date, end_date) if price is not None]
+        deciles = statistics.quantiles(prices, n=10, method='inclusive')
+        self.assertEqual(result['days'], len(prices))
+        self.assertEqual((result['min'], result['max']), (9.99, 12.5))
+        self.assertAlmostEqual(result['mean'], statistics.fmean(prices), places=2)
+        self.assertAlmostEqual(result['median'], statistics.median(prices), places=2)
+        self.assertAlmostEqual(result['p10'], deciles[0], places=2)
+        self.assertAlmostEqual(result['p90'], deciles[-1], places=2)
+        self.assertAlmostEqual(result['stddev'], statistics.pstdev(prices), places=2)
+        # 10.00 -> 12.50 -> (gap) 9.99 -> 11.00
+        self.assertEqual(result['changes'], 3)
+
+    def test_moving_averages(self):
+        start_date, end_date = date(2024, 1, 15), date(2024, 2, 20)
+        result = price_statistics(self.rows(), start_date, end_date)
+        history = self.prices_by_day(start_date - timedelta(days=29), end_date)
+        self.assertEqual(len(result['moving_averages']), (end_date - start_date).days + 1)
+        for index, point in enumerate(result['moving_averages']):
+            self.assertEqual(point['date'], start_date + timedelta(days=index))
+            for window in (7, 30):
+                prices = [
+                    float(price) for _, price in history[index + 30 - window:index + 30]
+                    if price is not None
+                ]
+                self.assertAlmostEqual(point[f'ma_{window}'], statistics.fmean(prices), places=2)
+
+    def test_period_without_prices(self):
+        result = price_statistics(self.rows(), date(2024, 5, 1), date(2024, 5, 3))
+        self.assertEqual(result['days'], 0)
+        self.assertIsNone(result['median'])
+        self.assertEqual([point['ma_7'] for point in result['moving_averages']], [None, None, None])
+
+    def test_endpoint(self):
+        query_params = {'start_date': '2024-01-05', 'end_date': '2024-03-10'}
+        # the product and the intervals
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, query_params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['min'], 9.99)
+        self.assertEqual(response.json()['moving_averages'][0]['date'], '2024-01-05')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, query_params)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        PriceInterval.objects.set_price(self.product, date(2024, 2, 1), date(2024, 2, 1), Decimal('1.00'))
+        response = self.client.get(self.url, query_params)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['min'], 1.0)
+
+    def test_endpoint_errors(self):
+        response = self.client.get(self.url, {'start_date': '2024-01-05'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            '/api/v1/prices/products/get-price-stats/00000000-0000-0000-0000-000000000000/',
+            {'start_date': '2024-01-05', 'end_date': '2024-01-06'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,6 +1,7 @@
 import json
 from uuid import uuid4
 from datetime import (
+    date,
     datetime,
     timedelta,
 )
@@ -8,17 +9,24 @@ from decimal import Decimal
 from django.test import TestCase
 from django.utils import timezone
 from rest_framework import status
+from rest_framework.serializers import ValidationError
 
-from products.models import Product, PriceItem
+from common.testing import QueryBudgetMixin
+from products.api.serializers import (
+    BulkSetPriceForPeriodSerializer,
+    SetPriceForPeriodSerializer,
+)
+from products.models import Category, Product, PriceInterval
 
 
 class GetPriceForPeriodViewTestCase(TestCase):
     def setUp(self) -> None:
         self.product = Product.objects.create(name='Test Product')
 
-        PriceItem.objects.create(product=self.product, date=datetime(2024, 1, 1), price=10)
-        PriceItem.objects.create(product=self.product, date=datetime(2024, 1, 2), price=20)
-        PriceItem.objects.create(product=self.product, date=datetime(2024, 1, 3), price=30)
+        PriceInterval.objects.create(product=self.product, valid_from=datetime(2024, 1, 1), valid_to=datetime(2024, 1, 1), price=10)
+        PriceInterval.objects.create(product=self.product, valid_from=datetime(2024, 1, 2), valid_to=datetime(2024, 1, 2), price=20)
+        PriceInterval.objects.create(product=self.product, valid_from=datetime(2024, 1, 3), valid_to=datetime(2024, 1, 3), price=30)
+        PriceInterval.objects.update_cumulative(self.product)
 
     def test_get_average_price_for_period(self):
         query_params = {'start_date': '2024-01-01', 'end_date': '2024-01-03'}
@@ -73,7 +81,7 @@ class SetPriceForPeriodViewTest(TestCase):
             content_type='application/json',
         )
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertAlmostEquals(self.product.price_items.count(), 2)
+        self.assertAlmostEquals(self.product.price_intervals.count(), 1)
 
     def test_set_price_for_period_invalid_date(self):
         data = {
@@ -88,4 +96,304 @@ class SetPriceForPeriodViewTest(TestCase):
             content_type='application/json',
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertEqual(self.product.price_items.count(), 0)        
+        self.assertEqual(self.product.price_intervals.count(), 0)        
+
+
+class GetPriceSeriesViewTestCase(TestCase):
+    def setUp(self) -> None:
+        self.product = Product.objects.create(name='Test Product')
+
+        PriceInterval.objects.create(product=self.product, valid_from=datetime(2024, 1, 1), valid_to=datetime(2024, 1, 31), price=10)
+        PriceInterval.objects.create(product=self.product, valid_from=datetime(2024, 2, 1), valid_to=datetime(2024, 3, 31), price=20)
+
+    def get_series(self, query_params):
+        return self.client.get(f'/api/v1/prices/products/get-price-series/{self.product.id}/', query_params)
+
+    def test_monthly_average_prices(self):
+        query_params = {'start_date': '2024-01-15', 'end_date': '2024-04-30', 'granularity': 'month'}
+        with self.assertNumQueries(2):
+            response = self.get_series(query_params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['period'], item['average_price']) for item in response.data['average_prices']],
+            [
+                (datetime(2024, 1, 1).date(), Decimal('10.00')),
+                (datetime(2024, 2, 1).date(), Decimal('20.00')),
+                (datetime(2024, 3, 1).date(), Decimal('20.00')),
+            ],
+        )
+
+    def test_weekly_periods_start_on_monday(self):
+        query_params = {'start_date': '2024-01-31', 'end_date': '2024-02-04', 'granularity': 'week'}
+        response = self.get_series(query_params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['average_prices'], [
+            {'period': datetime(2024, 1, 29).date(), 'average_price': Decimal('18.00')},
+        ])
+
+    def test_quarterly_average_is_day_weighted(self):
+        query_params = {'start_date': '2024-01-01', 'end_date': '2024-12-31', 'granularity': 'quarter'}
+        response = self.get_series(query_params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['average_prices'], [
+            {'period': datetime(2024, 1, 1).date(), 'average_price': Decimal('16.59')},
+        ])
+
+    def test_invalid_granularity(self):
+        query_params = {'start_date': '2024-01-01', 'end_date': '2024-01-31', 'granularity': 'year'}
+        response = self.get_series(query_params)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Granularity', response.data['error'])
+
+
+class BulkSetPriceForPeriodViewTest(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        self.category = Category.objects.create(name='Test Category')
+        self.products = [
+            Product.objects.create(name=f'Test Product {index}', sku=f'SKU-{index}', category=self.category)
+            for index in range(3)
+        ]
+        self.inactive_product = Product.objects.create(
+            name='Inactive Product',
+            sku='SKU-INACTIVE',
+            category=self.category,
+            is_active=False,
+        )
+
+    def post(self, data):
+        return self.client.post(
+            '/api/v1/prices/products/bulk-set-price/',
+            json.dumps(data),
+            content_type='application/json',
+        )
+
+    def test_set_price_for_category(self):
+        response = self.post({
+            'category_id': str(self.category.id),
+            'start_date': '2024-04-01',
+            'end_date': '2024-04-30',
+            'price': '10.00',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['results']), 3)
+        for product in self.products:
+            self.assertEqual(product.price_intervals.count(), 1)
+        self.assertEqual(self.inactive_product.price_intervals.count(), 0)
+
+    def test_set_price_for_products(self):
+        missing_id = uuid4()
+        response = self.post({
+            'product_ids': [str(self.products[0].id), str(missing_id)],
+            'start_date': '2024-04-01',
+            'end_date': '2024-04-30',
+            'price': '10.00',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['results'], [
+            {'product_id': self.products[0].id, 'status': 'updated'},
+            {'product_id': missing_id, 'status': 'not_found'},
+        ])
+        self.assertEqual(self.products[0].price_intervals.count(), 1)
+        self.assertEqual(self.products[1].price_intervals.count(), 0)
+
+    def test_products_deactivated_after_validation_are_skipped(self):
+        data = {
+            'start_date': '2024-04-01',
+            'end_date': '2024-04-30',
+            'price': '10.00',
+        }
+        serializer = BulkSetPriceForPeriodSerializer(data={
+            'product_ids': [str(product.id) for product in self.products],
+            **data,
+        })
+        self.assertTrue(serializer.is_valid())
+        single = SetPriceForPeriodSerializer(data={'product_id': str(self.products[1].id), **data})
+        self.assertTrue(single.is_valid())
+        # deactivated and deleted between the lookup and the write
+        Product.objects.filter(pk=self.products[1].pk).update(is_active=False)
+        Product.objects.filter(pk=self.products[2].pk).delete()
+
+        self.assertEqual(
+            [result['status'] for result in serializer.save()['results']],
+            ['updated', 'not_found', 'not_found'],
+        )
+        with self.assertRaises(ValidationError):
+            single.save()
+        self.assertEqual(self.products[0].price_intervals.count(), 1)
+        self.assertFalse(PriceInterval.objects.filter(product_id__in=[self.products[1].id, self.products[2].id]).exists())
+
+    def test_read_only_products_are_skipped(self):
+        Product.objects.filter(pk=self.products[1].pk).update(aggregated_until=date(2024, 4, 15))
+        response = self.post({
+            'product_ids': [str(product.id) for product in self.products],
+            'start_date': '2024-04-01',
+            'end_date': '2024-04-30',
+            'price': '10.00',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['updated', 'read_only', 'updated'],
+        )
+        self.assertFalse(self.products[1].price_intervals.exists())
+        self.assertEqual(self.products[2].price_intervals.count(), 1)
+
+    def test_category_or_products_required(self):
+        response = self.post({
+            'start_date': '2024-04-01',
+            'end_date': '2024-04-30',
+            'price': '10.00',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_queries_do_not_grow_with_products(self):
+        data = {
+            'category_id': str(self.category.id),
+            'start_date': '2024-04-01',
+            'end_date': '2024-04-30',
+            'price': '10.00',
+        }
+        self.post(data)
+        data['price'] = '11.00'
+        few_products = len(self.capture_queries(lambda: self.post(data)))
+        for index in range(3, 30):
+            Product.objects.create(name=f'Test Product {index}', sku=f'SKU-{index}', category=self.category)
+        data['price'] = '10.00'
+        self.post(data)
+        data['price'] = '11.00'
+        self.assertQueryBudget(few_products, lambda: self.post(data))
+
+
+class PriceHistoryViewTestCase(TestCase):
+    def setUp(self) -> None:
+        self.product = Product.objects.create(name='Test Product')
+        for month in range(1, 13):
+            PriceInterval.objects.set_price(
+                self.product,
+                datetime(2024, month, 1).date(),
+                datetime(2024, month, 10).date(),
+                Decimal(month),
+            )
+
+    def get_history(self, query_params):
+        return self.client.get(f'/api/v1/products/{self.product.id}/price-history/', query_params)
+
+    def test_keyset_pages(self):
+        response = self.get_history({'limit': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['price'] for item in response.data['results']],
+            [Decimal(month) for month in range(12, 7, -1)],
+        )
+        self.assertIn('before=2024-08-01', response.data['next'])
+
+        seen = [item['valid_from'] for item in response.data['results']]
+        next_url = response.data['next']
+        while next_url:
+            response = self.client.get(next_url)
+            seen += [item['valid_from'] for item in response.data['results']]
+            next_url = response.data['next']
+        self.assertEqual(seen, [datetime(2024, month, 1).date() for month in range(12, 0, -1)])
+
+    def test_filter_by_dates(self):
+        response = self.get_history({'from': '2024-03-05', 'to': '2024-05-01'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['valid_from'] for item in response.data['results']],
+            [datetime(2024, 5, 1).date(), datetime(2024, 4, 1).date(), datetime(2024, 3, 1).date()],
+        )
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_limit(self):
+        response = self.get_history({'limit': 'many'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_details_embed_latest_intervals(self):
+        response = self.client.get(f'/api/v1/products/{self.product.id}/', {'price_intervals': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['valid_from'] for item in response.data['price_intervals']],
+            [datetime(2024, 12, 1).date(), datetime(2024, 11, 1).date()],
+        )
+
+        response = self.client.get(f'/api/v1/products/{self.product.id}/', {'price_intervals': 0})
+        self.assertEqual(response.data['price_intervals'], [])
+
+
+class GetPricesForPeriodViewTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        self.category = Category.objects.create(name='Test Category')
+        self.products = [
+            Product.objects.create(name=f'Test Product {index}', sku=f'SKU-{index}', category=self.category)
+            for index in range(3)
+        ]
+        for index, product in enumerate(self.products[:2]):
+            PriceInterval.objects.set_price(
+                product,
+                datetime(2024, 1, 1).date(),
+                datetime(2024, 1, 31).date(),
+                Decimal(10 + index),
+            )
+            PriceInterval.objects.set_price(
+                product,
+                datetime(2024, 1, 16).date(),
+                datetime(2024, 2, 15).date(),
+                Decimal(20 + index),
+            )
+
+    def get_prices(self, query_params):
+        return self.client.get('/api/v1/prices/products/get-prices/', query_params)
+
+    def test_same_as_single_product_endpoint(self):
+        period = {'start_date': '2024-01-10', 'end_date': '2024-02-20'}
+        response = self.get_prices({'category_id': str(self.category.id), **period})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['not_found'], [])
+        self.assertEqual(
+            [item['product_id'] for item in response.data['average_prices']],
+            [product.id for product in self.products],
+        )
+        for item in response.data['average_prices']:
+            single = self.client.get(f'/api/v1/prices/products/get-price/{item["product_id"]}/', period)
+            self.assertEqual(item['average_price'], single.data['average_price'])
+        self.assertIsNone(response.data['average_prices'][2]['average_price'])
+
+    def test_products_and_not_found(self):
+        missing_id = uuid4()
+        response = self.get_prices({
+            'product_id': [str(self.products[1].id), str(missing_id)],
+            'start_date': '2024-01-01',
+            'end_date': '2024-01-15',
+        })
+        self.assertEqual(response.data['average_prices'], [
+            {'product_id': self.products[1].id, 'average_price': Decimal('11.00')},
+        ])
+        self.assertEqual(response.data['not_found'], [missing_id])
+
+    def test_validation(self):
+        period = {'start_date': '2024-01-01', 'end_date': '2024-01-15'}
+        response = self.get_prices(period)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.get_prices({'category_id': str(self.category.id), 'product_id': str(self.products[0].id), **period})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.get_prices({'category_id': str(self.category.id), 'start_date': '2024-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.get_prices({'category_id': str(uuid4()), **period})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_queries_do_not_grow_with_products(self):
+        def get_prices(count):
+            for index in range(len(self.products), count):
+                self.products.append(Product.objects.create(
+                    name=f'Test Product {index}',
+                    sku=f'SKU-{index}',
+                    category=self.category,
+                ))
+            return self.get_prices({
+                'category_id': str(self.category.id),
+                'start_date': '2024-01-01',
+                'end_date': '2024-01-31',
+            })
+
+        get_prices(30)
+        self.assertQueryBudget(3, lambda: get_prices(30))
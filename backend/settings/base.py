@@ -43,6 +43,7 @@ THIRD_PARTY_APPS = [
 INSTALLED_APPS = DJANGO_APPS + PROJECT_APPS + THIRD_PARTY_APPS
 
 MIDDLEWARE = [
+    'common.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -72,7 +73,7 @@ TEMPLATES = [
 ]
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'common.pagination.LimitOffsetOrKeysetPagination',
     'PAGE_SIZE': 100,
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
@@ -85,6 +86,36 @@ REST_FRAMEWORK = {
     )
 }
 
+# Cached list pages are also invalidated on every change, with
+# a cache local to the process they expire after 100s at most
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Latest price intervals embedded into product details
+PRICE_HISTORY_EMBED_LIMIT = 10
+PRICE_HISTORY_PAGE_SIZE = 100
+PRICE_HISTORY_MAX_PAGE_SIZE = 1000
+
+# Products per request of the batch average price endpoint
+PRICE_BATCH_MAX_PRODUCTS = 1000
+
+# Rows fetched per round trip while streaming price exports
+PRICE_EXPORT_CHUNK_SIZE = 2000
+
+# Price intervals are partitioned by `valid_from` per month or year,
+# see `maintain_price_partitions`
+PRICE_PARTITION_PERIOD = env('PRICE_PARTITION_PERIOD', default='year')
+
+# Price intervals older than this many days are replaced by
+# aggregates of `PRICE_DOWNSAMPLE_GRANULARITY`, see `downsample_prices`
+PRICE_RETENTION_DAYS = env.int('PRICE_RETENTION_DAYS', default=730)
+PRICE_DOWNSAMPLE_GRANULARITY = env('PRICE_DOWNSAMPLE_GRANULARITY', default='month')
+
+# Columnar snapshot of the price intervals for analytics
+PRICE_SNAPSHOT_DIR = env('PRICE_SNAPSHOT_DIR', default=str(BASE_DIR / 'snapshots'))
+
+# Serve the read endpoints with async views, for ASGI deployments
+ASYNC_READ_VIEWS = env.bool('ASYNC_READ_VIEWS', default=False)
+
 WSGI_APPLICATION = 'backend.wsgi.application'
 
 CORS_ORIGIN_ALLOW_ALL = True
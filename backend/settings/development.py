@@ -12,4 +12,7 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
     }
-}
\ No newline at end of file
+}
+
+# SQLite builds covering indexes without their non-key columns
+SILENCED_SYSTEM_CHECKS = ['models.W040']